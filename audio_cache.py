@@ -0,0 +1,162 @@
+# This Python file uses the following encoding: utf-8
+import os
+import re
+import shutil
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Normalize input text so trivially different copies share a cache entry"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def make_cache_key(text, voice, model, instructions, output_format):
+    """Hash everything that affects the generated audio"""
+    digest = hashlib.sha256()
+    for part in (normalize_text(text), voice, model, instructions or "", output_format):
+        digest.update(part.encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class AudioCache:
+    """Persistent content-addressed store of generated audio.
+
+    Entries live under `cache_dir` as `<key[:2]>/<key>` and are evicted least
+    recently used first once the total size exceeds `max_bytes`. Recency is
+    kept in the file modification time, so it survives restarts.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = None  # key -> size, least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / key
+
+    def _load_index(self):
+        """Scan the cache directory once, oldest entries first"""
+        if self.entries is not None:
+            return
+        found = []
+        for path in self.cache_dir.glob("??/*"):
+            if path.name.endswith(".tmp"):
+                # Leftover from an interrupted write
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            found.append((stat.st_mtime, path.name, stat.st_size))
+        found.sort()
+
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        for _, key, size in found:
+            self.entries[key] = size
+            self.total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                self._path(key).unlink(missing_ok=True)
+            except OSError:
+                # Still open elsewhere (e.g. a preview playing on Windows)
+                pass
+
+    def trim(self):
+        """Load the index and evict entries over the size limit (e.g. at startup)"""
+        with self.lock:
+            self._load_index()
+            self._evict()
+
+    def lookup(self, key):
+        """Path of a cached entry for use in place, or None on a miss"""
+        with self.lock:
+            self._load_index()
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                size = self.entries.pop(key, None)
+                if size is not None:
+                    self.total_bytes -= size
+            return None
+        return path
+
+    def get(self, key, dest):
+        """Copy a cached entry to `dest`. Returns False on a miss."""
+        with self.lock:
+            self._load_index()
+            if key not in self.entries:
+                self.misses += 1
+                return False
+            self.entries.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            shutil.copyfile(path, dest)
+            os.utime(path)
+        except OSError:
+            # Entry vanished underneath us; treat as a miss
+            with self.lock:
+                size = self.entries.pop(key, None)
+                if size is not None:
+                    self.total_bytes -= size
+                self.misses += 1
+            return False
+
+        with self.lock:
+            self.hits += 1
+        return True
+
+    def put(self, key, src, move=False):
+        """Store a copy of `src` under `key` (or move it in, if `move` is set)"""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+        try:
+            if move:
+                os.replace(src, path)
+            else:
+                shutil.copyfile(src, tmp_path)
+                os.replace(tmp_path, path)
+            size = path.stat().st_size
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self.lock:
+            self._load_index()
+            self.total_bytes -= self.entries.pop(key, 0)
+            self.entries[key] = size
+            self.total_bytes += size
+            self._evict()
+
+    def reset_counters(self):
+        """Start counting hits and misses for a new run"""
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
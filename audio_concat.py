@@ -0,0 +1,90 @@
+# This Python file uses the following encoding: utf-8
+import struct
+import shutil
+import wave
+
+# Formats produced by the API whose streams can be joined without re-encoding
+CONCATENABLE_FORMATS = ('mp3', 'aac', 'opus', 'flac', 'wav')
+
+
+def _strip_id3(data, keep_leading, keep_trailing):
+    """Remove ID3v2 (leading) and ID3v1 (trailing) tags from an MP3 stream"""
+    if not keep_leading and data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer:]
+    if not keep_trailing and len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+def _flac_frames(data):
+    """Split a FLAC stream into (metadata header, audio frames)"""
+    if data[:4] != b"fLaC":
+        raise ValueError("not a FLAC stream")
+    offset = 4
+    while True:
+        block_header = data[offset]
+        length = int.from_bytes(data[offset + 1:offset + 4], 'big')
+        offset += 4 + length
+        if block_header & 0x80:  # last metadata block
+            return data[:offset], data[offset:]
+
+
+def _join_flac(parts):
+    header, frames = _flac_frames(parts[0])
+    header = bytearray(header)
+    # STREAMINFO follows the marker and its 4-byte block header. The joined
+    # stream's length and checksum differ from the first part's, so mark
+    # them unknown (0) as the format allows, along with the frame sizes.
+    info = 8
+    header[info + 4:info + 10] = bytes(6)  # min/max frame size
+    packed = struct.unpack(">Q", header[info + 10:info + 18])[0]
+    header[info + 10:info + 18] = struct.pack(">Q", packed & ~((1 << 36) - 1))  # total samples
+    header[info + 18:info + 34] = bytes(16)  # MD5
+    return bytes(header) + frames + b"".join(_flac_frames(part)[1] for part in parts[1:])
+
+
+def concatenate_audio(part_files, dest, output_format):
+    """Join audio files of the same format, in order, into `dest`.
+
+    MP3 and AAC (ADTS) are frame streams and are joined after dropping the
+    ID3 tags between parts. Opus files become a chained Ogg stream. FLAC
+    parts keep the first part's metadata and contribute only their frames.
+    WAV data is re-wrapped under a single header.
+    """
+    if len(part_files) == 1:
+        shutil.copyfile(part_files[0], dest)
+        return
+
+    if output_format == 'wav':
+        with wave.open(str(part_files[0]), 'rb') as first:
+            params = first.getparams()
+        with wave.open(str(dest), 'wb') as out:
+            out.setparams(params)
+            for part in part_files:
+                with wave.open(str(part), 'rb') as source:
+                    out.writeframes(source.readframes(source.getnframes()))
+        return
+
+    if output_format not in CONCATENABLE_FORMATS:
+        raise ValueError(f"cannot join '{output_format}' audio")
+
+    parts = []
+    for part in part_files:
+        with open(part, 'rb') as f:
+            parts.append(f.read())
+
+    if output_format == 'mp3':
+        last = len(parts) - 1
+        data = b"".join(
+            _strip_id3(part, keep_leading=(k == 0), keep_trailing=(k == last))
+            for k, part in enumerate(parts)
+        )
+    elif output_format == 'flac':
+        data = _join_flac(parts)
+    else:
+        data = b"".join(parts)
+
+    with open(dest, 'wb') as f:
+        f.write(data)
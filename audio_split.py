@@ -0,0 +1,110 @@
+# This Python file uses the following encoding: utf-8
+import math
+import wave
+import shutil
+import subprocess
+from array import array
+
+# Format of the API's 'pcm' response: 24 kHz, mono, signed 16-bit little-endian
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+FRAME_SECONDS = 0.01  # analysis window
+MIN_PAUSE_SECONDS = 0.35  # shortest gap treated as a row boundary
+EDGE_PADDING_SECONDS = 0.05  # silence kept around each segment
+SILENCE_FLOOR = 300  # RMS below this is always silence
+SILENCE_RATIO = 0.05  # ... as is RMS below this share of the loudest window
+
+# ffmpeg arguments for each output format when encoding split segments
+_FFMPEG_CODECS = {
+    'mp3': ['-c:a', 'libmp3lame', '-q:a', '4', '-f', 'mp3'],
+    'opus': ['-c:a', 'libopus', '-f', 'ogg'],
+    'aac': ['-c:a', 'aac', '-f', 'adts'],
+    'flac': ['-c:a', 'flac', '-f', 'flac'],
+}
+
+
+def find_ffmpeg():
+    """Locate the optional ffmpeg binary used to encode split segments"""
+    return shutil.which("ffmpeg")
+
+
+def can_encode(output_format):
+    """Check whether split PCM segments can be written in `output_format`"""
+    if output_format == 'wav':
+        return True
+    return output_format in _FFMPEG_CODECS and find_ffmpeg() is not None
+
+
+def _window_levels(samples, window):
+    levels = []
+    for start in range(0, len(samples), window):
+        block = samples[start:start + window]
+        levels.append(math.sqrt(sum(sample * sample for sample in block) / len(block)))
+    return levels
+
+
+def split_on_silence(pcm, expected):
+    """Split 16-bit mono PCM into `expected` segments at the longest pauses.
+
+    Returns a list of PCM byte strings, or None when the number of pauses
+    found does not give exactly `expected` segments.
+    """
+    samples = array('h')
+    samples.frombytes(pcm[:len(pcm) - len(pcm) % SAMPLE_WIDTH])
+    window = int(SAMPLE_RATE * FRAME_SECONDS)
+    levels = _window_levels(samples, window)
+    if not levels:
+        return None
+
+    threshold = max(SILENCE_FLOOR, SILENCE_RATIO * max(levels))
+    voiced = [level >= threshold for level in levels]
+    if not any(voiced):
+        return None
+    first = voiced.index(True)
+    last = len(voiced) - 1 - voiced[::-1].index(True)
+
+    # Internal runs of silence long enough to be a row boundary
+    min_windows = int(MIN_PAUSE_SECONDS / FRAME_SECONDS)
+    gaps = []
+    run_start = None
+    for k in range(first, last + 1):
+        if not voiced[k]:
+            if run_start is None:
+                run_start = k
+        elif run_start is not None:
+            if k - run_start >= min_windows:
+                gaps.append((run_start, k))
+            run_start = None
+    if len(gaps) != expected - 1:
+        return None
+
+    # Segment k covers the speech between gap k-1 and gap k, plus some padding
+    padding = int(EDGE_PADDING_SECONDS / FRAME_SECONDS)
+    bounds = [first] + [edge for gap in gaps for edge in gap] + [last + 1]
+    segments = []
+    for start, end in zip(bounds[::2], bounds[1::2]):
+        start = max(0, start - padding) * window
+        end = min(len(levels), end + padding) * window
+        segments.append(samples[start:end].tobytes())
+    return segments
+
+
+def write_segment(pcm, dest, output_format):
+    """Write a PCM segment as `output_format` (WAV directly, others via ffmpeg)"""
+    if output_format == 'wav':
+        with wave.open(str(dest), 'wb') as out:
+            out.setnchannels(1)
+            out.setsampwidth(SAMPLE_WIDTH)
+            out.setframerate(SAMPLE_RATE)
+            out.writeframes(pcm)
+        return
+
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None or output_format not in _FFMPEG_CODECS:
+        raise RuntimeError(f"cannot encode '{output_format}' without ffmpeg")
+    subprocess.run(
+        [ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+         '-f', 's16le', '-ar', str(SAMPLE_RATE), '-ac', '1', '-i', 'pipe:0',
+         *_FFMPEG_CODECS[output_format], str(dest)],
+        input=pcm, check=True, capture_output=True
+    )
@@ -0,0 +1,178 @@
+# This Python file uses the following encoding: utf-8
+"""Measure the memory the batch engine keeps per row.
+
+Builds the per-row structures a run keeps for N synthetic rows and reports
+the bytes they hold per row (measured with tracemalloc):
+
+    records   the dict-per-row result list used before results went to the
+              on-disk manifest (input file, output file, text, voice, model)
+    registry  RowRegistry, the run-wide index used to reuse identical rows
+    journal   the per-file map of rows finished by an earlier run
+    previous  what a re-run keeps of the output fingerprints of the last
+              run while comparing every row against them
+
+Examples:
+    python benchmarks/memory_benchmark.py --rows 1000000 --json memory.json
+    python benchmarks/memory_benchmark.py --compare memory.json --max-bytes-per-row 150
+
+--max-bytes-per-row fails (exit status 1) when the registry, journal map or
+previous fingerprints need more than the given number of bytes per row.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from row_registry import RowRegistry, PreviousOutputs, row_digest
+from job_journal import JobJournal, hash_text
+
+_WORDS = (
+    "apple river mountain quiet blue window garden silver morning candle paper ocean "
+    "forest yellow bridge stone whisper music thunder valley letter coffee winter summer"
+).split()
+
+
+def make_text(rng, n, words):
+    return f"Item {n}: " + " ".join(rng.choice(_WORDS) for _ in range(words)) + "."
+
+
+def measure(build):
+    """Bytes still allocated by the structure `build` returns"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    structure = build()
+    seconds = time.perf_counter() - started
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del structure
+    return after - before, seconds
+
+
+def build_records(rows, words, seed):
+    rng = random.Random(seed)
+    input_file = os.path.join("/data", "benchmark.csv")
+    records = []
+    for n in range(rows):
+        records.append({
+            'input_file': input_file,
+            'output_file': os.path.join("/data/out", f"benchmark_{n + 1}.mp3"),
+            'text': make_text(rng, n, words),
+            'voice': "alloy",
+            'model': "tts-1"
+        })
+    return records
+
+
+def build_registry(rows, words, seed):
+    rng = random.Random(seed)
+    registry = RowRegistry()
+    file_id = registry.add_file("/data/out", "benchmark", "mp3")
+    for n in range(rows):
+        registry.add(row_digest(make_text(rng, n, words), "alloy", "tts-1", ""), file_id, n)
+    return registry
+
+
+def build_journal_map(rows, words, seed):
+    rng = random.Random(seed)
+    return {n: bytes.fromhex(hash_text(make_text(rng, n, words))) for n in range(rows)}
+
+
+def build_previous_outputs(rows, words, seed):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = JobJournal(os.path.join(tmp, "jobs.sqlite3"))
+        for n in range(rows):
+            journal.record_output(
+                "/data/benchmark.csv", "/data/out", "mp3", n,
+                row_digest(make_text(rng, n, words), "alloy", "tts-1", "")
+            )
+        journal.flush()
+        # Step through every row, as a re-run does
+        previous = PreviousOutputs(journal.previous_outputs("/data/benchmark.csv", "/data/out", "mp3"))
+        for n in range(rows):
+            previous.get(n)
+        previous.close()
+        journal.close()
+    return previous
+
+
+def compare(results, previous_path):
+    previous = json.loads(Path(previous_path).read_text())
+    if previous['rows'] != results['rows']:
+        print(f"note: comparing {results['rows']} rows against {previous['rows']} rows")
+    for name, run in results['structures'].items():
+        before = previous['structures'].get(name)
+        if before and before['bytes_per_row']:
+            change = run['bytes_per_row'] / before['bytes_per_row'] - 1
+            print(f"{name:>9}: bytes/row {change:+.1%}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Per-row memory of the batch engine")
+    parser.add_argument("--rows", type=int, default=1000000, help="rows to simulate (default: 1000000)")
+    parser.add_argument("--words", type=int, default=8, help="words per row (default: 8)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-records", action="store_true",
+                        help="do not measure the old dict-per-row records (saves time and memory)")
+    parser.add_argument("--json", dest="json_path", help="write results to this JSON file")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--max-bytes-per-row", type=float,
+                        help="fail if the registry, journal map or previous fingerprints use more "
+                             "than this many bytes per row")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    builders = {'registry': build_registry, 'journal': build_journal_map, 'previous': build_previous_outputs}
+    if not args.skip_records:
+        builders = {'records': build_records, **builders}
+
+    results = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'rows': args.rows,
+        'words': args.words,
+        'structures': {}
+    }
+    for name, build in builders.items():
+        allocated, seconds = measure(lambda: build(args.rows, args.words, args.seed))
+        results['structures'][name] = {
+            'bytes': allocated,
+            'bytes_per_row': allocated / args.rows if args.rows else None,
+            'seconds': seconds
+        }
+        print(f"{name:>9}: {allocated / 2 ** 20:8.1f} MiB, {allocated / max(1, args.rows):6.1f} bytes/row")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+    if args.compare:
+        compare(results, args.compare)
+
+    if args.max_bytes_per_row is not None:
+        over = [
+            name for name in ('registry', 'journal', 'previous')
+            if results['structures'][name]['bytes_per_row'] > args.max_bytes_per_row
+        ]
+        if over:
+            print(f"over budget: {', '.join(over)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+# This Python file uses the following encoding: utf-8
+"""Local stand-in for OpenAI's /v1/audio/speech endpoint, for benchmarks and CI.
+
+Returns placeholder audio after a configurable delay, streamed at a
+configurable throughput, and can inject 429 and 5xx responses. Rate-limit
+headers are sent the way the real API sends them, so the client's adaptive
+limiter can be exercised offline.
+
+Examples:
+    python benchmarks/mock_tts_server.py --port 8765 --latency lognormal:0.3,0.4
+    python benchmarks/mock_tts_server.py --rate-429 0.02 --error-rate 0.01 --limit-rpm 3000
+
+The chosen port is printed on the first line of stdout ("listening on PORT").
+"""
+import sys
+import math
+import json
+import time
+import random
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SPEECH_PATH = "/v1/audio/speech"
+WRITE_CHUNK_BYTES = 8192
+
+
+def parse_latency(spec):
+    """Parse 'fixed:S', 'uniform:LOW,HIGH' or 'lognormal:MEDIAN,SIGMA' into a sampler"""
+    kind, _, values = spec.partition(":")
+    numbers = [float(value) for value in values.split(",") if value]
+    if kind == "fixed" and len(numbers) == 1:
+        return lambda: numbers[0]
+    if kind == "uniform" and len(numbers) == 2:
+        return lambda: random.uniform(numbers[0], numbers[1])
+    if kind == "lognormal" and len(numbers) == 2:
+        mu = math.log(numbers[0])
+        return lambda: random.lognormvariate(mu, numbers[1])
+    raise argparse.ArgumentTypeError(
+        f"invalid latency '{spec}' (use fixed:S, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA)"
+    )
+
+
+class RequestWindow:
+    """Sliding one-minute request count used to enforce --limit-rpm"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.times = deque()
+        self.lock = threading.Lock()
+
+    def admit(self):
+        """Record a request; returns (admitted, remaining, seconds until a slot frees)"""
+        now = time.monotonic()
+        with self.lock:
+            while self.times and now - self.times[0] >= 60:
+                self.times.popleft()
+            if self.limit and len(self.times) >= self.limit:
+                return False, 0, 60 - (now - self.times[0])
+            self.times.append(now)
+            remaining = self.limit - len(self.times) if self.limit else 1000000
+            reset = 60 - (now - self.times[0]) if self.limit else 0
+            return True, remaining, reset
+
+
+class MockTTSHandler(BaseHTTPRequestHandler):
+    # Keep connections alive like the real API
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_HEAD(self):
+        # Connection warm-up probes
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            request = {}
+        if self.path.rstrip("/") != SPEECH_PATH:
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+
+        server = self.server
+        admitted, remaining, reset = server.window.admit()
+        if not admitted or random.random() < server.rate_429:
+            retry_after = reset if not admitted else server.retry_after
+            self.send_json(
+                429,
+                {"error": {"message": "Rate limit reached (mock)", "type": "requests", "code": "rate_limit_exceeded"}},
+                {"Retry-After": f"{retry_after:.3f}", "x-ratelimit-remaining-requests": "0"}
+            )
+            return
+        if random.random() < server.error_rate:
+            self.send_json(500, {"error": {"message": "Internal error (mock)", "type": "server_error"}})
+            return
+
+        # Time to first byte
+        time.sleep(max(0.0, server.latency()))
+
+        text = request.get("input", "")
+        size = max(server.min_bytes, int(len(text) * server.bytes_per_char))
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(size))
+        self.send_header("x-ratelimit-limit-requests", str(server.window.limit or 1000000))
+        self.send_header("x-ratelimit-remaining-requests", str(remaining))
+        self.send_header("x-ratelimit-reset-requests", f"{reset:.3f}s")
+        self.end_headers()
+
+        # Stream the body at the configured throughput
+        chunk = server.payload[:WRITE_CHUNK_BYTES]
+        sent = 0
+        started = time.monotonic()
+        while sent < size:
+            part = chunk[:size - sent]
+            self.wfile.write(part)
+            sent += len(part)
+            if server.bytes_per_second:
+                ahead = sent / server.bytes_per_second - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+class MockTTSServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency, bytes_per_second=0, bytes_per_char=60, min_bytes=2048,
+                 rate_429=0.0, error_rate=0.0, retry_after=1.0, limit_rpm=0, verbose=False):
+        super().__init__(address, MockTTSHandler)
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+        self.bytes_per_char = bytes_per_char
+        self.min_bytes = min_bytes
+        self.rate_429 = rate_429
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.window = RequestWindow(limit_rpm)
+        self.verbose = verbose
+        # MPEG frame sync bytes followed by padding, so clients see audio-like data
+        self.payload = (b"\xff\xfb\x90\x64" + bytes(413)) * (WRITE_CHUNK_BYTES // 417 + 1)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Mock /v1/audio/speech server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="port to listen on (default: any free port)")
+    parser.add_argument("--latency", type=parse_latency, default=parse_latency("lognormal:0.25,0.35"),
+                        help="time to first byte: fixed:S, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA "
+                             "(default: lognormal:0.25,0.35)")
+    parser.add_argument("--throughput", type=float, default=0,
+                        help="body bytes per second per response (default: unlimited)")
+    parser.add_argument("--bytes-per-char", type=float, default=60,
+                        help="audio bytes returned per input character (default: 60)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability of a 429 response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 500 response")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="Retry-After seconds sent with injected 429s (default: 1)")
+    parser.add_argument("--limit-rpm", type=int, default=0,
+                        help="enforce a requests-per-minute limit with real 429s (default: none)")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible runs")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+    server = MockTTSServer(
+        (args.host, args.port), args.latency,
+        bytes_per_second=args.throughput, bytes_per_char=args.bytes_per_char,
+        rate_429=args.rate_429, error_rate=args.error_rate, retry_after=args.retry_after,
+        limit_rpm=args.limit_rpm, verbose=args.verbose
+    )
+    print(f"listening on {server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# This Python file uses the following encoding: utf-8
+"""Measure time-to-window for the GUI and fail if it exceeds a budget.
+
+Launches the application (from source, and optionally the PyInstaller build
+produced from mainwindow.spec) several times with CSVTTS_STARTUP_PROBE set.
+The application writes a timestamp to the probe file once the main window
+has been shown and the event loop is running, then quits.
+
+Examples:
+    python benchmarks/startup_benchmark.py --budget 1.5
+    python benchmarks/startup_benchmark.py --frozen dist/mainwindow.app --frozen-budget 2.5
+    python benchmarks/startup_benchmark.py --offscreen --json results.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+LAUNCH_TIMEOUT = 60
+
+
+def frozen_executable(path):
+    """Resolve a PyInstaller build (a .app bundle or a plain executable)"""
+    path = Path(path)
+    if path.suffix == ".app":
+        return path / "Contents" / "MacOS" / path.stem
+    return path
+
+
+def measure_once(command, env):
+    """Launch once and return seconds from spawn to the window being shown"""
+    with tempfile.TemporaryDirectory() as tmp:
+        probe_file = Path(tmp) / "startup_probe"
+        env = dict(env, CSVTTS_STARTUP_PROBE=str(probe_file))
+
+        started = time.time()
+        process = subprocess.Popen(command, env=env, cwd=ROOT,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            _, stderr = process.communicate(timeout=LAUNCH_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            raise RuntimeError(f"{command[0]} did not quit within {LAUNCH_TIMEOUT}s")
+
+        if not probe_file.exists():
+            raise RuntimeError(
+                f"{command[0]} exited with status {process.returncode} before showing the window:\n"
+                + stderr.decode(errors='replace')
+            )
+        return float(probe_file.read_text()) - started
+
+
+def measure(name, command, runs, env):
+    timings = [measure_once(command, env) for _ in range(runs)]
+    return {
+        'name': name,
+        'command': command,
+        'runs': runs,
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'max': max(timings),
+        'timings': timings
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup time-to-window benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="launches per target (default: 5)")
+    parser.add_argument("--budget", type=float, default=2.0,
+                        help="median seconds allowed for the source run (default: 2.0)")
+    parser.add_argument("--frozen", help="path to the PyInstaller build (e.g. dist/mainwindow.app)")
+    parser.add_argument("--frozen-budget", type=float, default=3.0,
+                        help="median seconds allowed for the frozen build (default: 3.0)")
+    parser.add_argument("--offscreen", action="store_true",
+                        help="use Qt's offscreen platform (for machines without a display)")
+    parser.add_argument("--json", dest="json_path", help="also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    if args.offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+
+    targets = [("source", [sys.executable, str(ROOT / "mainwindow.py")], args.budget)]
+    if args.frozen:
+        targets.append(("frozen", [str(frozen_executable(args.frozen))], args.frozen_budget))
+
+    results = []
+    failed = False
+    for name, command, budget in targets:
+        result = measure(name, command, args.runs, env)
+        result['budget'] = budget
+        result['within_budget'] = result['median'] <= budget
+        results.append(result)
+        failed = failed or not result['within_budget']
+
+        status = "ok" if result['within_budget'] else "OVER BUDGET"
+        print(
+            f"{name:7s} median {result['median']:.3f}s "
+            f"(min {result['min']:.3f}s, max {result['max']:.3f}s, budget {budget:.3f}s) {status}"
+        )
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+# This Python file uses the following encoding: utf-8
+"""Measure batch throughput against the local mock TTS server.
+
+Starts benchmarks/mock_tts_server.py, then for each CSV size runs a fresh
+process that indexes a synthetic CSV with CSVProcessor and converts it with
+TTSWorker (no cache, no journal). Each run reports rows/s, request latency
+percentiles as seen by the worker (including rate-limiter waits and retries)
+and the process's peak RSS.
+
+Examples:
+    python benchmarks/throughput_benchmark.py --rows 1000,10000 --json results.json
+    python benchmarks/throughput_benchmark.py --rows 1000000 --concurrency 32 \\
+        --server-args "--latency fixed:0.01" --json big.json
+    python benchmarks/throughput_benchmark.py --server-args "--rate-429 0.02 --limit-rpm 6000" \\
+        --compare results.json
+
+Use --compare with an earlier results file to print the change in rows/s and
+latency for each size, and --max-regression to fail when rows/s drops by more
+than the given fraction.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import random
+import shlex
+import argparse
+import platform
+import subprocess
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MOCK_SERVER = Path(__file__).resolve().parent / "mock_tts_server.py"
+RESULT_PREFIX = "RESULT "
+
+_WORDS = (
+    "apple river mountain quiet blue window garden silver morning candle paper ocean "
+    "forest yellow bridge stone whisper music thunder valley letter coffee winter summer "
+    "station number lantern harbor meadow pencil orange rocket planet velvet"
+).split()
+
+
+def write_csv(path, rows, words_per_row, duplicate_ratio, seed):
+    """Write a synthetic two-column CSV; `duplicate_ratio` of rows repeat an earlier row"""
+    rng = random.Random(seed)
+    texts = []
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "text"])
+        for n in range(rows):
+            if texts and rng.random() < duplicate_ratio:
+                text = rng.choice(texts)
+            else:
+                count = max(1, int(rng.gauss(words_per_row, words_per_row / 3)))
+                text = f"Item {n}: " + " ".join(rng.choice(_WORDS) for _ in range(count)) + "."
+                if len(texts) < 10000:
+                    texts.append(text)
+            writer.writerow([n + 1, text])
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB, or None if unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in KiB elsewhere
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def child_run(args):
+    """Index and convert one synthetic CSV (runs in its own process)"""
+    sys.path.insert(0, str(ROOT))
+    from PySide6.QtCore import QCoreApplication
+    app = QCoreApplication([])
+
+    from settings import Settings
+    from csv_processor import CSVProcessor
+    from tts_processor import TTSWorker
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "benchmark.csv")
+        write_csv(csv_path, args.child_rows, args.words, args.duplicates, args.seed)
+        output_dir = os.path.join(tmp, "output")
+        os.makedirs(output_dir)
+        index_dir = os.path.join(tmp, "index")
+
+        # Settings are changed in memory only and never saved
+        settings = Settings()
+        settings.api_key = "benchmark"
+        settings.endpoint = f"http://127.0.0.1:{args.child_port}/v1/audio/speech"
+        settings.timeout = 60000
+        settings.concurrency = args.concurrency
+        settings.output_format = args.output_format
+        settings.cache_enabled = False
+        settings.pack_short_rows = False
+        settings.index_dir = index_dir
+        # Keep the run's manifest and metrics out of the user's app data
+        settings.app_data_dir = Path(tmp)
+        settings.manifest_dir = Path(tmp) / "manifests"
+        settings.metrics_dir = Path(tmp) / "metrics"
+        settings.rate_limits = {args.model: {'rpm': args.rpm, 'cpm': args.cpm}}
+
+        # Row indexing through the CSV processor
+        processor = CSVProcessor(index_dir)
+        index_started = time.perf_counter()
+        processor.load_file(csv_path)
+        for worker in list(processor.index_workers):
+            worker.finished.connect(app.quit)
+            if not worker.isFinished():
+                app.exec()
+        index_seconds = time.perf_counter() - index_started
+
+        # Synthesis through the batch worker, timing each request
+        worker = TTSWorker(settings, [{
+            'file_path': csv_path,
+            'column_index': 1,
+            'voice': "alloy",
+            'model': args.model,
+            'instructions': "",
+            'output_dir': output_dir
+        }])
+        latencies = []
+        synthesize = worker.engine.synthesize
+
+        def timed_synthesize(*call_args, **call_kwargs):
+            started = time.perf_counter()
+            try:
+                return synthesize(*call_args, **call_kwargs)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+        worker.engine.synthesize = timed_synthesize
+        errors = []
+        written = []
+        worker.processing_error.connect(lambda title, message: errors.append(f"{title}: {message}"))
+        worker.processing_complete.connect(lambda result: written.append(result['rows']))
+        worker.finished.connect(app.quit)
+
+        started = time.perf_counter()
+        worker.start()
+        app.exec()
+        worker.wait()
+        seconds = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        'rows': args.child_rows,
+        'rows_written': sum(written),
+        'requests': len(latencies),
+        'seconds': seconds,
+        'rows_per_second': sum(written) / seconds if seconds else None,
+        'index_seconds': index_seconds,
+        'indexed_rows': processor.get_row_count(),
+        'latency': {
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'mean': sum(latencies) / len(latencies) if latencies else None,
+            'max': latencies[-1] if latencies else None
+        },
+        'peak_rss_mb': peak_rss_mb(),
+        'errors': errors[:10]
+    }
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+    return 0
+
+
+def start_mock_server(server_args):
+    """Start the mock server; returns (process, port)"""
+    process = subprocess.Popen(
+        [sys.executable, str(MOCK_SERVER), "--port", "0", *shlex.split(server_args)],
+        stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline()
+    if not line.startswith("listening on "):
+        process.kill()
+        raise RuntimeError(f"mock server failed to start: {line!r}")
+    return process, int(line.split()[-1])
+
+
+def run_size(args, rows, port):
+    command = [
+        sys.executable, __file__,
+        "--child-rows", str(rows), "--child-port", str(port),
+        "--concurrency", str(args.concurrency), "--model", args.model,
+        "--format", args.output_format, "--words", str(args.words),
+        "--duplicates", str(args.duplicates), "--seed", str(args.seed),
+        "--rpm", str(args.rpm), "--cpm", str(args.cpm)
+    ]
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError(f"benchmark run for {rows} rows failed:\n{completed.stderr}")
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous_path, max_regression):
+    """Print changes against an earlier results file; returns False on a regression"""
+    previous = {run['rows']: run for run in json.loads(Path(previous_path).read_text())['runs']}
+    ok = True
+    for run in results['runs']:
+        before = previous.get(run['rows'])
+        if before is None or not before.get('rows_per_second'):
+            continue
+        change = run['rows_per_second'] / before['rows_per_second'] - 1
+        line = f"{run['rows']:>9} rows: rows/s {change:+.1%}"
+        if run['latency']['p95'] and before['latency'].get('p95'):
+            line += f", p95 latency {run['latency']['p95'] / before['latency']['p95'] - 1:+.1%}"
+        if max_regression is not None and change < -max_regression:
+            line += " REGRESSION"
+            ok = False
+        print(line)
+    return ok
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Batch throughput benchmark against a mock TTS server")
+    parser.add_argument("--rows", default="1000,10000",
+                        help="comma-separated CSV sizes (default: 1000,10000)")
+    parser.add_argument("-j", "--concurrency", type=int, default=8, help="requests in flight (default: 8)")
+    parser.add_argument("--model", default="tts-1")
+    parser.add_argument("--format", dest="output_format", default="mp3")
+    parser.add_argument("--words", type=float, default=6, help="mean words per row (default: 6)")
+    parser.add_argument("--duplicates", type=float, default=0.0,
+                        help="fraction of rows repeating an earlier row (default: 0)")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the synthetic CSVs (default: 1)")
+    parser.add_argument("--rpm", type=int, default=0, help="client request limit per minute (default: unlimited)")
+    parser.add_argument("--cpm", type=int, default=0, help="client character limit per minute (default: unlimited)")
+    parser.add_argument("--server-args", default="",
+                        help="options passed to mock_tts_server.py, e.g. \"--latency fixed:0.05 --rate-429 0.01\"")
+    parser.add_argument("--json", dest="json_path", help="write results to this JSON file")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--max-regression", type=float,
+                        help="with --compare, fail if rows/s drops by more than this fraction (e.g. 0.1)")
+    # Internal: a single measured run in a fresh process
+    parser.add_argument("--child-rows", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--child-port", type=int, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.child_rows is not None:
+        return child_run(args)
+
+    sizes = [int(size) for size in args.rows.split(",") if size.strip()]
+    server, port = start_mock_server(args.server_args)
+    results = {
+        'revision': git_revision(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'concurrency': args.concurrency,
+            'model': args.model,
+            'format': args.output_format,
+            'words': args.words,
+            'duplicates': args.duplicates,
+            'seed': args.seed,
+            'rpm': args.rpm,
+            'cpm': args.cpm,
+            'server_args': args.server_args
+        },
+        'runs': []
+    }
+    try:
+        for rows in sizes:
+            run = run_size(args, rows, port)
+            results['runs'].append(run)
+            latency = run['latency']
+            print(
+                f"{rows:>9} rows: {run['rows_per_second']:.1f} rows/s, "
+                f"latency p50 {latency['p50'] or 0:.3f}s p95 {latency['p95'] or 0:.3f}s "
+                f"p99 {latency['p99'] or 0:.3f}s, peak RSS {run['peak_rss_mb'] or 0:.0f} MiB"
+                + (f", {len(run['errors'])} errors" if run['errors'] else "")
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+
+    if args.compare:
+        return 0 if compare(results, args.compare, args.max_regression) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+# This Python file uses the following encoding: utf-8
+import os
+import re
+import mmap
+import struct
+import hashlib
+from array import array
+from pathlib import Path
+
+_MAGIC = b"CSVIDX1\0"
+_HEADER = struct.Struct("<8sQQQ")  # magic, mtime_ns, size, number of offsets
+_DELIMITERS = re.compile(rb'["\r\n]')
+_QUOTE, _CR, _LF, _COMMA = b'"\r\n,'
+
+
+def scan_row_offsets(file_path):
+    """Scan a CSV file for the byte offset at which each record starts.
+
+    Records end at CRLF, LF or CR, as for csv.reader. Like csv, a quote only
+    opens a quoted field at the start of a field (so `5" screen` is plain
+    text), and newlines inside quoted fields do not end the record. The
+    header row is included, so the number of data records is len(offsets) - 1.
+    """
+    offsets = array('Q')
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return offsets
+
+    offsets.append(0)
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        in_quotes = False
+        position = 0
+        while True:
+            match = _DELIMITERS.search(mm, position)
+            if match is None:
+                break
+            i = match.start()
+            char = mm[i]
+            position = i + 1
+            if char == _QUOTE:
+                if in_quotes:
+                    if position < size and mm[position] == _QUOTE:
+                        position += 1  # escaped quote ("")
+                    else:
+                        in_quotes = False
+                elif i == 0 or mm[i - 1] in (_COMMA, _CR, _LF):
+                    in_quotes = True
+            elif not in_quotes:
+                if char == _CR and position < size and mm[position] == _LF:
+                    position += 1
+                if position < size:
+                    offsets.append(position)
+    return offsets
+
+
+class CSVIndex:
+    """Row start offsets for a CSV file, cached on disk between runs.
+
+    The sidecar is stored under `index_dir` and rebuilt whenever the file's
+    modification time or size changes.
+    """
+
+    def __init__(self, file_path, offsets, mtime_ns, size):
+        self.file_path = file_path
+        self.offsets = offsets
+        self.mtime_ns = mtime_ns
+        self.size = size
+
+    @property
+    def row_count(self):
+        """Number of data records (the header is not counted; records with empty cells are)"""
+        return max(0, len(self.offsets) - 1)
+
+    @staticmethod
+    def sidecar_path(file_path, index_dir):
+        name = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+        return Path(index_dir) / f"{name}.idx"
+
+    @classmethod
+    def load(cls, file_path, index_dir):
+        """Load a cached index if it is still valid for the file, else None"""
+        stat = os.stat(file_path)
+        path = cls.sidecar_path(file_path, index_dir)
+        try:
+            with open(path, 'rb') as f:
+                magic, mtime_ns, size, count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+                    return None
+                offsets = array('Q')
+                offsets.fromfile(f, count)
+        except (OSError, EOFError, struct.error):
+            return None
+        return cls(file_path, offsets, mtime_ns, size)
+
+    @classmethod
+    def build(cls, file_path, index_dir=None):
+        """Scan the file and, if `index_dir` is given, save the sidecar"""
+        stat = os.stat(file_path)
+        index = cls(file_path, scan_row_offsets(file_path), stat.st_mtime_ns, stat.st_size)
+        if index_dir is not None:
+            index.save(index_dir)
+        return index
+
+    @classmethod
+    def load_or_build(cls, file_path, index_dir):
+        """Get a valid index for the file, scanning it only when needed"""
+        return cls.load(file_path, index_dir) or cls.build(file_path, index_dir)
+
+    def save(self, index_dir):
+        path = self.sidecar_path(self.file_path, index_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, self.mtime_ns, self.size, len(self.offsets)))
+                self.offsets.tofile(f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The index is only a cache; failing to save it is not an error
+            tmp_path.unlink(missing_ok=True)
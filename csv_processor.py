@@ -3,18 +3,60 @@ import os
 import csv
 from pathlib import Path
 
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QObject, QThread, Signal
+
+from csv_index import CSVIndex
+from preflight import estimate_batch
+
+class IndexWorker(QThread):
+    """Worker thread that builds (or loads) the row indexes of CSV files"""
+    index_ready = Signal(str, object)  # file path, CSVIndex
+    index_error = Signal(str, str)  # file path, message
+    
+    def __init__(self, file_paths, index_dir):
+        super().__init__()
+        self.file_paths = file_paths
+        self.index_dir = index_dir
+    
+    def run(self):
+        for file_path in self.file_paths:
+            try:
+                index = CSVIndex.load_or_build(file_path, self.index_dir)
+                self.index_ready.emit(file_path, index)
+            except Exception as e:
+                self.index_error.emit(file_path, str(e))
+
+class PreflightWorker(QThread):
+    """Worker thread that scans a batch's files for a cost and duration estimate"""
+    estimate_ready = Signal(object)  # estimate dict
+    estimate_error = Signal(str, str)  # title, message
+    
+    def __init__(self, files_to_process, settings, journal=None):
+        super().__init__()
+        self.files_to_process = files_to_process
+        self.settings = settings
+        self.journal = journal
+    
+    def run(self):
+        try:
+            self.estimate_ready.emit(estimate_batch(self.files_to_process, self.settings, self.journal))
+        except Exception as e:
+            self.estimate_error.emit("Estimate Failed", f"Could not scan the batch: {str(e)}")
 
 class CSVProcessor(QObject):
     """Handles CSV file loading and processing"""
     file_loaded = Signal(list, list)  # headers, preview_rows
     error_occurred = Signal(str, str)  # title, message
+    row_count_ready = Signal(str, int)  # file path, number of data records
     
-    def __init__(self):
+    def __init__(self, index_dir=None):
         super().__init__()
         self.current_file = None
         self.headers = []
         self.rows = []
+        self.index_dir = index_dir
+        self.index = None
+        self.index_workers = []
     
     def load_file(self, file_path):
         """Load a CSV file and extract headers and preview rows"""
@@ -47,6 +89,11 @@ class CSVProcessor(QObject):
             
             # Store current file
             self.current_file = file_path
+            self.index = None
+            
+            # Index record offsets in the background for row counts
+            if self.index_dir is not None:
+                self.start_indexing([file_path])
             
             # Emit signal with headers and preview rows
             self.file_loaded.emit(self.headers, self.rows)
@@ -57,6 +104,27 @@ class CSVProcessor(QObject):
             self.error_occurred.emit("Error Loading File", f"An error occurred: {str(e)}")
             return False
     
+    def start_indexing(self, file_paths):
+        """Build the row indexes of files on a worker thread"""
+        if self.index_dir is None or not file_paths:
+            return
+        worker = IndexWorker(list(file_paths), self.index_dir)
+        worker.index_ready.connect(self.on_index_ready)
+        worker.finished.connect(lambda: self.index_workers.remove(worker))
+        self.index_workers.append(worker)
+        worker.start()
+    
+    def on_index_ready(self, file_path, index):
+        """Keep the index if it still belongs to the current file"""
+        if file_path != self.current_file:
+            return
+        self.index = index
+        self.row_count_ready.emit(file_path, index.row_count)
+    
+    def get_row_count(self):
+        """Get the number of data rows in the current file, or None if not indexed yet"""
+        return self.index.row_count if self.index is not None else None
+    
     def get_column_data(self, column_index):
         """Get all data from a specific column"""
         if not self.current_file or column_index < 0 or column_index >= len(self.headers):
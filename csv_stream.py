@@ -0,0 +1,57 @@
+# This Python file uses the following encoding: utf-8
+import re
+import csv
+
+# Line endings csv accepts: CRLF, LF and CR alone (old Mac "CSV" files)
+_LINE_ENDS = re.compile(rb"\r\n|\r|\n")
+_CHUNK_BYTES = 1 << 16
+
+
+def _iter_lines(f, position):
+    """Yield decoded lines of a binary file, split like text mode with newline=''.
+
+    Each line keeps its terminator so csv can handle newlines in quoted
+    fields; `position[0]` is advanced by the bytes of every line yielded.
+    """
+    pending = b""
+    while True:
+        chunk = f.read(_CHUNK_BYTES)
+        data = pending + chunk
+        start = 0
+        for match in _LINE_ENDS.finditer(data):
+            # A CR ending the chunk may be the first half of a CRLF
+            if chunk and match.end() == len(data) and match.group() == b"\r":
+                break
+            position[0] += match.end() - start
+            yield data[start:match.end()].decode('utf-8')
+            start = match.end()
+        pending = data[start:]
+        if not chunk:
+            if pending:
+                position[0] += len(pending)
+                yield pending.decode('utf-8')
+            return
+
+
+def iter_column_texts(file_path, column_index):
+    """Lazily yield (text, start_offset, end_offset) for non-empty cells of a column.
+
+    The header row is skipped. Offsets are byte positions in the file; each
+    span also covers any empty rows before it, so the spans of all yielded
+    rows plus the header add up to the file size.
+    """
+    with open(file_path, 'rb') as f:
+        position = [0]
+        reader = csv.reader(_iter_lines(f, position))
+        try:
+            next(reader)  # Skip header row
+        except StopIteration:
+            return
+
+        start = position[0]
+        for row in reader:
+            if column_index < len(row):
+                text = row[column_index].strip()
+                if text:  # Skip empty texts
+                    yield text, start, position[0]
+                    start = position[0]
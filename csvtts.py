@@ -0,0 +1,251 @@
+# This Python file uses the following encoding: utf-8
+"""Headless batch runner: convert CSV columns to speech without the GUI.
+
+Example:
+    python csvtts.py data/*.csv --column text --output-dir out --concurrency 8
+
+Progress is written to stdout as JSON lines (one object per event) so runs
+can be driven and monitored by a scheduler.
+
+A batch can be split across machines with --shard i/N; each machine writes
+its rows and a shard manifest to its output directory, and
+    python csvtts.py --merge-manifests node1/out node2/out --output-dir out
+combines the manifests into one.
+"""
+import os
+import sys
+import csv
+import json
+import signal
+import argparse
+import multiprocessing
+import threading
+
+# Heavy modules (Qt settings storage, the OpenAI SDK) are imported in main()
+# after argument parsing, so --help and usage errors return immediately.
+
+
+class JsonLinesReporter:
+    """Write engine events as JSON lines, or as plain text for interactive use"""
+
+    def __init__(self, stream, text_mode=False):
+        self.stream = stream
+        self.text_mode = text_mode
+        self.lock = threading.Lock()
+        self.errors = 0
+
+    def emit(self, event, **fields):
+        with self.lock:
+            if self.text_mode:
+                if event == 'progress':
+                    line = fields['message']
+                elif event == 'error':
+                    line = f"{fields['title']}: {fields['message']}"
+                else:
+                    line = f"{event}: " + ", ".join(f"{key}={value}" for key, value in fields.items())
+            else:
+                line = json.dumps(dict(event=event, **fields), ensure_ascii=False)
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def progress(self, progress):
+        self.emit('progress', **progress)
+
+    def error(self, title, message):
+        self.errors += 1
+        self.emit('error', title=title, message=message)
+
+    def rate(self, rate):
+        self.emit('rate', **rate)
+
+    def stats(self, stats):
+        self.emit('stats', **stats)
+
+
+def find_csv_files(paths):
+    """Expand files and folders (non-recursively) into a list of CSV files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for file_name in sorted(os.listdir(path)):
+                if file_name.lower().endswith('.csv'):
+                    files.append(os.path.join(path, file_name))
+        else:
+            files.append(path)
+    return files
+
+
+def resolve_column(file_path, column):
+    """Find the column index for a header name or a 1-based column number"""
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        headers = next(csv.reader(f), [])
+    if column in headers:
+        return headers.index(column)
+    if column.isdigit() and 1 <= int(column) <= len(headers):
+        return int(column) - 1
+    raise ValueError(f"column '{column}' not found in {file_path}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="csvtts",
+        description="Convert a text column of CSV files to speech using OpenAI's TTS API."
+    )
+    parser.add_argument("paths", nargs="+",
+                        help="CSV files or folders containing CSV files (shard manifests with --merge-manifests)")
+    parser.add_argument("-c", "--column", help="column header name or 1-based column number (required)")
+    parser.add_argument("-o", "--output-dir", required=True, help="directory for the audio files")
+    parser.add_argument("--voice", help="voice (default: saved default voice)")
+    parser.add_argument("--model", help="model (default: saved default model)")
+    parser.add_argument("--instructions", default="",
+                        help="voice style instructions (gpt-4o-mini-tts only)")
+    parser.add_argument("--format", dest="output_format", help="audio format (default: saved format)")
+    parser.add_argument("-j", "--concurrency", type=int, help="requests in flight (default: saved setting)")
+    parser.add_argument("--api-key", help="OpenAI API key (default: $OPENAI_API_KEY or the saved key)")
+    parser.add_argument("--endpoint", help="speech endpoint URL (default: saved endpoint)")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the audio cache")
+    parser.add_argument("--no-journal", action="store_true",
+                        help="do not record or resume progress in the job journal")
+    parser.add_argument("--progress", choices=["json", "text"], default="json",
+                        help="progress output format on stdout (default: json)")
+    parser.add_argument("--metrics-jsonl", help="append one JSON line of timings per request to this file")
+    parser.add_argument("--metrics-prom", help="keep a Prometheus textfile of request histograms at this path")
+    parser.add_argument("--shard", help="process only share i of N of the rows (e.g. 2/4), split by a hash of the text")
+    parser.add_argument("--merge-manifests", action="store_true",
+                        help="combine the shard manifests found in the paths into one in the output directory")
+    parser.add_argument("--estimate", action="store_true",
+                        help="print the batch's rows, characters, cost and duration estimate and exit")
+    return parser
+
+
+def merge(paths, output_dir, reporter):
+    """Combine shard manifests into the output directory's manifest"""
+    from manifest import MANIFEST_NAME, find_manifests, merge_manifests
+    try:
+        summary = merge_manifests(find_manifests(paths), os.path.join(output_dir, MANIFEST_NAME))
+    except (OSError, ValueError) as e:
+        reporter.error("Merge Failed", str(e))
+        return 1
+    reporter.emit('merged', **summary)
+    if summary['missing']:
+        reporter.error("Missing Shards", f"No manifest for shards {', '.join(map(str, summary['missing']))}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    reporter = JsonLinesReporter(sys.stdout, text_mode=args.progress == "text")
+    
+    if args.merge_manifests:
+        return merge(args.paths, args.output_dir, reporter)
+    if args.column is None:
+        parser.error("the following arguments are required: -c/--column")
+    shard = None
+    if args.shard:
+        from manifest import parse_shard
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+
+    from settings import Settings
+    from tts_engine import SynthesisEngine, open_audio_cache, open_journal, open_telemetry
+    from telemetry import Telemetry
+
+    # Saved settings are the defaults; command-line options override them
+    settings = Settings()
+    settings.api_key = args.api_key or os.environ.get("OPENAI_API_KEY") or settings.api_key
+    if args.endpoint:
+        settings.endpoint = args.endpoint
+    if args.output_format:
+        settings.output_format = args.output_format
+    if args.concurrency:
+        settings.concurrency = args.concurrency
+    if args.no_cache:
+        settings.cache_enabled = False
+    voice = args.voice or settings.default_voice
+    model = args.model or settings.default_model
+
+    if not settings.api_key and not args.estimate:
+        reporter.error("API Key Required", "Pass --api-key or set OPENAI_API_KEY.")
+        return 2
+    if settings.output_format not in Settings.OUTPUT_FORMATS:
+        reporter.error("Invalid Format", f"Output format must be one of: {', '.join(Settings.OUTPUT_FORMATS)}")
+        return 2
+
+    files_to_process = []
+    for file_path in find_csv_files(args.paths):
+        try:
+            column_index = resolve_column(file_path, args.column)
+        except (OSError, ValueError) as e:
+            reporter.error("Invalid File", str(e))
+            return 2
+        files_to_process.append({
+            'file_path': os.path.abspath(file_path),
+            'column_index': column_index,
+            'voice': voice,
+            'model': model,
+            'instructions': args.instructions,
+            'output_dir': os.path.abspath(args.output_dir)
+        })
+        if shard is not None and shard[1] > 1:
+            files_to_process[-1]['shard'] = list(shard)
+
+    if not files_to_process:
+        reporter.error("No CSV files found", "No CSV files found to process")
+        return 2
+
+    if args.estimate:
+        from preflight import estimate_batch, format_estimate
+        journal = None if args.no_journal else open_journal(settings)
+        estimate = estimate_batch(files_to_process, settings, journal)
+        if reporter.text_mode:
+            reporter.stream.write(format_estimate(estimate) + "\n")
+        else:
+            reporter.emit('estimate', **estimate)
+        return 1 if estimate['errors'] else 0
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    # Metrics files from the command line, or the saved metrics setting
+    if args.metrics_jsonl or args.metrics_prom:
+        telemetry = Telemetry(args.metrics_jsonl, args.metrics_prom)
+    else:
+        telemetry = open_telemetry(settings)
+    
+    engine = SynthesisEngine(
+        settings, files_to_process,
+        open_audio_cache(settings),
+        None if args.no_journal else open_journal(settings),
+        on_progress=reporter.progress,
+        on_error=reporter.error,
+        on_rate=reporter.rate,
+        on_stats=reporter.stats,
+        telemetry=telemetry
+    )
+
+    # Ctrl+C / SIGTERM stop dispatching and let in-flight requests finish
+    interrupted = []
+
+    def request_stop(signum, frame):
+        interrupted.append(signum)
+        engine.stop()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    result = engine.run()
+    if result is not None:
+        reporter.emit('complete', files=result['rows'], manifest=result['manifest'])
+
+    if interrupted:
+        return 130
+    return 1 if reporter.errors or result is None else 0
+
+
+if __name__ == "__main__":
+    # Pre-flight scans use worker processes, which frozen builds must support
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,286 @@
+# This Python file uses the following encoding: utf-8
+import os
+import sys
+import errno
+import shutil
+import tarfile
+import zipfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from progress import PROGRESS_INTERVAL
+
+# Export strategies, in the order offered to the user
+EXPORT_MODES = {
+    'copy': "Copy (parallel)",
+    'hardlink': "Hardlink (no extra disk space, same volume)",
+    'reflink': "Clone / reflink (copy-on-write where supported)",
+    'move': "Move (outputs leave the output folder)",
+    'zip': "Zip archive",
+    'tar': "Tar archive",
+}
+# Modes that write one archive file instead of a folder
+ARCHIVE_MODES = ('zip', 'tar')
+# Already-compressed audio is stored in zip archives as is; deflating it
+# costs time and saves almost nothing
+STORED_EXTENSIONS = {'.mp3', '.opus', '.aac', '.flac'}
+# Name of the job manifest inside archives
+ARCHIVE_MANIFEST_NAME = "csvtts-manifest.jsonl"
+# Tar archives forget their member list every this many files so memory
+# stays bounded (the list is only needed for reading)
+TAR_MEMBER_BATCH = 1000
+# Files handled at once
+EXPORT_WORKERS = 8
+# copy_file_range is asked for this much per call
+COPY_RANGE_BYTES = 1 << 30
+# Errors meaning a strategy is not available here (rather than a bad file)
+_UNSUPPORTED_ERRORS = {
+    errno.EXDEV, errno.EPERM, errno.EACCES, errno.EINVAL, errno.ENOSYS,
+    errno.EMLINK, errno.ENOTTY, errno.EBADF,
+    getattr(errno, 'ENOTSUP', errno.EINVAL), getattr(errno, 'EOPNOTSUPP', errno.EINVAL),
+}
+# Linux FICLONE ioctl (btrfs, XFS, bcachefs)
+_FICLONE = 0x40049409
+
+
+class StrategyUnavailable(Exception):
+    """The export strategy does not work for this file system or platform"""
+
+
+def _same_file(src, dest):
+    return os.path.exists(dest) and os.path.samefile(src, dest)
+
+
+def _replace(dest):
+    if os.path.lexists(dest):
+        os.remove(dest)
+
+
+def copy_file(src, dest):
+    if _same_file(src, dest):
+        return
+    _replace(dest)
+    shutil.copy2(src, dest)
+
+
+def hardlink_file(src, dest):
+    if _same_file(src, dest):
+        return
+    _replace(dest)
+    try:
+        os.link(src, dest)
+    except OSError as e:
+        if e.errno in _UNSUPPORTED_ERRORS:
+            raise StrategyUnavailable(str(e))
+        raise
+
+
+def _clonefile_macos(src, dest):
+    import ctypes
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.clonefile(os.fsencode(src), os.fsencode(dest), 0) != 0:
+        raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+
+
+def _clone_linux(src, dest):
+    """FICLONE, then copy_file_range (which the kernel may serve by reflink or server-side copy)"""
+    import fcntl
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdest:
+        try:
+            fcntl.ioctl(fdest.fileno(), _FICLONE, fsrc.fileno())
+            return
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRORS:
+                raise
+        if not hasattr(os, 'copy_file_range'):
+            raise OSError(errno.ENOSYS, "copy_file_range is not available")
+        while os.copy_file_range(fsrc.fileno(), fdest.fileno(), COPY_RANGE_BYTES):
+            pass
+
+
+def reflink_file(src, dest):
+    if _same_file(src, dest):
+        return
+    _replace(dest)
+    try:
+        if sys.platform == "darwin":
+            _clonefile_macos(src, dest)
+        elif sys.platform.startswith("linux"):
+            _clone_linux(src, dest)
+        else:
+            raise OSError(errno.ENOTSUP, "cloning is not supported on this platform")
+        shutil.copystat(src, dest)
+    except (OSError, AttributeError) as e:
+        if os.path.lexists(dest):
+            os.remove(dest)
+        if isinstance(e, AttributeError) or e.errno in _UNSUPPORTED_ERRORS:
+            raise StrategyUnavailable(str(e))
+        raise
+
+
+def move_file(src, dest):
+    if _same_file(src, dest):
+        return
+    _replace(dest)
+    # Renames within a volume; copies and deletes across volumes
+    shutil.move(src, dest)
+
+
+_STRATEGIES = {
+    'copy': copy_file,
+    'hardlink': hardlink_file,
+    'reflink': reflink_file,
+    'move': move_file,
+}
+
+
+class Exporter:
+    """Export output files with a chosen strategy, in parallel.
+
+    Hardlink and reflink fall back to a copy for any file where the
+    strategy is unavailable (another volume, an unsupported file system),
+    and after the first such failure the rest of the export copies
+    directly. The zip and tar modes write a single archive instead (see
+    `export_archive`). Progress is published at most every PROGRESS_INTERVAL
+    seconds.
+    """
+
+    def __init__(self, mode='copy', workers=EXPORT_WORKERS, on_progress=None):
+        if mode not in _STRATEGIES and mode not in ARCHIVE_MODES:
+            raise ValueError(f"unknown export mode '{mode}'")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.on_progress = on_progress or (lambda done, total: None)
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+        self.fallback = False
+        self.fallbacks = 0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def export_one(self, src, dest):
+        if not self.fallback:
+            try:
+                _STRATEGIES[self.mode](src, dest)
+                return
+            except StrategyUnavailable:
+                with self.lock:
+                    self.fallback = True
+        with self.lock:
+            self.fallbacks += 1
+        copy_file(src, dest)
+
+    def export(self, output_files, export_dir, total=None):
+        """Export an iterable of output paths into `export_dir`.
+
+        Returns counts of files exported, missing and failed, the fallbacks to
+        copying, and the first error message. Raises ValueError if a file is
+        already in `export_dir` (the export folder is an output folder).
+        """
+        os.makedirs(export_dir, exist_ok=True)
+        real_export_dir = os.path.realpath(export_dir)
+        result = {'exported': 0, 'missing': 0, 'failed': 0, 'fallbacks': 0, 'error': None, 'cancelled': False}
+        last_publish = 0.0
+        in_flight = set()
+        sources = iter(output_files)
+        exhausted = False
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while not exhausted or in_flight:
+                # Keep a bounded number of files in flight
+                while not exhausted and len(in_flight) < self.workers * 4 and not self.cancel_event.is_set():
+                    src = next(sources, None)
+                    if src is None:
+                        exhausted = True
+                        break
+                    if not os.path.exists(src):
+                        result['missing'] += 1
+                        continue
+                    if os.path.dirname(os.path.realpath(src)) == real_export_dir:
+                        raise ValueError(f"{export_dir} is the output folder; choose another folder to export to")
+                    in_flight.add(pool.submit(self.export_one, src, os.path.join(export_dir, os.path.basename(src))))
+                if self.cancel_event.is_set():
+                    exhausted = True
+                    result['cancelled'] = True
+                if not in_flight:
+                    break
+
+                done, in_flight = wait(in_flight, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        future.result()
+                        result['exported'] += 1
+                    except OSError as e:
+                        result['failed'] += 1
+                        result['error'] = result['error'] or str(e)
+
+                now = time.monotonic()
+                if now - last_publish >= PROGRESS_INTERVAL:
+                    last_publish = now
+                    self.on_progress(result['exported'] + result['failed'] + result['missing'], total)
+
+        result['fallbacks'] = self.fallbacks
+        self.on_progress(result['exported'] + result['failed'] + result['missing'], total)
+        return result
+
+    def export_archive(self, output_files, archive_path, manifest_path=None, total=None):
+        """Stream output files into a zip or tar archive (per the mode).
+
+        Files are read from disk one at a time, so memory does not grow with
+        their size. The archive is written under a temporary name and
+        renamed when complete; a cancelled or failed export leaves nothing.
+        The job manifest, when given, is added as csvtts-manifest.jsonl.
+        """
+        result = {'exported': 0, 'missing': 0, 'failed': 0, 'fallbacks': 0, 'error': None, 'cancelled': False}
+        tmp_path = f"{archive_path}.part"
+        names = set()
+        last_publish = 0.0
+        try:
+            if self.mode == 'zip':
+                archive = zipfile.ZipFile(tmp_path, 'w', allowZip64=True)
+            else:
+                archive = tarfile.open(tmp_path, 'w', format=tarfile.PAX_FORMAT)
+            with archive:
+                if manifest_path is not None:
+                    self.add_to_archive(archive, manifest_path, ARCHIVE_MANIFEST_NAME)
+                for src in output_files:
+                    if self.cancel_event.is_set():
+                        result['cancelled'] = True
+                        break
+                    name = os.path.basename(src)
+                    if not os.path.exists(src):
+                        result['missing'] += 1
+                    elif name in names:
+                        # Same name from two input folders; the first is kept
+                        result['failed'] += 1
+                        result['error'] = result['error'] or f"{name} appears more than once"
+                    else:
+                        names.add(name)
+                        self.add_to_archive(archive, src, name)
+                        result['exported'] += 1
+
+                    now = time.monotonic()
+                    if now - last_publish >= PROGRESS_INTERVAL:
+                        last_publish = now
+                        self.on_progress(result['exported'] + result['failed'] + result['missing'], total)
+            if result['cancelled']:
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, archive_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.on_progress(result['exported'] + result['failed'] + result['missing'], total)
+        return result
+
+    def add_to_archive(self, archive, src, name):
+        if isinstance(archive, zipfile.ZipFile):
+            stored = os.path.splitext(name)[1].lower() in STORED_EXTENSIONS
+            archive.write(src, name, compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+            return
+        archive.add(src, name, recursive=False)
+        if len(archive.members) >= TAR_MEMBER_BATCH:
+            archive.members = []
@@ -0,0 +1,115 @@
+# This Python file uses the following encoding: utf-8
+import os
+import time
+import shutil
+import threading
+
+# Written files are fsynced in groups of up to this many files, at least
+# this often (seconds)
+SYNC_BATCH_FILES = 64
+SYNC_BATCH_SECONDS = 1.0
+
+
+def temp_path(dest):
+    """The temporary name `dest` is written under before it is renamed into place.
+
+    The name is the same on every run, so a file left by a crash is
+    overwritten the next time the output is written.
+    """
+    return f"{dest}.tmp"
+
+
+def link_or_copy(src, dest):
+    """Hardlink `src` to `dest`, copying instead when linking is not possible.
+
+    Any existing file at `dest` is replaced; a copy is made under a temporary
+    name and renamed, so `dest` is never seen half written. Returns True if a
+    hardlink was made.
+    """
+    if os.path.lexists(dest):
+        if os.path.exists(dest) and os.path.samefile(src, dest):
+            return True
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+        return True
+    except OSError:
+        # Different filesystem, unsupported filesystem or link limit reached
+        tmp_path = temp_path(dest)
+        try:
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, dest)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return False
+
+
+def _fsync(path, directory=False):
+    flags = os.O_RDONLY | (getattr(os, 'O_DIRECTORY', 0) if directory else 0)
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        # Removed since, or a folder that cannot be opened (Windows)
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SyncBatcher:
+    """Make finished output files durable with grouped fsyncs.
+
+    Files are written under a temporary name and renamed into place with
+    `commit`, so an interrupted write never leaves a truncated file under the
+    final name. Rather than one fsync per file, committed files (and then
+    their folders, so the renames persist) are synced together once
+    SYNC_BATCH_FILES have gathered or SYNC_BATCH_SECONDS have passed. Call
+    `poll` periodically and `flush` before recording the files as done.
+    """
+
+    def __init__(self, batch_files=SYNC_BATCH_FILES, batch_seconds=SYNC_BATCH_SECONDS):
+        self.batch_files = batch_files
+        self.batch_seconds = batch_seconds
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()  # one group is synced at a time
+        self.pending = []
+        self.last_sync = time.monotonic()
+        self.synced = 0
+
+    def commit(self, tmp_path, dest):
+        """Rename a fully written temporary file to `dest`"""
+        os.replace(tmp_path, dest)
+        self.add(dest)
+
+    def add(self, path):
+        """Include a file written in place (such as a new hardlink) in the next sync"""
+        with self.lock:
+            self.pending.append(path)
+            if len(self.pending) < self.batch_files and time.monotonic() - self.last_sync < self.batch_seconds:
+                return
+        self.flush()
+
+    def poll(self):
+        """Sync waiting files once the interval has passed"""
+        with self.lock:
+            if not self.pending or time.monotonic() - self.last_sync < self.batch_seconds:
+                return
+        self.flush()
+
+    def flush(self):
+        """Sync every file committed so far"""
+        with self.sync_lock:
+            with self.lock:
+                paths, self.pending = self.pending, []
+                self.last_sync = time.monotonic()
+            if not paths:
+                return
+            for path in paths:
+                _fsync(path)
+            for directory in {os.path.dirname(os.path.abspath(path)) for path in paths}:
+                _fsync(directory, directory=True)
+            self.synced += len(paths)
@@ -0,0 +1,256 @@
+# This Python file uses the following encoding: utf-8
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Row updates are committed in groups to keep SQLite off the hot path
+COMMIT_EVERY_ROWS = 100
+COMMIT_EVERY_SECONDS = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    spec TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rows (
+    job_id TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    row_index INTEGER NOT NULL,
+    text_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    output_path TEXT,
+    PRIMARY KEY (job_id, file_path, row_index)
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    output_dir TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    output_format TEXT NOT NULL,
+    row_index INTEGER NOT NULL,
+    fingerprint BLOB NOT NULL,
+    PRIMARY KEY (output_dir, file_path, output_format, row_index)
+);
+CREATE INDEX IF NOT EXISTS outputs_fingerprint ON outputs (output_dir, file_path, output_format, fingerprint);
+CREATE TABLE IF NOT EXISTS throughput (
+    model TEXT NOT NULL,
+    finished REAL NOT NULL,
+    requests INTEGER NOT NULL,
+    characters INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    concurrency INTEGER NOT NULL
+);
+"""
+
+# Throughput estimates average this many recent runs
+THROUGHPUT_RUNS = 5
+
+
+def hash_text(text):
+    """Fingerprint a row's text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class JobJournal:
+    """SQLite record of every job and row, used to resume interrupted runs.
+
+    A job is identified by a hash of its file list, per-file options and
+    output format, so starting the same job again finds the rows that were
+    already written.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self.lock = threading.Lock()
+        # Called before each commit (the engine makes written files durable first)
+        self.before_commit = None
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+        self.connection.commit()
+        self.uncommitted = 0
+        self.last_commit = time.monotonic()
+
+    @staticmethod
+    def job_id_for(files_to_process, output_format):
+        """Derive a stable job id from the job's parameters"""
+        spec = json.dumps(
+            {'files': files_to_process, 'output_format': output_format},
+            sort_keys=True
+        )
+        return hashlib.sha256(spec.encode('utf-8')).hexdigest()[:32]
+
+    def start_job(self, job_id, files_to_process, output_format):
+        """Register a job, keeping finished rows unless it previously completed"""
+        spec = json.dumps({'files': files_to_process, 'output_format': output_format})
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT status FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                self.connection.execute(
+                    "INSERT INTO jobs (job_id, spec, status, created, updated) VALUES (?, ?, 'running', ?, ?)",
+                    (job_id, spec, now, now)
+                )
+            else:
+                if row[0] == 'complete':
+                    # A finished job started again is a fresh run
+                    self.connection.execute("DELETE FROM rows WHERE job_id = ?", (job_id,))
+                self.connection.execute(
+                    "UPDATE jobs SET status = 'running', updated = ? WHERE job_id = ?",
+                    (now, job_id)
+                )
+            self.connection.commit()
+
+    def completed_rows(self, job_id, file_path):
+        """Get {row_index: text hash as bytes} for rows already written.
+        
+        Binary hashes keep the map small for files with millions of rows.
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "SELECT row_index, text_hash FROM rows "
+                "WHERE job_id = ? AND file_path = ? AND status = 'done'",
+                (job_id, file_path)
+            )
+            return {row_index: bytes.fromhex(text_hash) for row_index, text_hash in cursor}
+
+    def mark_row(self, job_id, file_path, row_index, text_hash, status, output_path):
+        """Record the outcome of a row"""
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO rows (job_id, file_path, row_index, text_hash, status, output_path) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, file_path, row_index, text_hash, status, output_path)
+            )
+            self.uncommitted += 1
+            now = time.monotonic()
+            if self.uncommitted >= COMMIT_EVERY_ROWS or now - self.last_commit >= COMMIT_EVERY_SECONDS:
+                self._commit(now)
+
+    def previous_outputs(self, file_path, output_dir, output_format):
+        """Iterate (row_index, fingerprint) of the outputs last written from a file, in row order.
+        
+        Unlike job rows these are kept across completed jobs, so a re-run can
+        tell which rows changed. The rows are read over their own connection,
+        which sees the table as it was when reading started, so fingerprints
+        recorded during the run do not disturb the iteration.
+        """
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            yield from connection.execute(
+                "SELECT row_index, fingerprint FROM outputs "
+                "WHERE output_dir = ? AND file_path = ? AND output_format = ? ORDER BY row_index",
+                (output_dir, file_path, output_format)
+            )
+        finally:
+            connection.close()
+
+    def moved_output(self, file_path, output_dir, output_format, fingerprint, after_row):
+        """Get the last row after `after_row` whose output holds a fingerprint's audio, or None"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT MAX(row_index) FROM outputs "
+                "WHERE output_dir = ? AND file_path = ? AND output_format = ? "
+                "AND fingerprint = ? AND row_index > ?",
+                (output_dir, file_path, output_format, fingerprint, after_row)
+            ).fetchone()
+        return row[0]
+
+    def record_output(self, file_path, output_dir, output_format, row_index, fingerprint):
+        """Record the fingerprint of the audio written for a row"""
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO outputs (output_dir, file_path, output_format, row_index, fingerprint) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (output_dir, file_path, output_format, row_index, fingerprint)
+            )
+            self.uncommitted += 1
+            now = time.monotonic()
+            if self.uncommitted >= COMMIT_EVERY_ROWS or now - self.last_commit >= COMMIT_EVERY_SECONDS:
+                self._commit(now)
+
+    def remove_outputs(self, file_path, output_dir, output_format, first_row):
+        """Forget the outputs of rows from `first_row` on (rows removed from the file).
+        
+        Returns the row indices that were recorded.
+        """
+        params = (output_dir, file_path, output_format, first_row)
+        with self.lock:
+            rows = [row for row, in self.connection.execute(
+                "SELECT row_index FROM outputs WHERE output_dir = ? AND file_path = ? AND output_format = ? "
+                "AND row_index >= ?", params
+            )]
+            if rows:
+                self.connection.execute(
+                    "DELETE FROM outputs WHERE output_dir = ? AND file_path = ? AND output_format = ? "
+                    "AND row_index >= ?", params
+                )
+                self._commit(time.monotonic())
+        return rows
+
+    def finish_job(self, job_id, status):
+        """Set the final status of a job ('complete', 'aborted' or 'failed')"""
+        with self.lock:
+            self.connection.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE job_id = ?",
+                (status, time.time(), job_id)
+            )
+            self._commit(time.monotonic())
+
+    def flush(self):
+        """Commit pending row updates"""
+        with self.lock:
+            self._commit(time.monotonic())
+
+    def _commit(self, now):
+        if self.before_commit is not None:
+            self.before_commit()
+        self.connection.commit()
+        self.uncommitted = 0
+        self.last_commit = now
+
+    def last_unfinished_job(self):
+        """Get (job_id, files_to_process, output_format) of the most recent unfinished job"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT job_id, spec FROM jobs WHERE status != 'complete' "
+                "ORDER BY updated DESC LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return None
+        spec = json.loads(row[1])
+        return row[0], spec['files'], spec['output_format']
+
+    def record_throughput(self, model, requests, characters, seconds, concurrency):
+        """Store the measured request throughput of a finished run"""
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO throughput (model, finished, requests, characters, seconds, concurrency) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (model, time.time(), requests, characters, seconds, concurrency)
+            )
+            self._commit(time.monotonic())
+
+    def throughput(self, model):
+        """Get (requests/s, characters/s) over recent runs of a model, or None"""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT requests, characters, seconds FROM throughput WHERE model = ? "
+                "ORDER BY finished DESC LIMIT ?",
+                (model, THROUGHPUT_RUNS)
+            ).fetchall()
+        seconds = sum(row[2] for row in rows)
+        if not rows or seconds <= 0:
+            return None
+        return sum(row[0] for row in rows) / seconds, sum(row[1] for row in rows) / seconds
+
+    def close(self):
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
@@ -4,25 +4,27 @@ import os
 import csv
 import time
 import platform
+import multiprocessing
 from pathlib import Path
 
-# Import resources
-import resources_rc
-
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QFileDialog, QMessageBox,
-    QMenu, QInputDialog, QPushButton, QFormLayout
+    QMenu, QInputDialog, QPushButton, QFormLayout, QDockWidget, QPlainTextEdit
 )
-from PySide6.QtCore import Qt, QDir, QUrl, QStandardPaths
-from PySide6.QtGui import QDesktopServices, QAction
+from PySide6.QtCore import Qt, QDir, QUrl, QStandardPaths, QTimer
+from PySide6.QtGui import QDesktopServices, QAction, QFontDatabase
 
 # Import UI
 from ui_form import Ui_MainWindow
 
-# Import custom modules
-from settings import Settings, SettingsDialog
-from tts_processor import TTSProcessor, TTSWorker
-from csv_processor import CSVProcessor
+# Import custom modules (the settings dialog and the OpenAI SDK are
+# imported on first use to keep startup fast)
+from settings import Settings
+from tts_processor import TTSProcessor, TTSWorker, ExportWorker
+from exporter import EXPORT_MODES, ARCHIVE_MODES
+from csv_processor import CSVProcessor, PreflightWorker
+from preflight import format_estimate
+from preview_player import PreviewPlayer, MULTIMEDIA_AVAILABLE
 
 class MainWindow(QMainWindow):
     def __init__(self, parent=None):
@@ -34,14 +36,32 @@ class MainWindow(QMainWindow):
         self.settings = Settings()
         
         # Initialize processors
-        self.csv_processor = CSVProcessor()
+        self.csv_processor = CSVProcessor(self.settings.index_dir)
         self.tts_processor = TTSProcessor(self.settings)
         
+        # Open API connections in the background while the user picks a file
+        self.tts_processor.warm_up()
+        
+        # Trim stored previews to the size limit and remove leftover downloads
+        self.tts_processor.clean_up_previews()
+        
         # Current worker thread
         self.current_worker = None
-        
-        # Track processed files
-        self.processed_files = []
+        self.preflight_worker = None
+        self.estimate_pending = False  # the batch estimate dialog is open
+        self.export_worker = None
+        
+        # Track processed files: rows written by the last job are recorded in
+        # its manifest on disk and counted here as batches arrive
+        self.manifest_path = None
+        self.results_count = 0
+        self.run_stats = {}
+        
+        # In-app preview playback (created on first preview)
+        self.preview_player = None
+        self.preview_streaming = False
+        self.preview_requested_at = 0.0
+        self.preview_file = None
         
         # Store batch files
         self.batch_files = []
@@ -60,20 +80,30 @@ class MainWindow(QMainWindow):
         # CSV processor signals
         self.csv_processor.file_loaded.connect(self.on_csv_loaded)
         self.csv_processor.error_occurred.connect(self.show_error)
+        self.csv_processor.row_count_ready.connect(self.on_row_count_ready)
         
         # TTS processor signals
         self.tts_processor.progress_updated.connect(self.update_progress)
         self.tts_processor.processing_complete.connect(self.on_processing_complete)
+        self.tts_processor.results_ready.connect(self.on_results_ready)
         self.tts_processor.processing_error.connect(self.show_error)
+        self.tts_processor.preview_started.connect(self.on_preview_started)
+        self.tts_processor.preview_chunk.connect(self.on_preview_chunk)
         self.tts_processor.preview_ready.connect(self.play_preview)
+        self.tts_processor.rate_updated.connect(self.update_rate_status)
+        self.tts_processor.processing_stats.connect(self.on_processing_stats)
         
         # Set up menu
         self.ui.menuFile.addAction("Open CSV...", self.browse_file)
+        self.resumeJobAction = self.ui.menuFile.addAction("Resume Last Job", self.resume_last_job)
         self.ui.menuFile.addSeparator()
         self.ui.menuFile.addAction("Exit", self.close)
         self.ui.menuHelp.addAction("About", self.show_about)
         self.ui.menuSettings.addAction(self.ui.actionPreferences)
         
+        # Request statistics panel, filled in when a job finishes
+        self.setup_stats_panel()
+        
         # Initialize UI state - call this after connecting signals
         self.initialize_ui()
     
@@ -128,6 +158,8 @@ class MainWindow(QMainWindow):
                 # Display the first file in the UI
                 self.ui.filePath.setText(file_paths[0])
                 self.load_csv_file(file_paths[0])
+                # Index the remaining files in the background for progress totals
+                self.csv_processor.start_indexing(file_paths[1:])
                 # Update status to show number of files selected
                 self.ui.statusLabel.setText(f"{len(file_paths)} files selected for batch processing")
                 # Enable batch process button if we have an output directory
@@ -168,6 +200,10 @@ class MainWindow(QMainWindow):
             if selected_column >= 0 and selected_column < len(headers):
                 self.update_preview_text(selected_column)
     
+    def on_row_count_ready(self, file_path, row_count):
+        """Show the number of rows once the file has been indexed"""
+        self.ui.statusbar.showMessage(f"{os.path.basename(file_path)}: {row_count} records")
+    
     def browse_output_dir(self):
         """Open directory dialog to select output directory"""
         dir_path = QFileDialog.getExistingDirectory(
@@ -321,13 +357,66 @@ class MainWindow(QMainWindow):
             if not files_to_process:
                 self.show_error("No CSV files found", "No CSV files found to process")
                 return
+            
+            # Process only this machine's share of the rows when the batch is split
+            if self.settings.shard_count > 1:
+                for file_info in files_to_process:
+                    file_info['shard'] = [self.settings.shard_index, self.settings.shard_count]
                 
-            # Start processing
-            self.start_processing(files_to_process)
+            # Estimate the batch before starting it
+            self.run_preflight(files_to_process)
         else:
             # Just process the current file
             self.process_current_file()
     
+    def run_preflight(self, files_to_process):
+        """Scan the batch in the background and ask to start it once estimated"""
+        if self.preflight_worker is not None or self.estimate_pending:
+            return
+        self.ui.batchProcessButton.setEnabled(False)
+        self.ui.statusLabel.setText(f"Estimating batch of {len(files_to_process)} files...")
+        
+        worker = PreflightWorker(files_to_process, self.settings, self.tts_processor.get_journal())
+        worker.estimate_ready.connect(lambda estimate: self.on_preflight_ready(files_to_process, estimate))
+        worker.estimate_error.connect(self.show_error)
+        worker.finished.connect(self.on_preflight_finished)
+        self.preflight_worker = worker
+        worker.start()
+    
+    def on_preflight_ready(self, files_to_process, estimate):
+        """Show the estimate and start processing if confirmed"""
+        self.ui.statusLabel.setText("Ready")
+        # The worker may finish while the dialog is open; the batch button
+        # stays disabled until it is answered
+        self.estimate_pending = True
+        try:
+            if not estimate['rows']:
+                self.show_error("Nothing to Process", "The selected column has no text in these files.\n\n" + format_estimate(estimate))
+                response = QMessageBox.No
+            else:
+                response = QMessageBox.question(
+                    self,
+                    "Batch Estimate",
+                    format_estimate(estimate) + "\n\nStart processing?",
+                    QMessageBox.Yes | QMessageBox.No,
+                    QMessageBox.Yes
+                )
+        finally:
+            self.estimate_pending = False
+        if response == QMessageBox.Yes:
+            self.start_processing(files_to_process)
+        elif self.preflight_worker is None:
+            self.on_preflight_finished()
+    
+    def on_preflight_finished(self):
+        self.preflight_worker = None
+        if self.estimate_pending:
+            return
+        if not (self.current_worker and self.current_worker.isRunning()):
+            self.ui.batchProcessButton.setEnabled(True)
+            if self.ui.statusLabel.text().startswith("Estimating"):
+                self.ui.statusLabel.setText("Ready")
+    
     def start_processing(self, files_to_process):
         """Start processing files"""
         # Update UI
@@ -340,48 +429,185 @@ class MainWindow(QMainWindow):
         # Reset progress
         self.ui.progressBar.setValue(0)
         self.ui.statusLabel.setText("Processing...")
+        self.manifest_path = None
+        self.results_count = 0
         
         # Start worker
         self.current_worker = self.tts_processor.process_files(files_to_process)
     
+    def resume_last_job(self):
+        """Restart the most recent interrupted job, skipping rows already done"""
+        if self.current_worker and self.current_worker.isRunning():
+            self.show_error("Processing in Progress", "Stop the current job before resuming another one.")
+            return
+        
+        job = self.tts_processor.last_unfinished_job()
+        if job is None:
+            QMessageBox.information(self, "Resume Last Job", "There is no interrupted job to resume.")
+            return
+        
+        files_to_process, output_format = job
+        if output_format != self.settings.output_format:
+            self.show_error(
+                "Output Format Changed",
+                f"The last job was started with the '{output_format}' output format. "
+                f"Set the output format back to '{output_format}' in Settings to resume it."
+            )
+            return
+        
+        missing = [info['file_path'] for info in files_to_process if not os.path.exists(info['file_path'])]
+        if missing:
+            self.show_error("Files Not Found", "These files from the last job no longer exist:\n" + "\n".join(missing))
+            return
+        
+        self.ui.statusLabel.setText(f"Resuming job with {len(files_to_process)} files...")
+        self.start_processing(files_to_process)
+    
     def stop_processing(self):
-        """Stop current processing"""
+        """Stop current processing, or the running export"""
         if self.current_worker and self.current_worker.isRunning():
             self.tts_processor.stop_processing()
             self.ui.statusLabel.setText("Stopping...")
+        elif self.export_worker is not None:
+            self.export_worker.stop()
+            self.ui.statusLabel.setText("Cancelling export...")
     
-    def update_progress(self, current, total, message):
-        """Update progress bar and status"""
-        progress = int((current / total) * 100) if total > 0 else 0
-        self.ui.progressBar.setValue(progress)
-        self.ui.statusLabel.setText(message)
+    def is_processing(self):
+        return bool(self.current_worker and self.current_worker.isRunning())
+    
+    def update_progress(self, progress):
+        """Update progress bar and status (published about ten times a second)"""
+        self.ui.progressBar.setValue(int(progress['fraction'] * 100))
+        self.ui.statusLabel.setText(progress['message'])
+    
+    def update_rate_status(self, rate):
+        """Show the current request rate in the status bar"""
+        message = (
+            f"{rate['model']}: {rate['requests_per_minute']:.0f} req/min, "
+            f"{rate['characters_per_minute']:.0f} chars/min"
+        )
+        if rate['request_limit']:
+            message += f" (limit {rate['request_limit']:.0f} req/min)"
+        if rate['throttled']:
+            message += " - throttled"
+        self.ui.statusbar.showMessage(message)
+    
+    def setup_stats_panel(self):
+        """Create the dockable request statistics panel and its View menu entry"""
+        self.statsText = QPlainTextEdit(self)
+        self.statsText.setReadOnly(True)
+        self.statsText.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.statsText.setPlainText("Request statistics appear here when a job finishes.")
+        
+        self.statsDock = QDockWidget("Request Stats", self)
+        self.statsDock.setObjectName("statsDock")
+        self.statsDock.setWidget(self.statsText)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.statsDock)
+        self.statsDock.hide()
+        
+        self.menuView = QMenu("View", self.ui.menubar)
+        self.menuView.addAction(self.statsDock.toggleViewAction())
+        self.ui.menubar.insertMenu(self.ui.menuHelp.menuAction(), self.menuView)
+    
+    def format_telemetry(self, telemetry):
+        """Describe per-request measurements for the stats panel"""
+        statuses = ", ".join(f"{status}: {count:,}" for status, count in sorted(telemetry['statuses'].items()))
+        lines = [
+            f"Requests: {telemetry['requests']:,}" + (f" ({statuses})" if statuses else ""),
+            f"Retries: {telemetry['retries']:,}",
+            f"Characters sent: {telemetry['characters']:,}",
+            f"Audio received: {telemetry['bytes'] / (1024 * 1024):,.1f} MB",
+            f"Run time: {telemetry['seconds']:,.1f} s",
+            "",
+            f"{'':20}{'p50':>10}{'p95':>10}{'p99':>10}{'mean':>10}"
+        ]
+        for label, key in (
+            ("Queue wait", 'queue_wait'),
+            ("Time to first byte", 'ttfb'),
+            ("Total latency", 'latency')
+        ):
+            histogram = telemetry[key]
+            values = "".join(
+                f"{histogram[column]:>9.3f}s" if histogram[column] is not None else f"{'-':>10}"
+                for column in ('p50', 'p95', 'p99', 'mean')
+            )
+            lines.append(f"{label:20}{values}")
+        lines.append("")
+        lines.append(
+            "Queue wait is time spent on rate limits, free request slots and earlier attempts; "
+            "latency minus time to first byte is download and disk time."
+        )
+        return "\n".join(lines)
+    
+    def on_processing_stats(self, stats):
+        """Store end-of-run counters for the completion report"""
+        self.run_stats = stats
+        if stats.get('telemetry'):
+            self.statsText.setPlainText(self.format_telemetry(stats['telemetry']))
+            self.statsDock.show()
+    
+    def format_run_stats(self):
+        """Describe end-of-run counters for the completion message"""
+        lines = []
+        if 'shard' in self.run_stats:
+            lines.append(f"Shard {self.run_stats['shard']}: manifest written to {self.run_stats['manifest']}")
+        if self.run_stats.get('rows_resumed'):
+            lines.append(f"Resumed: {self.run_stats['rows_resumed']} rows already done by an earlier run")
+        if self.run_stats.get('rows_unchanged') or self.run_stats.get('rows_moved'):
+            lines.append(
+                f"Unchanged since the last run: {self.run_stats['rows_unchanged']} rows left as they were, "
+                f"{self.run_stats['rows_moved']} moved rows reused"
+            )
+        if self.run_stats.get('outputs_removed'):
+            lines.append(f"Removed rows: {self.run_stats['outputs_removed']} old output files deleted")
+        if self.run_stats.get('requests_saved'):
+            lines.append(f"Duplicate rows reused: {self.run_stats['requests_saved']} requests saved")
+        if 'cache_hits' in self.run_stats:
+            lines.append(
+                f"Cache: {self.run_stats['cache_hits']} hits, "
+                f"{self.run_stats['cache_misses']} misses"
+            )
+        if 'packing_unavailable' in self.run_stats:
+            lines.append(
+                f"Short-row packing skipped: {self.run_stats['packing_unavailable']} output needs ffmpeg "
+                "(use WAV output or install ffmpeg)"
+            )
+        elif self.run_stats.get('rows_packed') or self.run_stats.get('pack_fallbacks'):
+            lines.append(
+                f"Packed rows: {self.run_stats['rows_packed']} "
+                f"({self.run_stats['pack_fallbacks']} packs re-sent row by row)"
+            )
+        return "\n".join(lines)
+    
+    def on_results_ready(self, batch):
+        """Count a batch of rows written by the running job; they can be exported right away"""
+        self.manifest_path = batch['manifest']
+        self.results_count += len(batch['outputs'])
+        self.ui.exportButton.setEnabled(self.export_worker is None)
     
-    def on_processing_complete(self, processed_files):
+    def on_processing_complete(self, result):
         """Handle processing complete event"""
+        self.manifest_path = result['manifest']
+        self.results_count = result['rows']
+        
         # Update UI
         self.ui.processButton.setEnabled(True)
         self.ui.batchProcessButton.setEnabled(self.ui.batchCheckBox.isChecked() and bool(self.ui.outputDirPath.text()))
         self.ui.previewButton.setEnabled(True)
-        self.ui.stopButton.setEnabled(False)
-        self.ui.exportButton.setEnabled(len(processed_files) > 0)
+        # Stop stays available to cancel a running export
+        self.ui.stopButton.setEnabled(self.export_worker is not None)
+        self.ui.exportButton.setEnabled(self.results_count > 0 and self.export_worker is None)
         
         # Update status
         self.ui.progressBar.setValue(100)
-        self.ui.statusLabel.setText(f"Completed: {len(processed_files)} files processed")
-        
-        # Store processed files
-        self.processed_files = processed_files
-        print(f"DEBUG: Stored {len(processed_files)} processed files. Export button enabled: {len(processed_files) > 0}")
-        if len(processed_files) > 0:
-            # Log the first file for debugging
-            print(f"DEBUG: First processed file: {processed_files[0].get('output_file', 'No output file')}")
+        self.ui.statusLabel.setText(f"Completed: {self.results_count} files processed")
         
         # Show completion message
-        QMessageBox.information(
-            self,
-            "Processing Complete",
-            f"Successfully processed {len(processed_files)} files. You can now use 'Export All' to save these files to a directory of your choice."
-        )
+        message = f"Successfully processed {self.results_count} files. You can now use 'Export All' to save these files to a directory of your choice."
+        stats_text = self.format_run_stats()
+        if stats_text:
+            message += f"\n\n{stats_text}"
+        QMessageBox.information(self, "Processing Complete", message)
     
     def preview_tts(self):
         """Generate and play a TTS preview"""
@@ -414,69 +640,185 @@ class MainWindow(QMainWindow):
         self.ui.statusLabel.setText("Generating preview...")
         
         # Generate preview
+        self.preview_requested_at = time.monotonic()
+        self.preview_streaming = False
         self.tts_processor.generate_preview(text, voice, model, instructions)
     
+    def get_preview_player(self):
+        """Get the in-app player, or None if QtMultimedia is not available"""
+        if self.preview_player is None and MULTIMEDIA_AVAILABLE:
+            self.preview_player = PreviewPlayer(self)
+            self.preview_player.first_audio.connect(self.on_preview_first_audio)
+            self.preview_player.playback_failed.connect(self.on_preview_playback_failed)
+        return self.preview_player
+    
+    def on_preview_started(self, output_format):
+        """Start in-app playback as soon as the preview response begins"""
+        player = self.get_preview_player()
+        self.preview_streaming = False
+        self.preview_file = None
+        if player is None:
+            return
+        try:
+            player.start(output_format, self.preview_requested_at)
+            self.preview_streaming = True
+            self.ui.statusLabel.setText("Playing preview...")
+        except Exception as e:
+            # Fall back to the external player once the download finishes
+            self.ui.statusbar.showMessage(f"Preview streaming unavailable: {str(e)}")
+    
+    def on_preview_chunk(self, chunk):
+        """Feed downloaded preview audio to the player"""
+        if self.preview_streaming:
+            self.preview_player.feed(chunk)
+    
+    def on_preview_first_audio(self, seconds):
+        """Report time-to-first-audio for the preview"""
+        self.ui.statusbar.showMessage(f"Preview: first audio after {seconds:.2f} s")
+    
+    def on_preview_playback_failed(self, message):
+        """Stop streaming; the finished file will open in the default player instead"""
+        self.ui.statusbar.showMessage(f"Preview playback failed: {message}")
+        self.preview_streaming = False
+        self.preview_player.stop()
+        if self.preview_file:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(self.preview_file))
+    
     def play_preview(self, preview_file):
         """Play the generated preview"""
         # Update UI
         self.ui.previewButton.setEnabled(True)
         self.ui.statusLabel.setText("Ready")
+        self.preview_file = preview_file
+        
+        # Already playing in-app; let the player know the download is complete
+        if self.preview_streaming:
+            self.preview_player.finish()
+            return
+        
+        # A stored preview (or one that could not be streamed) plays from the file
+        player = self.get_preview_player()
+        if player is not None:
+            try:
+                player.play_file(preview_file, self.preview_requested_at)
+                return
+            except Exception as e:
+                self.ui.statusbar.showMessage(f"In-app playback unavailable: {str(e)}")
         
         # Open the file with the default audio player
         QDesktopServices.openUrl(QUrl.fromLocalFile(preview_file))
     
     def export_all(self):
-        """Export all processed files as a package"""
-        print(f"DEBUG: Export all called. Processed files count: {len(self.processed_files)}")
-        if not self.processed_files:
+        """Export all processed files to a directory on a background thread"""
+        if self.export_worker is not None:
+            return
+        if not self.results_count or not self.manifest_path:
             self.show_error("No files to export", "No files have been processed yet. Please process at least one file before exporting.")
             self.ui.statusLabel.setText("Error: No files to export")
             return
         
-        # Ask for export directory
-        export_dir = QFileDialog.getExistingDirectory(
-            self,
-            "Select Export Directory",
-            QDir.homePath(),
-            QFileDialog.ShowDirsOnly
-        )
-        
-        if not export_dir:
+        # Ask how to export, starting from the last method used. Moving is
+        # not offered while a job runs: the engine links duplicate rows from
+        # outputs it has already written
+        modes = [mode for mode in EXPORT_MODES if mode != 'move' or not self.is_processing()]
+        labels = [EXPORT_MODES[mode] for mode in modes]
+        current = modes.index(self.settings.export_mode) if self.settings.export_mode in modes else 0
+        label, ok = QInputDialog.getItem(self, "Export All", "Export method:", labels, current, False)
+        if not ok:
             return
-        
-        # Copy all processed files to export directory
-        try:
-            import shutil
-            count = 0
-            
-            for file_info in self.processed_files:
-                output_file = file_info.get('output_file')
-                if output_file and os.path.exists(output_file):
-                    file_name = os.path.basename(output_file)
-                    dest_path = os.path.join(export_dir, file_name)
-                    shutil.copy2(output_file, dest_path)
-                    count += 1
-            
-            # Show success message
-            QMessageBox.information(
+        mode = modes[labels.index(label)]
+        self.settings.export_mode = mode
+        self.settings.save()
+        
+        # Ask for the archive file or the export directory
+        if mode in ARCHIVE_MODES:
+            extension = ".zip" if mode == 'zip' else ".tar"
+            destination, _ = QFileDialog.getSaveFileName(
                 self,
-                "Export Complete",
-                f"Successfully exported {count} files to {export_dir}"
+                "Save Archive",
+                os.path.join(QDir.homePath(), f"csvtts-export{extension}"),
+                f"{EXPORT_MODES[mode]} (*{extension})"
             )
-            
-            # Open the export directory
-            QDesktopServices.openUrl(QUrl.fromLocalFile(export_dir))
-            
-        except Exception as e:
-            self.show_error("Export Error", f"Error exporting files: {str(e)}")
+            if destination and not destination.endswith(extension):
+                destination += extension
+        else:
+            destination = QFileDialog.getExistingDirectory(
+                self,
+                "Select Export Directory",
+                QDir.homePath(),
+                QFileDialog.ShowDirsOnly
+            )
+        
+        if not destination:
+            return
+        
+        # Exporting into the output folder would replace each file with itself
+        output_dir = self.ui.outputDirPath.text()
+        if mode not in ARCHIVE_MODES and output_dir and os.path.realpath(destination) == os.path.realpath(output_dir):
+            self.show_error("Invalid export folder", "The export folder is the output folder. Please choose another folder.")
+            return
+        
+        # Export the files listed in the job's manifest
+        worker = ExportWorker(self.manifest_path, destination, mode, self.results_count)
+        worker.export_progress.connect(self.on_export_progress)
+        worker.export_complete.connect(lambda result: self.on_export_complete(destination, mode, result))
+        worker.export_error.connect(self.show_error)
+        worker.finished.connect(self.on_export_finished)
+        self.export_worker = worker
+        
+        self.ui.exportButton.setEnabled(False)
+        self.ui.stopButton.setEnabled(True)
+        self.on_export_progress(0, self.results_count)
+        worker.start()
+    
+    def on_export_progress(self, done, total):
+        """Show export progress (in the status bar while a job is also running)"""
+        message = f"Exporting: {done} of {total} files" if total else f"Exporting: {done} files"
+        if self.is_processing():
+            self.statusBar().showMessage(message)
+            return
+        self.ui.progressBar.setValue(int(done * 100 / total) if total else 0)
+        self.ui.statusLabel.setText(message)
+    
+    def on_export_complete(self, destination, mode, result):
+        """Report the export and open the export directory"""
+        message = f"Successfully exported {result['exported']} files to {destination}"
+        if result['cancelled']:
+            message = f"Export cancelled after {result['exported']} files."
+        if result['fallbacks']:
+            message += f"\n\n{result['fallbacks']} files were copied because {mode} is not supported there."
+        if result['missing']:
+            message += f"\n\n{result['missing']} output files no longer exist and were skipped."
+        if result['failed']:
+            message += f"\n\n{result['failed']} files could not be exported: {result['error']}"
+        QMessageBox.information(self, "Export Complete", message)
+        
+        # Open the export directory (the archive's folder for zip and tar)
+        if mode in ARCHIVE_MODES:
+            destination = os.path.dirname(destination)
+        QDesktopServices.openUrl(QUrl.fromLocalFile(destination))
+    
+    def on_export_finished(self):
+        self.export_worker = None
+        self.ui.exportButton.setEnabled(self.results_count > 0)
+        if not self.is_processing():
+            self.ui.stopButton.setEnabled(False)
+            self.ui.statusLabel.setText("Ready")
     
     def show_settings(self):
         """Show settings dialog"""
+        from settings_dialog import SettingsDialog
         dialog = SettingsDialog(self.settings, self)
         if dialog.exec():
             # Reload settings
             self.settings.load()
             
+            # Reconnect with the new API key, endpoint, timeout or pool size
+            self.tts_processor.warm_up()
+            
+            # Apply a lowered preview storage limit right away
+            self.tts_processor.get_preview_store().trim()
+            
             # Update UI
             voice_index = self.ui.voiceComboBox.findText(self.settings.default_voice)
             self.ui.voiceComboBox.setCurrentIndex(max(0, voice_index))
@@ -535,6 +877,7 @@ class MainWindow(QMainWindow):
                 # Display the first file in the UI
                 self.ui.filePath.setText(self.batch_files[0])
                 self.load_csv_file(self.batch_files[0])
+                self.csv_processor.start_indexing(self.batch_files[1:])
                 # Update status to show number of files found
                 self.ui.statusLabel.setText(f"Found {len(self.batch_files)} CSV files in folder")
                 # Enable batch processing button
@@ -547,7 +890,18 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    # Pre-flight scans use worker processes, which frozen builds must support
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     widget = MainWindow()
     widget.show()
+    
+    # Startup benchmark hook: record when the window is up, then quit
+    probe_file = os.environ.get("CSVTTS_STARTUP_PROBE")
+    if probe_file:
+        def record_startup():
+            Path(probe_file).write_text(repr(time.time()))
+            app.quit()
+        QTimer.singleShot(0, record_startup)
+    
     sys.exit(app.exec())
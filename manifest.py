@@ -0,0 +1,184 @@
+# This Python file uses the following encoding: utf-8
+import os
+import json
+import hashlib
+
+MANIFEST_FORMAT = "csvtts-manifest"
+MANIFEST_VERSION = 1
+# File name of a merged (or unsharded) manifest
+MANIFEST_NAME = "csvtts-manifest.jsonl"
+
+
+def parse_shard(spec):
+    """Parse an 'i/N' shard spec (1-based) into (i, N)"""
+    index, _, count = str(spec).partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"invalid shard '{spec}' (use i/N, e.g. 2/4)")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"invalid shard '{spec}' (i must be between 1 and N)")
+    return index, count
+
+
+def shard_of(text, count):
+    """The 1-based shard a row belongs to.
+
+    Rows are assigned by a hash of their text, which is the same on every
+    machine and Python process, so identical rows always land on the same
+    shard and are still synthesized only once.
+    """
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % count + 1
+
+
+def shard_manifest_name(shard):
+    index, count = shard
+    return f"csvtts-manifest.shard-{index}-of-{count}.jsonl"
+
+
+class ManifestWriter:
+    """JSON-lines record of the rows a run wrote.
+
+    The first line is a header describing the run (shard, output format);
+    each following line is one written row. Rows are buffered and reach the
+    file when `flush` is called, so a crash keeps every flushed batch.
+    """
+
+    def __init__(self, path, **header):
+        self.path = str(path)
+        self.rows = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.file.write(json.dumps(dict(format=MANIFEST_FORMAT, version=MANIFEST_VERSION, **header)) + "\n")
+        self.file.flush()
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.rows += 1
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+
+
+def _read_header(f, path):
+    try:
+        header = json.loads(f.readline() or "{}")
+    except ValueError:
+        header = {}
+    if header.get('format') != MANIFEST_FORMAT:
+        raise ValueError(f"{path} is not a csvtts manifest")
+    return header
+
+
+def manifest_header(path):
+    """Get the header of a manifest file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return _read_header(f, path)
+
+
+def read_manifest(path):
+    """Get (header, iterator over row records) of a manifest file"""
+    f = open(path, 'r', encoding='utf-8')
+    try:
+        header = _read_header(f, path)
+    except ValueError:
+        f.close()
+        raise
+
+    def records():
+        with f:
+            for line in f:
+                # A manifest still being written may end in a partial line
+                if not line.endswith("\n"):
+                    break
+                if line.strip():
+                    yield json.loads(line)
+
+    return header, records()
+
+
+def prune_manifests(directory, keep):
+    """Delete all but the `keep` most recently written manifests in a folder"""
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.name.endswith(".jsonl")]
+    except OSError:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def find_manifests(paths):
+    """Expand files and folders into the shard manifests they contain"""
+    manifests = []
+    for path in paths:
+        if os.path.isdir(path):
+            manifests.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.startswith("csvtts-manifest.shard-") and name.endswith(".jsonl")
+            )
+        else:
+            manifests.append(path)
+    return manifests
+
+
+def merge_manifests(paths, dest):
+    """Combine per-shard manifests into one.
+
+    All manifests must come from the same split (same shard count and output
+    format) and no two shards may have written the same output file name.
+    Returns a summary with the shards found and missing and the row count.
+    """
+    shards = {}
+    for path in paths:
+        header = manifest_header(path)
+        shard = tuple(header.get('shard') or (1, 1))
+        if shard in shards:
+            raise ValueError(f"shard {shard[0]}/{shard[1]} appears twice ({shards[shard][0]} and {path})")
+        shards[shard] = (path, header)
+    if not shards:
+        raise ValueError("no manifests to merge")
+
+    counts = {shard[1] for shard in shards}
+    formats = {header.get('output_format') for _, header in shards.values()}
+    if len(counts) > 1:
+        raise ValueError(f"manifests come from different splits ({', '.join(map(str, sorted(counts)))} shards)")
+    if len(formats) > 1:
+        raise ValueError(f"manifests use different output formats ({', '.join(sorted(map(str, formats)))})")
+    count = counts.pop()
+
+    seen = set()
+    writer = ManifestWriter(dest, shards=count, merged=sorted(index for index, _ in shards), output_format=formats.pop())
+    try:
+        for shard in sorted(shards):
+            path = shards[shard][0]
+            _, records = read_manifest(path)
+            for record in records:
+                name = os.path.basename(record['output_file'])
+                if name in seen:
+                    raise ValueError(f"output {name} was written by more than one shard")
+                seen.add(name)
+                writer.write(record)
+    except BaseException:
+        writer.close()
+        os.remove(writer.path)
+        raise
+    writer.close()
+    return {
+        'shards': count,
+        'merged': sorted(index for index, _ in shards),
+        'missing': [index for index in range(1, count + 1) if (index, count) not in shards],
+        'rows': writer.rows,
+        'manifest': writer.path
+    }
@@ -0,0 +1,197 @@
+# This Python file uses the following encoding: utf-8
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from csv_stream import iter_column_texts
+from text_chunker import MAX_INPUT_CHARACTERS, CHUNK_CHARACTERS, split_text
+from manifest import shard_of
+from progress import format_duration
+
+# Approximate list prices in USD per million input characters. gpt-4o-mini-tts
+# is billed by tokens and audio minutes; its figure is a rough equivalent.
+PRICE_PER_MILLION_CHARACTERS = {
+    'tts-1': 15.0,
+    'tts-1-hd': 30.0,
+    'gpt-4o-mini-tts': 12.0,
+}
+# Over-limit rows listed per file (all of them are counted)
+MAX_FLAGGED_ROWS = 20
+
+
+def _scan_job(job):
+    """Scan one file for _scan_all; a file that cannot be read is returned as its error"""
+    try:
+        return scan_file(*job)
+    except Exception as e:
+        return e
+
+
+def _fingerprint(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+
+def scan_file(file_path, column_index, shard=None):
+    """Stream one file's column and count what a run would send.
+
+    Returns a dict with row and character counts, the rows over the input
+    limit, and fingerprints of the distinct texts with the number of requests
+    each needs (long rows are split into several).
+    """
+    rows = 0
+    duplicates = 0
+    long_rows = 0
+    flagged = []
+    texts = {}  # fingerprint -> (requests, characters)
+    for item, (text, _, _) in enumerate(iter_column_texts(file_path, column_index), start=1):
+        if shard and shard_of(text, shard[1]) != shard[0]:
+            continue
+        rows += 1
+        fingerprint = _fingerprint(text)
+        if fingerprint in texts:
+            duplicates += 1
+            continue
+        requests = 1
+        if len(text) > CHUNK_CHARACTERS:
+            requests = len(split_text(text))
+        if len(text) > MAX_INPUT_CHARACTERS:
+            long_rows += 1
+            if len(flagged) < MAX_FLAGGED_ROWS:
+                flagged.append(item)
+        texts[fingerprint] = (requests, len(text))
+    return {
+        'file_path': file_path,
+        'rows': rows,
+        'duplicates': duplicates,
+        'long_rows': long_rows,
+        'flagged_rows': flagged,
+        'texts': texts
+    }
+
+
+def _scan_all(jobs):
+    """Scan files in parallel processes, or in this process if that is not possible"""
+    if len(jobs) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as pool:
+                futures = [pool.submit(_scan_job, job) for job in jobs]
+                # A dead worker raises BrokenProcessPool here, for the fallback below
+                return [future.result() for future in futures]
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            pass
+    return [_scan_job(job) for job in jobs]
+
+
+def estimate_duration(requests, characters, rate_limit, throughput):
+    """Seconds a model's work is expected to take, and what the figure is based on"""
+    requests_per_minute, characters_per_minute = rate_limit
+    bounds = []
+    if requests_per_minute:
+        bounds.append(requests * 60 / requests_per_minute)
+    if characters_per_minute:
+        bounds.append(characters * 60 / characters_per_minute)
+    if throughput is not None:
+        requests_per_second, characters_per_second = throughput
+        if requests_per_second:
+            bounds.append(requests / requests_per_second)
+        if characters_per_second:
+            bounds.append(characters / characters_per_second)
+    basis = "measured throughput" if throughput is not None else "rate limits only"
+    return (max(bounds) if bounds else None), basis
+
+
+def estimate_batch(files_to_process, settings, journal=None):
+    """Pre-flight estimate of rows, characters, requests, cost and duration.
+
+    Files are scanned in parallel. Rows repeated within or across files
+    (for the same voice, model and instructions) are counted once, as the
+    engine synthesizes them once. Durations use the throughput measured in
+    earlier runs when the journal has it, and the configured rate limits.
+    """
+    jobs = [
+        (file_info['file_path'], file_info['column_index'], file_info.get('shard'))
+        for file_info in files_to_process
+    ]
+    scans = _scan_all(jobs)
+
+    estimate = {
+        'files': len(files_to_process),
+        'shard': next((file_info['shard'] for file_info in files_to_process if file_info.get('shard')), None),
+        'rows': 0,
+        'duplicates': 0,
+        'long_rows': 0,
+        'flagged': [],  # (file path, [row numbers]) of rows over the input limit
+        'errors': [],  # (file path, message)
+        'models': {},
+        'cost': 0.0,
+        'seconds': None
+    }
+    groups = {}  # (voice, model, instructions) -> fingerprints already counted
+    for file_info, scan in zip(files_to_process, scans):
+        if isinstance(scan, Exception):
+            estimate['errors'].append((file_info['file_path'], str(scan)))
+            continue
+        model = file_info['model']
+        key = (file_info['voice'], model, file_info['instructions'] if model == "gpt-4o-mini-tts" else "")
+        seen = groups.setdefault(key, set())
+        totals = estimate['models'].setdefault(model, {'rows': 0, 'characters': 0, 'requests': 0})
+
+        estimate['rows'] += scan['rows']
+        estimate['duplicates'] += scan['duplicates']
+        estimate['long_rows'] += scan['long_rows']
+        if scan['flagged_rows']:
+            estimate['flagged'].append((scan['file_path'], scan['flagged_rows']))
+        totals['rows'] += scan['rows']
+        for fingerprint, (requests, characters) in scan['texts'].items():
+            if fingerprint in seen:
+                estimate['duplicates'] += 1
+                continue
+            seen.add(fingerprint)
+            totals['requests'] += requests
+            totals['characters'] += characters
+
+    total_seconds = 0.0
+    for model, totals in estimate['models'].items():
+        price = PRICE_PER_MILLION_CHARACTERS.get(model)
+        totals['cost'] = totals['characters'] / 1e6 * price if price is not None else None
+        if totals['cost'] is not None:
+            estimate['cost'] += totals['cost']
+        throughput = journal.throughput(model) if journal is not None else None
+        totals['seconds'], totals['basis'] = estimate_duration(
+            totals['requests'], totals['characters'], settings.rate_limit(model), throughput
+        )
+        if totals['seconds'] is not None:
+            total_seconds += totals['seconds']
+    if any(totals['seconds'] is not None for totals in estimate['models'].values()):
+        estimate['seconds'] = total_seconds
+    return estimate
+
+
+def format_estimate(estimate):
+    """Describe an estimate for a confirmation dialog or console"""
+    lines = [f"Files: {estimate['files']}"]
+    if estimate['shard']:
+        lines.append(f"Shard: {estimate['shard'][0]} of {estimate['shard'][1]} (rows below are this shard's)")
+    lines.append(f"Non-empty rows: {estimate['rows']:,}")
+    if estimate['duplicates']:
+        lines.append(f"Duplicate rows (synthesized once): {estimate['duplicates']:,}")
+    for model, totals in sorted(estimate['models'].items()):
+        cost = f"${totals['cost']:,.2f}" if totals['cost'] is not None else "unknown cost"
+        lines.append(
+            f"{model}: {totals['characters']:,} characters in {totals['requests']:,} requests, "
+            f"about {cost}, {format_duration(totals['seconds'])} ({totals['basis']})"
+        )
+    if len(estimate['models']) > 1:
+        lines.append(f"Total: about ${estimate['cost']:,.2f}, {format_duration(estimate['seconds'])}")
+    if estimate['long_rows']:
+        lines.append(
+            f"Rows over the {MAX_INPUT_CHARACTERS:,}-character input limit "
+            f"(split into several requests): {estimate['long_rows']:,}"
+        )
+        for file_path, rows in estimate['flagged']:
+            lines.append(f"  {os.path.basename(file_path)}: rows {', '.join(map(str, rows))}")
+    for file_path, message in estimate['errors']:
+        lines.append(f"Could not read {os.path.basename(file_path)}: {message}")
+    lines.append("Estimates exclude cached and already-finished rows; prices are approximate.")
+    return "\n".join(lines)
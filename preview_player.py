@@ -0,0 +1,167 @@
+# This Python file uses the following encoding: utf-8
+import time
+import threading
+import importlib.util
+
+from PySide6.QtCore import QObject, QIODevice, QThread, QCoreApplication, QUrl, Signal
+
+# QtMultimedia is optional in some PySide6 builds and slow to load, so it is
+# only imported when the first preview is played
+MULTIMEDIA_AVAILABLE = importlib.util.find_spec("PySide6.QtMultimedia") is not None
+
+# Playback starts once this much audio has arrived (a few response chunks)
+PREBUFFER_BYTES = 16 * 1024
+# Longest a decoder thread blocks waiting for more data before re-checking
+READ_WAIT_SECONDS = 0.25
+
+
+class StreamBuffer(QIODevice):
+    """Sequential read-only device over audio that is still being downloaded.
+
+    The preview worker appends chunks as they arrive. Reads from a decoder
+    thread block until more data arrives or the download is finished; reads
+    on the GUI thread never block.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.data = bytearray()
+        self.read_pos = 0
+        self.finished = False
+        self.condition = threading.Condition()
+
+    def append(self, chunk):
+        """Add downloaded bytes"""
+        with self.condition:
+            self.data.extend(chunk)
+            self.condition.notify_all()
+        self.readyRead.emit()
+
+    def finish(self):
+        """Mark the download as complete"""
+        with self.condition:
+            self.finished = True
+            self.condition.notify_all()
+        self.readyRead.emit()
+
+    def size_received(self):
+        with self.condition:
+            return len(self.data)
+
+    def isSequential(self):
+        return True
+
+    def bytesAvailable(self):
+        with self.condition:
+            return len(self.data) - self.read_pos + super().bytesAvailable()
+
+    def atEnd(self):
+        with self.condition:
+            return self.finished and self.read_pos >= len(self.data)
+
+    def waitForReadyRead(self, msecs):
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.finished or self.read_pos < len(self.data),
+                None if msecs < 0 else msecs / 1000
+            ) and self.read_pos < len(self.data)
+
+    def readData(self, maxlen):
+        blocking = QThread.currentThread() is not QCoreApplication.instance().thread()
+        with self.condition:
+            while blocking and not self.finished and self.read_pos >= len(self.data):
+                self.condition.wait(READ_WAIT_SECONDS)
+            chunk = bytes(self.data[self.read_pos:self.read_pos + maxlen])
+            self.read_pos += len(chunk)
+        return chunk
+
+    def writeData(self, data):
+        return -1
+
+
+class PreviewPlayer(QObject):
+    """In-app preview playback that starts before the download completes"""
+    first_audio = Signal(float)  # seconds from start() to audible playback
+    playback_failed = Signal(str)  # error message
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.player = None
+        self.audio_output = None
+        self.buffer = None
+        self.output_format = None
+        self.started_at = 0.0
+        self.playing = False
+        self.first_audio_reported = False
+
+    def ensure_player(self):
+        """Create the media player on first use"""
+        if self.player is None:
+            from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+            self.audio_output = QAudioOutput(self)
+            self.player = QMediaPlayer(self)
+            self.player.setAudioOutput(self.audio_output)
+            self.player.positionChanged.connect(self.on_position_changed)
+            self.player.errorOccurred.connect(self.on_error)
+
+    def start(self, output_format, started_at=None):
+        """Begin a new preview stream, stopping any preview still playing"""
+        self.ensure_player()
+        self.stop()
+        self.buffer = StreamBuffer(self)
+        self.buffer.open(QIODevice.ReadOnly)
+        self.output_format = output_format
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        self.playing = False
+        self.first_audio_reported = False
+
+    def feed(self, chunk):
+        """Add downloaded audio; playback starts after the first few chunks"""
+        if self.buffer is None:
+            return
+        self.buffer.append(chunk)
+        if not self.playing and self.buffer.size_received() >= PREBUFFER_BYTES:
+            self.begin_playback()
+
+    def finish(self):
+        """Mark the download complete (short previews start playing here)"""
+        if self.buffer is None:
+            return
+        self.buffer.finish()
+        if not self.playing:
+            self.begin_playback()
+
+    def play_file(self, path, started_at=None):
+        """Play a finished preview file"""
+        self.ensure_player()
+        self.stop()
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        self.playing = True
+        self.first_audio_reported = False
+        self.player.setSource(QUrl.fromLocalFile(str(path)))
+        self.player.play()
+
+    def begin_playback(self):
+        self.playing = True
+        # The URL's extension tells the decoder which format to expect
+        self.player.setSourceDevice(self.buffer, QUrl(f"preview.{self.output_format}"))
+        self.player.play()
+
+    def stop(self):
+        """Stop playback and release the current stream"""
+        if self.player is not None:
+            self.player.stop()
+            self.player.setSource(QUrl())
+        if self.buffer is not None:
+            self.buffer.finish()
+            self.buffer.close()
+            self.buffer.deleteLater()
+            self.buffer = None
+
+    def on_position_changed(self, position):
+        if position > 0 and not self.first_audio_reported:
+            self.first_audio_reported = True
+            self.first_audio.emit(time.monotonic() - self.started_at)
+
+    def on_error(self, error, message=""):
+        self.playback_failed.emit(message or self.player.errorString())
@@ -0,0 +1,131 @@
+# This Python file uses the following encoding: utf-8
+import time
+import threading
+from collections import deque
+
+# Progress is published at most this often (seconds)
+PROGRESS_INTERVAL = 0.1
+# Rows/s and ETA are measured over this much recent history (seconds)
+RATE_WINDOW = 10.0
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "unknown"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+class ProgressTracker:
+    """Aggregate row progress and publish it at a fixed rate.
+
+    Rows are counted as they finish, but `publish` (the engine's progress
+    callback) is called at most every PROGRESS_INTERVAL seconds with a
+    snapshot: overall fraction (bytes of input finished across all files),
+    rows done, rows/s and ETA over the last RATE_WINDOW seconds, and a
+    status message. Call `flush` periodically so the last update of a burst
+    is not held back.
+    """
+
+    def __init__(self, file_sizes, publish, interval=PROGRESS_INTERVAL):
+        self.file_sizes = [max(1, size) for size in file_sizes]
+        self.total_bytes = sum(self.file_sizes)
+        self.publish = publish
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.history = deque()  # (time, overall bytes done, rows done)
+        self.last_publish = 0.0
+        self.dirty = False
+
+        self.file_index = 0
+        self.file_name = ""
+        self.row_count = None
+        self.finished_bytes = 0  # bytes of the files before the current one
+        self.file_bytes = 0
+        self.file_rows = 0
+        self.rows = 0
+
+    def start_file(self, index, file_name, row_count=None):
+        """Begin a file (`row_count` is its number of CSV records); publishes immediately"""
+        with self.lock:
+            self.file_index = index
+            self.file_name = file_name
+            self.row_count = row_count
+            self.finished_bytes = sum(self.file_sizes[:index])
+            self.file_bytes = 0
+            self.file_rows = 0
+            self._publish(time.monotonic(), f"Processing {file_name} ({index + 1}/{len(self.file_sizes)})")
+
+    def advance(self, span, rows=1):
+        """Count `rows` finished rows covering `span` bytes of the current file"""
+        with self.lock:
+            self.file_bytes += span
+            self.file_rows += rows
+            self.rows += rows
+            self.dirty = True
+            now = time.monotonic()
+            if now - self.last_publish >= self.interval:
+                self._publish(now)
+
+    def flush(self):
+        """Publish a pending update once the interval has passed"""
+        with self.lock:
+            now = time.monotonic()
+            if self.dirty and now - self.last_publish >= self.interval:
+                self._publish(now)
+
+    def finish(self, message):
+        """Publish the final state"""
+        with self.lock:
+            self.finished_bytes = self.total_bytes
+            self.file_bytes = 0
+            self._publish(time.monotonic(), message)
+
+    def _publish(self, now, message=None):
+        done = min(self.total_bytes, self.finished_bytes + self.file_bytes)
+        fraction = done / self.total_bytes
+
+        # Rates over the recent window
+        self.history.append((now, done, self.rows))
+        while len(self.history) > 2 and now - self.history[1][0] >= RATE_WINDOW:
+            self.history.popleft()
+        then, bytes_then, rows_then = self.history[0]
+        elapsed = now - then
+        rows_per_second = eta = None
+        if elapsed > 0:
+            rows_per_second = (self.rows - rows_then) / elapsed
+            bytes_per_second = (done - bytes_then) / elapsed
+            if bytes_per_second > 0:
+                eta = (self.total_bytes - done) / bytes_per_second
+
+        if message is None:
+            file_fraction = min(1.0, self.file_bytes / self.file_sizes[self.file_index])
+            if self.row_count is not None:
+                # The index counts records, including ones whose cell is empty
+                # and so never rendered
+                rows = f"{self.file_rows} rows from {self.row_count} records"
+            else:
+                rows = f"{self.file_rows} rows"
+            message = f"Processing {self.file_name}: {rows} ({file_fraction:.0%})"
+            if rows_per_second:
+                message += f", {rows_per_second:.1f} rows/s"
+            if eta is not None:
+                message += f", {format_duration(eta)} left"
+
+        self.last_publish = now
+        self.dirty = False
+        self.publish({
+            'fraction': fraction,
+            'file_index': self.file_index,
+            'total_files': len(self.file_sizes),
+            'rows': self.rows,
+            'rows_per_second': rows_per_second,
+            'eta': eta,
+            'message': message
+        })
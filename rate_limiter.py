@@ -0,0 +1,202 @@
+# This Python file uses the following encoding: utf-8
+import re
+import time
+import threading
+from collections import deque
+
+# Limiters keep a few seconds of burst rather than a full minute, so a fresh
+# bucket does not fire its whole per-minute budget at once
+BURST_SECONDS = 6
+# Largest single request the character bucket must always be able to admit
+MAX_REQUEST_CHARACTERS = 4096
+# Adaptive multiplier bounds (halved on 429, slowly restored on success)
+MIN_RATE_FACTOR = 0.1
+RATE_RECOVERY_STEP = 0.05
+# Used when a 429 arrives without a Retry-After header
+DEFAULT_RETRY_AFTER = 2.0
+# Longest single sleep while waiting, so aborts are noticed quickly
+MAX_WAIT_STEP = 0.25
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value):
+    """Parse a rate-limit reset value such as '1s', '6m0s' or '20ms' into seconds"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    seconds = 0.0
+    matched = False
+    for amount, unit in _DURATION_PART.findall(value):
+        matched = True
+        amount = float(amount)
+        if unit == "h":
+            seconds += amount * 3600
+        elif unit == "m":
+            seconds += amount * 60
+        elif unit == "s":
+            seconds += amount
+        else:
+            seconds += amount / 1000
+    return seconds if matched else None
+
+
+def retry_after_from_headers(headers):
+    """Extract the server-requested wait (in seconds) from response headers"""
+    if not headers:
+        return None
+    for name in ("retry-after-ms", "retry-after"):
+        value = headers.get(name)
+        if value is None:
+            continue
+        seconds = parse_duration(value)
+        if seconds is None:
+            continue
+        return seconds / 1000 if name == "retry-after-ms" else seconds
+    return None
+
+
+class RateLimiter:
+    """Token-bucket limiter shared by all requests for one model.
+
+    Tracks requests-per-minute and characters-per-minute. The configured limits
+    are a starting point: rate-limit headers replace them with the account's
+    real limits, 429 responses halve the effective rate and pause all callers
+    for the Retry-After period, and successful requests restore it gradually.
+    A limit of 0 means unlimited.
+    """
+
+    def __init__(self, requests_per_minute, characters_per_minute):
+        self.lock = threading.Lock()
+        self.requests_per_minute = max(0, int(requests_per_minute))
+        self.characters_per_minute = max(0, int(characters_per_minute))
+        self.factor = 1.0
+        self.paused_until = 0.0
+        self.request_tokens = self._request_capacity()
+        self.character_tokens = self._character_capacity()
+        self.last_refill = time.monotonic()
+        self.history = deque()  # (timestamp, characters) of recent requests
+
+    def _request_capacity(self):
+        if not self.requests_per_minute:
+            return float("inf")
+        return max(1.0, self.requests_per_minute * self.factor * BURST_SECONDS / 60)
+
+    def _character_capacity(self):
+        if not self.characters_per_minute:
+            return float("inf")
+        return max(
+            float(MAX_REQUEST_CHARACTERS),
+            self.characters_per_minute * self.factor * BURST_SECONDS / 60
+        )
+
+    def _refill(self, now):
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        if self.requests_per_minute:
+            self.request_tokens = min(
+                self._request_capacity(),
+                self.request_tokens + elapsed * self.requests_per_minute * self.factor / 60
+            )
+        if self.characters_per_minute:
+            self.character_tokens = min(
+                self._character_capacity(),
+                self.character_tokens + elapsed * self.characters_per_minute * self.factor / 60
+            )
+
+    def acquire(self, characters, should_abort=None):
+        """Block until a request of `characters` may be sent.
+
+        Returns False if `should_abort` reported an abort while waiting.
+        """
+        while True:
+            if should_abort is not None and should_abort():
+                return False
+
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                needed = min(float(characters), self._character_capacity())
+
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.request_tokens >= 1 and self.character_tokens >= needed:
+                    self.request_tokens -= 1
+                    self.character_tokens -= needed
+                    self.history.append((now, characters))
+                    return True
+                else:
+                    delay = 0.0
+                    if self.request_tokens < 1:
+                        delay = (1 - self.request_tokens) * 60 / (self.requests_per_minute * self.factor)
+                    if self.character_tokens < needed:
+                        delay = max(
+                            delay,
+                            (needed - self.character_tokens) * 60 / (self.characters_per_minute * self.factor)
+                        )
+
+            time.sleep(min(max(delay, 0.001), MAX_WAIT_STEP))
+
+    def update_from_headers(self, headers):
+        """Adopt the limits and remaining budget reported by the server"""
+        if not headers:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            limit = headers.get("x-ratelimit-limit-requests")
+            if limit and str(limit).isdigit() and int(limit) > 0:
+                self.requests_per_minute = int(limit)
+
+            remaining = headers.get("x-ratelimit-remaining-requests")
+            if remaining is not None and str(remaining).isdigit() and self.requests_per_minute:
+                self.request_tokens = min(self.request_tokens, float(remaining))
+                if int(remaining) == 0:
+                    reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+                    if reset:
+                        self.paused_until = max(self.paused_until, now + reset)
+
+            remaining = headers.get("x-ratelimit-remaining-tokens")
+            if remaining is not None and str(remaining).isdigit() and int(remaining) == 0:
+                reset = parse_duration(headers.get("x-ratelimit-reset-tokens"))
+                if reset:
+                    self.paused_until = max(self.paused_until, now + reset)
+
+    def record_success(self):
+        """Gradually restore the rate after throttling"""
+        with self.lock:
+            self.factor = min(1.0, self.factor + RATE_RECOVERY_STEP)
+
+    def backoff(self, retry_after=None):
+        """Slow down after a 429: halve the rate and pause for Retry-After"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.factor = max(MIN_RATE_FACTOR, self.factor / 2)
+            if self.requests_per_minute:
+                self.request_tokens = min(self.request_tokens, 0.0)
+            delay = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+            self.paused_until = max(self.paused_until, now + delay)
+
+    def snapshot(self):
+        """Return the observed and effective rates over the last minute"""
+        with self.lock:
+            now = time.monotonic()
+            while self.history and now - self.history[0][0] > 60:
+                self.history.popleft()
+            elapsed = min(60.0, max(1.0, now - self.history[0][0])) if self.history else 60.0
+            requests = len(self.history)
+            characters = sum(count for _, count in self.history)
+            return {
+                'requests_per_minute': requests * 60 / elapsed,
+                'characters_per_minute': characters * 60 / elapsed,
+                'request_limit': self.requests_per_minute * self.factor,
+                'character_limit': self.characters_per_minute * self.factor,
+                'throttled': now < self.paused_until or self.factor < 1.0
+            }
@@ -0,0 +1,99 @@
+# This Python file uses the following encoding: utf-8
+import os
+import sys
+import hashlib
+
+# Bits of a packed registry entry that hold the row number
+ROW_BITS = 40
+
+
+def row_digest(text, voice, model, instructions):
+    """128-bit fingerprint of the audio a row produces (text, voice, model, instructions)"""
+    h = hashlib.blake2b(digest_size=16)
+    for part in (text, voice, model, instructions):
+        h.update(part.encode('utf-8'))
+        h.update(b"\x00")
+    return h.digest()
+
+
+class OutputFile:
+    """Where a file's rows are written; the strings are interned and shared by all rows"""
+    __slots__ = ('output_dir', 'base_name', 'output_format')
+
+    def __init__(self, output_dir, base_name, output_format):
+        self.output_dir = sys.intern(output_dir)
+        self.base_name = sys.intern(base_name)
+        self.output_format = sys.intern(output_format)
+
+    def path(self, row):
+        """Output path of a 0-based data row"""
+        return os.path.join(self.output_dir, f"{self.base_name}_{row + 1}.{self.output_format}")
+
+
+class RowRegistry:
+    """Compact index of the rows written in a run, used to reuse identical rows.
+
+    Each row is stored as its 16-byte fingerprint mapped to one integer
+    packing (file id, row number); text and output paths are never kept,
+    and paths are derived from the file's OutputFile when needed.
+    """
+    __slots__ = ('files', 'rows')
+
+    def __init__(self):
+        self.files = []  # file id -> OutputFile
+        self.rows = {}  # fingerprint -> file id << ROW_BITS | row
+
+    def add_file(self, output_dir, base_name, output_format):
+        """Register a file; returns its id"""
+        self.files.append(OutputFile(output_dir, base_name, output_format))
+        return len(self.files) - 1
+
+    def output_path(self, file_id, row):
+        return self.files[file_id].path(row)
+
+    def add(self, digest, file_id, row):
+        """Record the row that holds a fingerprint's audio (the first one is kept)"""
+        self.rows.setdefault(digest, file_id << ROW_BITS | row)
+
+    def get(self, digest):
+        """Output path of the row holding a fingerprint's audio, or None"""
+        entry = self.rows.get(digest)
+        if entry is None:
+            return None
+        return self.output_path(entry >> ROW_BITS, entry & ((1 << ROW_BITS) - 1))
+
+    def __contains__(self, digest):
+        return digest in self.rows
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class PreviousOutputs:
+    """Fingerprints of the outputs an earlier run wrote, looked up in row order.
+
+    Wraps an iterator of (row, fingerprint) sorted by row and reads it only
+    as far as the rows asked for, so no per-row map is held in memory. Rows
+    must be asked for in increasing order.
+    """
+    __slots__ = ('entries', 'row', 'fingerprint')
+
+    def __init__(self, entries):
+        self.entries = iter(entries)
+        self.row = None
+        self.fingerprint = None
+        self._next()
+
+    def _next(self):
+        self.row, self.fingerprint = next(self.entries, (None, None))
+
+    def get(self, row):
+        """Fingerprint recorded for a row, or None"""
+        while self.row is not None and self.row < row:
+            self._next()
+        return self.fingerprint if self.row == row else None
+
+    def close(self):
+        close = getattr(self.entries, 'close', None)
+        if close is not None:
+            close()
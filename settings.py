@@ -3,19 +3,17 @@ import os
 import json
 from pathlib import Path
 
-# Import resources
-import resources_rc
-
-from PySide6.QtWidgets import QDialog, QMessageBox, QDialogButtonBox
-from PySide6.QtCore import QSettings, QStandardPaths
-
-from ui_settings_dialog import Ui_SettingsDialog
+from PySide6.QtCore import QCoreApplication, QSettings, QStandardPaths
 
 class Settings:
+    # Shared by the GUI and the command-line runner so both use the same data directory
+    ORGANIZATION_NAME = "CSVtoTTS"
+    APPLICATION_NAME = "CSVtoTTS"
+    
     # Available voices and models
     VOICES = ['alloy', 'echo', 'fable', 'onyx', 'nova', 'shimmer', 'coral', 'ash', 'ballad', 'sage']
     MODELS = ['tts-1', 'tts-1-hd', 'gpt-4o-mini-tts']
-    OUTPUT_FORMATS = ['mp3', 'opus', 'aac', 'flac']
+    OUTPUT_FORMATS = ['mp3', 'opus', 'aac', 'flac', 'wav']
     
     # Default settings
     DEFAULT_ENDPOINT = "https://api.openai.com/v1/audio/speech"
@@ -23,21 +21,52 @@ class Settings:
     DEFAULT_VOICE = "nova"
     DEFAULT_MODEL = "tts-1-hd"
     DEFAULT_FORMAT = "mp3"
+    DEFAULT_CONCURRENCY = 4  # requests in flight
+    DEFAULT_CACHE_ENABLED = True
+    DEFAULT_CACHE_SIZE_MB = 2048
+    DEFAULT_PACK_SHORT_ROWS = False
+    DEFAULT_PREVIEW_CACHE_MB = 100
+    DEFAULT_METRICS_ENABLED = False
+    DEFAULT_EXPORT_MODE = "copy"
+    # Starting rate limits per model (requests/min, characters/min); 0 = unlimited.
+    # The worker adapts these to the rate-limit headers returned by the API.
+    DEFAULT_RATE_LIMITS = {
+        'tts-1': {'rpm': 500, 'cpm': 1000000},
+        'tts-1-hd': {'rpm': 500, 'cpm': 1000000},
+        'gpt-4o-mini-tts': {'rpm': 500, 'cpm': 1000000},
+    }
     
     def __init__(self):
         # Initialize settings storage
-        self.settings = QSettings("CSVtoTTS", "CSVtoTTS")
+        self.settings = QSettings(self.ORGANIZATION_NAME, self.APPLICATION_NAME)
         
         # Load settings or use defaults
         self.load()
         
         # Create app data directory if it doesn't exist
+        QCoreApplication.setOrganizationName(self.ORGANIZATION_NAME)
+        QCoreApplication.setApplicationName(self.APPLICATION_NAME)
         self.app_data_dir = Path(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation))
         self.app_data_dir.mkdir(parents=True, exist_ok=True)
         
         # Create temp directory for previews
         self.temp_dir = self.app_data_dir / "temp"
         self.temp_dir.mkdir(exist_ok=True)
+        
+        # Finished previews, reused for identical requests
+        self.preview_dir = self.temp_dir / "previews"
+        
+        # Generated audio cache
+        self.cache_dir = self.app_data_dir / "cache"
+        
+        # Sidecar row indexes for CSV files
+        self.index_dir = self.app_data_dir / "index"
+        
+        # Manifests of the rows written by recent runs, read by Export
+        self.manifest_dir = self.app_data_dir / "manifests"
+        
+        # Request metrics (JSONL log and Prometheus textfile)
+        self.metrics_dir = self.app_data_dir / "metrics"
     
     def load(self):
         """Load settings from storage"""
@@ -47,6 +76,21 @@ class Settings:
         self.default_voice = self.settings.value("default_voice", self.DEFAULT_VOICE)
         self.default_model = self.settings.value("default_model", self.DEFAULT_MODEL)
         self.output_format = self.settings.value("output_format", self.DEFAULT_FORMAT)
+        self.concurrency = int(self.settings.value("concurrency", self.DEFAULT_CONCURRENCY))
+        self.cache_enabled = self.settings.value("cache_enabled", self.DEFAULT_CACHE_ENABLED, type=bool)
+        self.cache_size_mb = int(self.settings.value("cache_size_mb", self.DEFAULT_CACHE_SIZE_MB))
+        self.pack_short_rows = self.settings.value("pack_short_rows", self.DEFAULT_PACK_SHORT_ROWS, type=bool)
+        self.preview_cache_mb = int(self.settings.value("preview_cache_mb", self.DEFAULT_PREVIEW_CACHE_MB))
+        self.metrics_enabled = self.settings.value("metrics_enabled", self.DEFAULT_METRICS_ENABLED, type=bool)
+        # This machine's share of each batch (shard_index of shard_count, 1-based)
+        self.shard_index = int(self.settings.value("shard_index", 1))
+        self.shard_count = int(self.settings.value("shard_count", 1))
+        # Last export method chosen in Export All
+        self.export_mode = self.settings.value("export_mode", self.DEFAULT_EXPORT_MODE)
+        try:
+            self.rate_limits = json.loads(self.settings.value("rate_limits", "{}"))
+        except (TypeError, ValueError):
+            self.rate_limits = {}
     
     def save(self):
         """Save settings to storage"""
@@ -56,85 +100,23 @@ class Settings:
         self.settings.setValue("default_voice", self.default_voice)
         self.settings.setValue("default_model", self.default_model)
         self.settings.setValue("output_format", self.output_format)
+        self.settings.setValue("concurrency", self.concurrency)
+        self.settings.setValue("cache_enabled", self.cache_enabled)
+        self.settings.setValue("cache_size_mb", self.cache_size_mb)
+        self.settings.setValue("pack_short_rows", self.pack_short_rows)
+        self.settings.setValue("preview_cache_mb", self.preview_cache_mb)
+        self.settings.setValue("metrics_enabled", self.metrics_enabled)
+        self.settings.setValue("shard_index", self.shard_index)
+        self.settings.setValue("shard_count", self.shard_count)
+        self.settings.setValue("export_mode", self.export_mode)
+        self.settings.setValue("rate_limits", json.dumps(self.rate_limits))
         self.settings.sync()
-
-class SettingsDialog(QDialog):
-    def __init__(self, settings, parent=None):
-        super().__init__(parent)
-        self.ui = Ui_SettingsDialog()
-        self.ui.setupUi(self)
-        
-        self.settings = settings
-        
-        # Initialize UI with current settings
-        self.initialize_ui()
-        
-        # Connect signals
-        self.ui.buttonBox.accepted.connect(self.accept)
-        self.ui.buttonBox.rejected.connect(self.reject)
-        self.ui.buttonBox.button(QDialogButtonBox.StandardButton.RestoreDefaults).clicked.connect(self.restore_defaults)
-        self.ui.refreshModelsButton.clicked.connect(self.refresh_models)
-    
-    def initialize_ui(self):
-        """Initialize UI with current settings"""
-        # API settings
-        self.ui.apiKeyInput.setText(self.settings.api_key)
-        self.ui.endpointInput.setText(self.settings.endpoint)
-        self.ui.timeoutInput.setValue(self.settings.timeout)
-        
-        # TTS settings
-        self.ui.defaultVoiceCombo.addItems(Settings.VOICES)
-        voice_index = self.ui.defaultVoiceCombo.findText(self.settings.default_voice)
-        self.ui.defaultVoiceCombo.setCurrentIndex(max(0, voice_index))
-        
-        self.ui.modelComboBox.addItems(Settings.MODELS)
-        model_index = self.ui.modelComboBox.findText(self.settings.default_model)
-        self.ui.modelComboBox.setCurrentIndex(max(0, model_index))
-        
-        self.ui.formatCombo.addItems(Settings.OUTPUT_FORMATS)
-        format_index = self.ui.formatCombo.findText(self.settings.output_format)
-        self.ui.formatCombo.setCurrentIndex(max(0, format_index))
-    
-    def accept(self):
-        """Save settings and close dialog"""
-        # Validate API key
-        api_key = self.ui.apiKeyInput.text().strip()
-        if not api_key:
-            QMessageBox.warning(self, "API Key Required", "Please enter your OpenAI API key.")
-            return
-        
-        # Save settings
-        self.settings.api_key = api_key
-        self.settings.endpoint = self.ui.endpointInput.text().strip()
-        self.settings.timeout = self.ui.timeoutInput.value()
-        self.settings.default_voice = self.ui.defaultVoiceCombo.currentText()
-        self.settings.default_model = self.ui.modelComboBox.currentText()
-        self.settings.output_format = self.ui.formatCombo.currentText()
-        
-        self.settings.save()
-        
-        super().accept()
-    
-    def restore_defaults(self):
-        """Restore default settings"""
-        self.ui.endpointInput.setText(Settings.DEFAULT_ENDPOINT)
-        self.ui.timeoutInput.setValue(Settings.DEFAULT_TIMEOUT)
-        
-        voice_index = self.ui.defaultVoiceCombo.findText(Settings.DEFAULT_VOICE)
-        self.ui.defaultVoiceCombo.setCurrentIndex(max(0, voice_index))
-        
-        model_index = self.ui.modelComboBox.findText(Settings.DEFAULT_MODEL)
-        self.ui.modelComboBox.setCurrentIndex(max(0, model_index))
-        
-        format_index = self.ui.formatCombo.findText(Settings.DEFAULT_FORMAT)
-        self.ui.formatCombo.setCurrentIndex(max(0, format_index))
     
-    def refresh_models(self):
-        """Refresh available models from OpenAI API"""
-        # In a real implementation, this would query the OpenAI API
-        # for available models. For now, we'll just show a message.
-        QMessageBox.information(
-            self,
-            "Models Refreshed",
-            "Using built-in model list. In a production app, this would query the OpenAI API."
-        )
\ No newline at end of file
+    def rate_limit(self, model):
+        """Get the configured (requests/min, characters/min) limits for a model"""
+        default = self.DEFAULT_RATE_LIMITS.get(model, {'rpm': 0, 'cpm': 0})
+        limits = self.rate_limits.get(model, {})
+        return (
+            int(limits.get('rpm', default['rpm'])),
+            int(limits.get('cpm', default['cpm']))
+        )
@@ -0,0 +1,172 @@
+# This Python file uses the following encoding: utf-8
+# Import resources
+import resources_rc
+
+from PySide6.QtWidgets import (
+    QDialog, QMessageBox, QDialogButtonBox, QWidget, QFormLayout,
+    QHBoxLayout, QSpinBox, QLabel
+)
+
+from ui_settings_dialog import Ui_SettingsDialog
+from settings import Settings
+
+class SettingsDialog(QDialog):
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.ui = Ui_SettingsDialog()
+        self.ui.setupUi(self)
+        
+        self.settings = settings
+        
+        # Per-model rate limit inputs, built from the model list
+        self.rate_limit_inputs = {}
+        self.setup_rate_limits_tab()
+        
+        # Initialize UI with current settings
+        self.initialize_ui()
+        
+        # Connect signals
+        self.ui.buttonBox.accepted.connect(self.accept)
+        self.ui.buttonBox.rejected.connect(self.reject)
+        self.ui.buttonBox.button(QDialogButtonBox.StandardButton.RestoreDefaults).clicked.connect(self.restore_defaults)
+        self.ui.refreshModelsButton.clicked.connect(self.refresh_models)
+    
+    def initialize_ui(self):
+        """Initialize UI with current settings"""
+        # API settings
+        self.ui.apiKeyInput.setText(self.settings.api_key)
+        self.ui.endpointInput.setText(self.settings.endpoint)
+        self.ui.timeoutInput.setValue(self.settings.timeout)
+        self.ui.concurrencyInput.setValue(self.settings.concurrency)
+        self.ui.shardIndexInput.setValue(self.settings.shard_index)
+        self.ui.shardCountInput.setValue(self.settings.shard_count)
+        
+        # TTS settings
+        self.ui.defaultVoiceCombo.addItems(Settings.VOICES)
+        voice_index = self.ui.defaultVoiceCombo.findText(self.settings.default_voice)
+        self.ui.defaultVoiceCombo.setCurrentIndex(max(0, voice_index))
+        
+        self.ui.modelComboBox.addItems(Settings.MODELS)
+        model_index = self.ui.modelComboBox.findText(self.settings.default_model)
+        self.ui.modelComboBox.setCurrentIndex(max(0, model_index))
+        
+        self.ui.formatCombo.addItems(Settings.OUTPUT_FORMATS)
+        format_index = self.ui.formatCombo.findText(self.settings.output_format)
+        self.ui.formatCombo.setCurrentIndex(max(0, format_index))
+        
+        # Cache settings
+        self.ui.cacheEnabledCheck.setChecked(self.settings.cache_enabled)
+        self.ui.cacheSizeInput.setValue(self.settings.cache_size_mb)
+        self.ui.previewCacheSizeInput.setValue(self.settings.preview_cache_mb)
+        self.ui.metricsEnabledCheck.setChecked(self.settings.metrics_enabled)
+        self.ui.packShortRowsCheck.setChecked(self.settings.pack_short_rows)
+        
+        # Rate limits
+        for model, (rpm_input, cpm_input) in self.rate_limit_inputs.items():
+            rpm, cpm = self.settings.rate_limit(model)
+            rpm_input.setValue(rpm)
+            cpm_input.setValue(cpm)
+    
+    def setup_rate_limits_tab(self):
+        """Add a tab with requests/min and characters/min limits for each model"""
+        tab = QWidget()
+        layout = QFormLayout(tab)
+        
+        hint = QLabel("Starting limits per model (0 = unlimited). They adapt to the API's rate-limit headers while processing.")
+        hint.setWordWrap(True)
+        hint.setStyleSheet("font-size: 11px; color: #666; padding: 5px;")
+        layout.addRow(hint)
+        
+        for model in Settings.MODELS:
+            rpm_input = QSpinBox(tab)
+            rpm_input.setRange(0, 100000)
+            rpm_input.setSuffix(" req/min")
+            
+            cpm_input = QSpinBox(tab)
+            cpm_input.setRange(0, 100000000)
+            cpm_input.setSingleStep(1000)
+            cpm_input.setSuffix(" chars/min")
+            
+            row = QHBoxLayout()
+            row.addWidget(rpm_input)
+            row.addWidget(cpm_input)
+            layout.addRow(f"{model}:", row)
+            
+            self.rate_limit_inputs[model] = (rpm_input, cpm_input)
+        
+        self.ui.tabWidget.addTab(tab, "Rate Limits")
+    
+    def accept(self):
+        """Save settings and close dialog"""
+        # Validate API key
+        api_key = self.ui.apiKeyInput.text().strip()
+        if not api_key:
+            QMessageBox.warning(self, "API Key Required", "Please enter your OpenAI API key.")
+            return
+        
+        # Validate the shard
+        if self.ui.shardIndexInput.value() > self.ui.shardCountInput.value():
+            QMessageBox.warning(self, "Invalid Shard", "The batch shard number cannot be larger than the number of shards.")
+            return
+        
+        # Save settings
+        self.settings.api_key = api_key
+        self.settings.endpoint = self.ui.endpointInput.text().strip()
+        self.settings.timeout = self.ui.timeoutInput.value()
+        self.settings.concurrency = self.ui.concurrencyInput.value()
+        self.settings.shard_index = self.ui.shardIndexInput.value()
+        self.settings.shard_count = self.ui.shardCountInput.value()
+        self.settings.default_voice = self.ui.defaultVoiceCombo.currentText()
+        self.settings.default_model = self.ui.modelComboBox.currentText()
+        self.settings.output_format = self.ui.formatCombo.currentText()
+        self.settings.cache_enabled = self.ui.cacheEnabledCheck.isChecked()
+        self.settings.cache_size_mb = self.ui.cacheSizeInput.value()
+        self.settings.preview_cache_mb = self.ui.previewCacheSizeInput.value()
+        self.settings.metrics_enabled = self.ui.metricsEnabledCheck.isChecked()
+        self.settings.pack_short_rows = self.ui.packShortRowsCheck.isChecked()
+        self.settings.rate_limits = {
+            model: {'rpm': rpm_input.value(), 'cpm': cpm_input.value()}
+            for model, (rpm_input, cpm_input) in self.rate_limit_inputs.items()
+        }
+        
+        self.settings.save()
+        
+        super().accept()
+    
+    def restore_defaults(self):
+        """Restore default settings"""
+        self.ui.endpointInput.setText(Settings.DEFAULT_ENDPOINT)
+        self.ui.timeoutInput.setValue(Settings.DEFAULT_TIMEOUT)
+        self.ui.concurrencyInput.setValue(Settings.DEFAULT_CONCURRENCY)
+        self.ui.shardIndexInput.setValue(1)
+        self.ui.shardCountInput.setValue(1)
+        
+        voice_index = self.ui.defaultVoiceCombo.findText(Settings.DEFAULT_VOICE)
+        self.ui.defaultVoiceCombo.setCurrentIndex(max(0, voice_index))
+        
+        model_index = self.ui.modelComboBox.findText(Settings.DEFAULT_MODEL)
+        self.ui.modelComboBox.setCurrentIndex(max(0, model_index))
+        
+        format_index = self.ui.formatCombo.findText(Settings.DEFAULT_FORMAT)
+        self.ui.formatCombo.setCurrentIndex(max(0, format_index))
+        
+        self.ui.cacheEnabledCheck.setChecked(Settings.DEFAULT_CACHE_ENABLED)
+        self.ui.cacheSizeInput.setValue(Settings.DEFAULT_CACHE_SIZE_MB)
+        self.ui.previewCacheSizeInput.setValue(Settings.DEFAULT_PREVIEW_CACHE_MB)
+        self.ui.metricsEnabledCheck.setChecked(Settings.DEFAULT_METRICS_ENABLED)
+        self.ui.packShortRowsCheck.setChecked(Settings.DEFAULT_PACK_SHORT_ROWS)
+        
+        for model, (rpm_input, cpm_input) in self.rate_limit_inputs.items():
+            default = Settings.DEFAULT_RATE_LIMITS.get(model, {'rpm': 0, 'cpm': 0})
+            rpm_input.setValue(default['rpm'])
+            cpm_input.setValue(default['cpm'])
+    
+    def refresh_models(self):
+        """Refresh available models from OpenAI API"""
+        # In a real implementation, this would query the OpenAI API
+        # for available models. For now, we'll just show a message.
+        QMessageBox.information(
+            self,
+            "Models Refreshed",
+            "Using built-in model list. In a production app, this would query the OpenAI API."
+        )
\ No newline at end of file
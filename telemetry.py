@@ -0,0 +1,196 @@
+# This Python file uses the following encoding: utf-8
+import os
+import json
+import time
+import bisect
+import threading
+
+# Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = tuple(1024 * 4 ** k for k in range(10))  # 1 KiB .. 256 MiB
+CHARACTERS_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096)
+
+# The Prometheus textfile is rewritten at most this often during a run (seconds)
+PROMETHEUS_INTERVAL = 10
+# Buffered JSONL lines are flushed at most this often (seconds)
+JSONL_FLUSH_INTERVAL = 1
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, fraction):
+        """Estimate a percentile by interpolating within its bucket"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for k, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[k - 1] if k > 0 else 0.0
+                if k == len(self.bounds):
+                    return lower  # beyond the last bound
+                return lower + (self.bounds[k] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.percentile(0.50),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99)
+        }
+
+    def prometheus_lines(self, name):
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds + ("+Inf",), self.counts):
+            cumulative += bucket_count
+            le = bound if isinstance(bound, str) else f"{bound:g}"
+            lines.append(f'{name}_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum {self.sum:g}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class Telemetry:
+    """Per-request measurements for a batch run.
+
+    Each finished request is recorded with its queue wait (rate limiter and
+    request slot, including earlier attempts), time to first byte, total
+    latency, bytes received, characters sent, retries and HTTP status.
+    Measurements are aggregated into histograms and, when paths are given,
+    appended to a JSONL file and periodically written as a Prometheus
+    textfile (for node_exporter's textfile collector).
+    """
+
+    def __init__(self, jsonl_path=None, prometheus_path=None):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.lock = threading.Lock()
+        self.jsonl_file = None
+        self.last_flush = 0.0
+        self.last_prometheus = 0.0
+        self.reset()
+
+    def reset(self):
+        """Start a new run"""
+        with self.lock:
+            self.queue_wait = Histogram(SECONDS_BUCKETS)
+            self.ttfb = Histogram(SECONDS_BUCKETS)
+            self.latency = Histogram(SECONDS_BUCKETS)
+            self.bytes = Histogram(BYTES_BUCKETS)
+            self.characters = Histogram(CHARACTERS_BUCKETS)
+            self.statuses = {}
+            self.retries = 0
+            self.models = {}  # model -> [successful requests, characters]
+            self.started = time.time()
+
+    def open(self):
+        """Open the sinks (creating their directories)"""
+        if self.jsonl_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.jsonl_path)), exist_ok=True)
+            self.jsonl_file = open(self.jsonl_path, 'a', encoding='utf-8')
+
+    def record(self, model, characters, queue_wait, ttfb, latency, size, retries, status):
+        """Record one request; timings in seconds, `ttfb`/`latency` None if it failed"""
+        now = time.time()
+        with self.lock:
+            self.queue_wait.observe(queue_wait)
+            if ttfb is not None:
+                self.ttfb.observe(ttfb)
+            if latency is not None:
+                self.latency.observe(latency)
+                self.bytes.observe(size)
+                totals = self.models.setdefault(model, [0, 0])
+                totals[0] += 1
+                totals[1] += characters
+            self.characters.observe(characters)
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            self.retries += retries
+
+            if self.jsonl_file is not None:
+                self.jsonl_file.write(json.dumps({
+                    'time': round(now, 3),
+                    'model': model,
+                    'characters': characters,
+                    'queue_wait': round(queue_wait, 4),
+                    'ttfb': None if ttfb is None else round(ttfb, 4),
+                    'latency': None if latency is None else round(latency, 4),
+                    'bytes': size,
+                    'retries': retries,
+                    'status': status
+                }) + "\n")
+                if now - self.last_flush >= JSONL_FLUSH_INTERVAL:
+                    self.jsonl_file.flush()
+                    self.last_flush = now
+
+            if self.prometheus_path and now - self.last_prometheus >= PROMETHEUS_INTERVAL:
+                self.last_prometheus = now
+                self._write_prometheus()
+
+    def summary(self):
+        """Aggregated measurements for display"""
+        with self.lock:
+            return {
+                'requests': sum(self.statuses.values()),
+                'statuses': dict(self.statuses),
+                'retries': self.retries,
+                'characters': int(self.characters.sum),
+                'bytes': int(self.bytes.sum),
+                'seconds': time.time() - self.started,
+                'models': {model: {'requests': totals[0], 'characters': totals[1]}
+                           for model, totals in self.models.items()},
+                'queue_wait': self.queue_wait.summary(),
+                'ttfb': self.ttfb.summary(),
+                'latency': self.latency.summary()
+            }
+
+    def _write_prometheus(self):
+        lines = []
+        for name, help_text, histogram in (
+            ("csvtts_request_queue_wait_seconds", "Time from row dispatch to the request being sent", self.queue_wait),
+            ("csvtts_request_ttfb_seconds", "Time from sending a request to its response headers", self.ttfb),
+            ("csvtts_request_latency_seconds", "Time from sending a request to the audio being written", self.latency),
+            ("csvtts_response_bytes", "Audio bytes received per request", self.bytes),
+            ("csvtts_request_characters", "Characters sent per request", self.characters),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            lines.extend(histogram.prometheus_lines(name))
+        lines.append("# HELP csvtts_requests_total Requests by final HTTP status")
+        lines.append("# TYPE csvtts_requests_total counter")
+        for status, count in sorted(self.statuses.items()):
+            lines.append(f'csvtts_requests_total{{status="{status}"}} {count}')
+        lines.append("# HELP csvtts_request_retries_total Retried attempts")
+        lines.append("# TYPE csvtts_request_retries_total counter")
+        lines.append(f"csvtts_request_retries_total {self.retries}")
+
+        # Replace the file atomically so collectors never read a partial file
+        os.makedirs(os.path.dirname(os.path.abspath(self.prometheus_path)), exist_ok=True)
+        tmp_path = f"{self.prometheus_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prometheus_path)
+
+    def close(self):
+        """Flush and close the sinks"""
+        with self.lock:
+            if self.jsonl_file is not None:
+                self.jsonl_file.close()
+                self.jsonl_file = None
+            if self.prometheus_path:
+                self._write_prometheus()
@@ -0,0 +1,52 @@
+# This Python file uses the following encoding: utf-8
+import os
+import sys
+import csv
+import io
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_index import CSVIndex, scan_row_offsets
+
+SAMPLES = {
+    'lf': b"id,text\n1,hello\n2,world\n",
+    'crlf': b"id,text\r\n1,hello\r\n2,world",
+    'cr': b"text\rhello\rworld\r",
+    'mixed': b"id,text\r\n1,hello\r2,world\n3,again\r\n",
+    'stray quote': b'id,text\n1,5" screen\n2,plain\n3,last\n',
+    'stray quote mid field': b'id,text\n1,a"b\n2,"c"\n',
+    'quoted newlines': b'id,text\n1,"two\nlines"\r\n2,"cr\rinside"\r3,"crlf\r\ninside"\n',
+    'escaped quotes': b'id,text\n1,"say ""hi""\nthere"\n2,"""quoted"""\n',
+    'quoted then text': b'id,text\n1,"a"b\n2,c\n',
+    'blank lines': b"id,text\n1,\n\n2,hello\n",
+    'no trailing newline': b"id,text\n1,end",
+}
+
+
+def csv_records(data):
+    return list(csv.reader(io.StringIO(data.decode('utf-8'), newline='')))
+
+
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_offsets_match_csv_reader(tmp_path, name):
+    data = SAMPLES[name]
+    path = tmp_path / "sample.csv"
+    path.write_bytes(data)
+
+    offsets = list(scan_row_offsets(str(path)))
+    expected = csv_records(data)
+    assert len(offsets) == len(expected)
+    assert CSVIndex.build(str(path)).row_count == len(expected) - 1
+
+    # Every record parsed on its own from its offsets is the same record
+    bounds = offsets + [len(data)]
+    for n, record in enumerate(expected):
+        assert csv_records(data[bounds[n]:bounds[n + 1]]) == [record]
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_bytes(b"")
+    assert len(scan_row_offsets(str(path))) == 0
@@ -0,0 +1,46 @@
+# This Python file uses the following encoding: utf-8
+import os
+import sys
+import csv
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv_stream
+from csv_stream import iter_column_texts
+
+SAMPLES = {
+    'lf': b"id,text\n1,hello\n2,world\n",
+    'crlf': b"id,text\r\n1,hello\r\n2,world\r\n",
+    'cr': b"id,text\r1,hello\r2,world\r",
+    'mixed': b"id,text\r\n1,hello\r2,world\n3,again",
+    'quoted newlines': b'id,text\r1,"two\rlines"\r\n2,"more\nlines"\n3,"crlf\r\ninside"\r',
+    'blank cells': b"id,text\n1,\n2,hello\n\n3,  \n4,world\n",
+    'utf-8': "id,text\r1,café\r2,日本\r".encode('utf-8'),
+}
+
+
+def expected_texts(path, column_index):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))[1:]
+    return [row[column_index].strip() for row in rows if column_index < len(row) and row[column_index].strip()]
+
+
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+@pytest.mark.parametrize('chunk_bytes', [1, 2, 3, 1 << 16])
+def test_matches_csv_reader(tmp_path, monkeypatch, name, chunk_bytes):
+    monkeypatch.setattr(csv_stream, '_CHUNK_BYTES', chunk_bytes)
+    path = tmp_path / "sample.csv"
+    path.write_bytes(SAMPLES[name])
+    rows = list(iter_column_texts(str(path), 1))
+    assert [text for text, _, _ in rows] == expected_texts(path, 1)
+
+    # Spans are contiguous and end at the end of the last yielded row
+    for (_, _, end), (_, start, _) in zip(rows, rows[1:]):
+        assert end == start
+    if rows:
+        header_end = SAMPLES[name].index(b"text") + len(b"text")
+        header_end += 2 if SAMPLES[name][header_end:header_end + 2] == b"\r\n" else 1
+        assert rows[0][1] == header_end
+        assert rows[-1][2] <= len(SAMPLES[name])
@@ -0,0 +1,46 @@
+# This Python file uses the following encoding: utf-8
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exporter import Exporter, copy_file, move_file, reflink_file
+
+
+def write_outputs(directory, count=3):
+    paths = []
+    for n in range(count):
+        path = directory / f"a_{n + 1}.mp3"
+        path.write_bytes(b"audio %d" % n)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize('mode', ['copy', 'hardlink', 'reflink', 'move'])
+def test_export_into_output_folder_is_refused(tmp_path, mode):
+    outputs = write_outputs(tmp_path)
+    with pytest.raises(ValueError):
+        Exporter(mode).export(outputs, str(tmp_path), len(outputs))
+    for n, path in enumerate(outputs):
+        with open(path, 'rb') as f:
+            assert f.read() == b"audio %d" % n
+
+
+@pytest.mark.parametrize('strategy', [copy_file, move_file, reflink_file])
+def test_strategy_leaves_same_file_alone(tmp_path, strategy):
+    path, = write_outputs(tmp_path, 1)
+    strategy(path, path)
+    with open(path, 'rb') as f:
+        assert f.read() == b"audio 0"
+
+
+@pytest.mark.parametrize('mode', ['copy', 'hardlink', 'reflink'])
+def test_export_to_another_folder(tmp_path, mode):
+    source = tmp_path / "out"
+    source.mkdir()
+    outputs = write_outputs(source)
+    result = Exporter(mode).export(outputs, str(tmp_path / "export"), len(outputs))
+    assert result['exported'] == len(outputs)
+    assert sorted(os.listdir(tmp_path / "export")) == sorted(os.path.basename(path) for path in outputs)
@@ -0,0 +1,61 @@
+# This Python file uses the following encoding: utf-8
+import re
+
+# The speech endpoint rejects inputs longer than this
+MAX_INPUT_CHARACTERS = 4096
+# Rows longer than this are split so their chunks can be synthesized in parallel
+CHUNK_CHARACTERS = 2000
+
+_SENTENCE_END = re.compile(r'(?<=[.!?…。！？])["\'”’)\]]*\s+')
+_CLAUSE_END = re.compile(r'(?<=[,;:–—、，；])\s+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _split_at(text, pattern):
+    """Split after each match of `pattern`, keeping the separators with the left piece"""
+    pieces = []
+    start = 0
+    for match in pattern.finditer(text):
+        pieces.append(text[start:match.end()])
+        start = match.end()
+    pieces.append(text[start:])
+    return [piece for piece in pieces if piece]
+
+
+def _pack(pieces, limit):
+    """Greedily join consecutive pieces into chunks of at most `limit` characters"""
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > limit:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_text(text, limit=CHUNK_CHARACTERS):
+    """Split text into chunks of at most `limit` characters.
+
+    Splits prefer sentence boundaries, then clause boundaries, then
+    whitespace; a single word longer than the limit is cut hard. Text that
+    already fits is returned as a single chunk.
+    """
+    if len(text) <= limit:
+        return [text]
+
+    chunks = []
+    for sentence in _pack(_split_at(text, _SENTENCE_END), limit):
+        if len(sentence) <= limit:
+            chunks.append(sentence)
+            continue
+        for clause in _pack(_split_at(sentence, _CLAUSE_END), limit):
+            if len(clause) <= limit:
+                chunks.append(clause)
+                continue
+            for words in _pack(_split_at(clause, _WHITESPACE), limit):
+                chunks.extend(words[k:k + limit] for k in range(0, len(words), limit))
+
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
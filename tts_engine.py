@@ -0,0 +1,954 @@
+# This Python file uses the following encoding: utf-8
+import os
+import re
+import time
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from rate_limiter import RateLimiter, retry_after_from_headers
+from audio_cache import AudioCache, make_cache_key
+from file_utils import SyncBatcher, link_or_copy, temp_path
+from job_journal import JobJournal, hash_text
+from csv_stream import iter_column_texts
+from csv_index import CSVIndex
+from text_chunker import split_text
+from audio_concat import concatenate_audio
+from audio_split import can_encode, split_on_silence, write_segment
+from telemetry import Telemetry
+from row_registry import RowRegistry, PreviousOutputs, row_digest
+from progress import ProgressTracker, PROGRESS_INTERVAL
+from manifest import ManifestWriter, shard_of, shard_manifest_name, prune_manifests
+
+# The OpenAI SDK is slow to import, so only check that it is installed here
+# and load it when the first client is created
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+
+# Attempts per row for throttled or transient failures
+MAX_RETRIES = 5
+# Suffix of Settings.endpoint that the SDK adds itself
+SPEECH_PATH = "/audio/speech"
+# Idle keep-alive connections are kept this long (seconds)
+KEEPALIVE_EXPIRY = 120
+# Connections opened ahead of time by warm_connections
+MAX_WARM_CONNECTIONS = 8
+# Runs with fewer requests than this are too short to measure throughput
+MIN_THROUGHPUT_REQUESTS = 20
+# Short-row packing: rows up to PACK_ROW_CHARACTERS long are sent together,
+# up to PACK_MAX_ROWS rows or PACK_MAX_CHARACTERS characters per request
+PACK_ROW_CHARACTERS = 40
+PACK_MAX_ROWS = 16
+PACK_MAX_CHARACTERS = 800
+# Packed rows are read as separate sentences so the voice pauses between them
+PACK_SEPARATOR = "\n\n"
+_SENTENCE_ENDINGS = ".!?…。！？"
+# Written rows reach the manifest and the UI in batches of up to this many
+# rows, at least this often (seconds)
+RESULT_BATCH_ROWS = 500
+RESULT_BATCH_SECONDS = 0.5
+# Manifests of unsharded runs kept in the app data folder
+MAX_MANIFESTS = 20
+
+
+def _ignore(*args):
+    pass
+
+
+def load_openai():
+    """Import the OpenAI SDK on first use"""
+    import openai
+    return openai
+
+
+def api_base_url(endpoint):
+    """Derive the SDK base URL from the configured speech endpoint"""
+    endpoint = (endpoint or "").rstrip("/")
+    if endpoint.endswith(SPEECH_PATH):
+        endpoint = endpoint[:-len(SPEECH_PATH)]
+    return endpoint or None
+
+
+def create_http_client(settings):
+    """Create a keep-alive HTTP connection pool sized to the concurrency setting"""
+    import httpx
+    pool_size = max(1, int(settings.concurrency))
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(settings.timeout / 1000)
+    )
+
+
+def create_client(settings, http_client=None):
+    """Create an OpenAI client for the configured endpoint and timeout.
+    
+    Retries are left to the caller (the engine's rate limiter handles them).
+    """
+    if http_client is None:
+        http_client = create_http_client(settings)
+    return load_openai().OpenAI(
+        api_key=settings.api_key,
+        base_url=api_base_url(settings.endpoint),
+        timeout=settings.timeout / 1000,
+        max_retries=0,
+        http_client=http_client
+    )
+
+
+def warm_connections(http_client, base_url, count):
+    """Open up to `count` pooled connections (DNS, TCP and TLS) ahead of the first request"""
+    count = max(1, min(count, MAX_WARM_CONNECTIONS))
+
+    def touch():
+        try:
+            # Any response keeps the connection in the pool; the status does not matter
+            http_client.head(str(base_url))
+        except Exception:
+            pass
+
+    threads = [threading.Thread(target=touch, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def open_audio_cache(settings):
+    """Open the persistent audio cache, or return None if caching is disabled"""
+    if not settings.cache_enabled:
+        return None
+    return AudioCache(settings.cache_dir, settings.cache_size_mb * 1024 * 1024)
+
+
+def open_preview_store(settings):
+    """Open the size-bounded store of finished previews in the temp directory"""
+    return AudioCache(settings.preview_dir, settings.preview_cache_mb * 1024 * 1024)
+
+
+def preview_key(text, voice, model, instructions, output_format):
+    """Name of a preview in the store; the extension lets players recognize the file"""
+    key = make_cache_key(
+        text, voice, model,
+        instructions if model == "gpt-4o-mini-tts" else "",
+        output_format
+    )
+    return f"{key}.{output_format}"
+
+
+def batch_shard(files_to_process):
+    """The (i, N) shard of a batch, or None when it is not split across machines"""
+    for file_info in files_to_process:
+        if file_info.get('shard'):
+            return tuple(file_info['shard'])
+    return None
+
+
+def open_manifest(settings, files_to_process):
+    """Open the manifest of the rows a batch writes.
+    
+    Sharded batches keep it in their output folder for merging; other runs
+    keep it in the app data folder, named after the job.
+    """
+    shard = batch_shard(files_to_process)
+    if shard is not None:
+        return ManifestWriter(
+            os.path.join(files_to_process[0]['output_dir'], shard_manifest_name(shard)),
+            shard=list(shard), output_format=settings.output_format
+        )
+    prune_manifests(settings.manifest_dir, MAX_MANIFESTS - 1)
+    job_id = JobJournal.job_id_for(files_to_process, settings.output_format)
+    return ManifestWriter(
+        os.path.join(settings.manifest_dir, f"{job_id}.jsonl"),
+        output_format=settings.output_format
+    )
+
+
+def open_telemetry(settings):
+    """Create the run's telemetry, writing to the metrics folder when enabled"""
+    if not settings.metrics_enabled:
+        return Telemetry()
+    return Telemetry(
+        os.path.join(settings.metrics_dir, "requests.jsonl"),
+        os.path.join(settings.metrics_dir, "csvtts.prom")
+    )
+
+
+def open_journal(settings):
+    """Open the job journal used to resume interrupted runs"""
+    return JobJournal(settings.app_data_dir / "jobs.sqlite3")
+
+
+class SynthesisEngine:
+    """Batch TTS synthesis without any Qt dependency.
+    
+    Shared by the GUI worker thread and the command-line runner. Progress,
+    errors, rate updates and end-of-run counters are reported through the
+    callbacks, which may be called from pool threads.
+    """
+    
+    def __init__(self, settings, files_to_process, cache=None, journal=None, client=None,
+                 on_progress=None, on_error=None, on_rate=None, on_stats=None, telemetry=None,
+                 on_results=None):
+        self.settings = settings
+        self.files_to_process = files_to_process
+        self.cache = cache
+        self.journal = journal
+        self.client = client
+        # Per-request measurements (aggregated only, unless given one with sinks)
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
+        self.on_progress = on_progress or _ignore  # progress snapshot (see ProgressTracker)
+        self.on_error = on_error or _ignore  # title, message
+        self.on_rate = on_rate or _ignore  # current request/character rate
+        self.on_stats = on_stats or _ignore  # end-of-run counters
+        self.on_results = on_results or _ignore  # batch of written rows (manifest path, outputs)
+        self.abort_event = threading.Event()
+        
+        # Rate limiters shared by all pool threads, one per model
+        self.rate_limiters = {}
+        self.rate_limiters_lock = threading.Lock()
+        self.last_rate_report = 0.0
+        
+        # Counters updated from pool threads
+        self.stats_lock = threading.Lock()
+    
+    def run(self):
+        """Process all files.
+        
+        Returns {'rows': rows written, 'manifest': manifest path}, or None on a
+        fatal error. The written rows are recorded in the manifest as they
+        finish, not kept in memory.
+        """
+        if not OPENAI_AVAILABLE:
+            self.on_error(
+                "OpenAI API Not Available",
+                "The OpenAI package is not installed. Please install it with 'pip install openai'."
+            )
+            return None
+        
+        try:
+            # Use the shared client when given one, so pooled connections are reused
+            owns_client = self.client is None
+            client = create_client(self.settings) if owns_client else self.client
+            
+            # Bounded pool: at most `concurrency` requests are in flight at once
+            self.concurrency = max(1, int(self.settings.concurrency))
+            executor = ThreadPoolExecutor(max_workers=self.concurrency)
+            
+            # Chunks of long rows run on their own pool so a row waiting on its
+            # chunks never starves them; the semaphore keeps the total number of
+            # API requests within `concurrency`
+            self.chunk_executor = ThreadPoolExecutor(max_workers=self.concurrency)
+            self.request_slots = threading.BoundedSemaphore(self.concurrency)
+            
+            if self.cache is not None:
+                self.cache.reset_counters()
+            self.telemetry.reset()
+            self.telemetry.open()
+            
+            # Rows with identical (text, voice, model, instructions) are synthesized
+            # once per run; the other copies are linked to the first output
+            self.written_rows = RowRegistry()
+            self.requests_saved = 0
+            self.rows_resumed = 0
+            
+            # Rows whose audio has not changed since the last run are left
+            # alone; moved rows reuse their old audio and removed rows' outputs
+            # are deleted
+            self.rows_unchanged = 0
+            self.rows_moved = 0
+            self.outputs_removed = 0
+            
+            # Runs of short rows share one request when packing is enabled and
+            # the split audio can be written in the output format
+            self.pack_rows = self.settings.pack_short_rows and can_encode(self.settings.output_format)
+            self.rows_packed = 0
+            self.pack_fallbacks = 0
+            
+            # Written rows are recorded on disk and reported in batches
+            self.shard = batch_shard(self.files_to_process)
+            self.manifest = open_manifest(self.settings, self.files_to_process)
+            self.result_batch = []
+            self.last_result_flush = time.monotonic()
+            
+            # Outputs are renamed into place when complete and fsynced in groups
+            self.outputs = SyncBatcher()
+            
+            # Record progress in the journal so an interrupted job can resume
+            self.job_id = None
+            if self.journal is not None:
+                self.job_id = self.journal.job_id_for(self.files_to_process, self.settings.output_format)
+                self.journal.start_job(self.job_id, self.files_to_process, self.settings.output_format)
+                # Rows are only recorded as done once their files are durable
+                self.journal.before_commit = self.outputs.flush
+            
+            # Progress is coalesced and published at a fixed rate
+            self.progress = ProgressTracker(
+                [self.file_size(file_info['file_path']) for file_info in self.files_to_process],
+                self.on_progress
+            )
+            
+            failed = False
+            total_files = len(self.files_to_process)
+            try:
+                for i, file_info in enumerate(self.files_to_process):
+                    # Check if processing should be aborted
+                    if self.is_aborted():
+                        break
+                    
+                    try:
+                        self.process_file(client, executor, i, total_files, file_info)
+                    except Exception as e:
+                        failed = True
+                        self.on_error(
+                            "Processing Error",
+                            f"Error processing {file_info['file_path']}: {str(e)}"
+                        )
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+                self.chunk_executor.shutdown(wait=True, cancel_futures=True)
+                self.telemetry.close()
+                self.outputs.flush()
+                self.flush_results(force=True)
+                self.manifest.close()
+                if owns_client:
+                    client.close()
+                if self.journal is not None:
+                    if self.is_aborted():
+                        status = 'aborted'
+                    elif failed:
+                        status = 'failed'
+                    else:
+                        status = 'complete'
+                    self.journal.finish_job(self.job_id, status)
+                    self.journal.before_commit = None
+                    self.record_throughput()
+            
+            # Signal completion
+            stats = {
+                'requests_saved': self.requests_saved,
+                'rows_resumed': self.rows_resumed,
+                'rows_unchanged': self.rows_unchanged,
+                'rows_moved': self.rows_moved,
+                'outputs_removed': self.outputs_removed
+            }
+            if self.cache is not None:
+                stats['cache_hits'] = self.cache.hits
+                stats['cache_misses'] = self.cache.misses
+            if self.settings.pack_short_rows:
+                stats['rows_packed'] = self.rows_packed
+                stats['pack_fallbacks'] = self.pack_fallbacks
+                if not self.pack_rows:
+                    stats['packing_unavailable'] = self.settings.output_format
+            if self.shard is not None:
+                stats['shard'] = f"{self.shard[0]}/{self.shard[1]}"
+            stats['manifest'] = self.manifest.path
+            stats['telemetry'] = self.telemetry.summary()
+            self.on_stats(stats)
+            self.progress.finish("Processing complete")
+            return {'rows': self.manifest.rows, 'manifest': self.manifest.path}
+            
+        except Exception as e:
+            self.on_error("Error", f"An error occurred: {str(e)}")
+            return None
+    
+    def record_throughput(self):
+        """Keep this run's request throughput for future batch estimates"""
+        summary = self.telemetry.summary()
+        total_characters = sum(model['characters'] for model in summary['models'].values())
+        for model, totals in summary['models'].items():
+            if totals['requests'] < MIN_THROUGHPUT_REQUESTS:
+                continue
+            # Mixed-model runs share the run time in proportion to characters
+            seconds = summary['seconds'] * totals['characters'] / max(1, total_characters)
+            self.journal.record_throughput(
+                model, totals['requests'], totals['characters'], seconds, self.concurrency
+            )
+    
+    def process_file(self, client, executor, i, total_files, file_info):
+        """Stream the rows of one CSV file through the pool"""
+        # Extract file info
+        file_path = file_info['file_path']
+        column_index = file_info['column_index']
+        voice = file_info['voice']
+        model = file_info['model']
+        instructions = file_info['instructions']
+        output_dir = file_info['output_dir']
+        
+        file_name = os.path.basename(file_path)
+        
+        # Rows finished by an earlier, interrupted run of this job
+        journaled_rows = {}
+        if self.journal is not None:
+            journaled_rows = self.journal.completed_rows(self.job_id, file_path)
+        
+        # Row count from the cached index, if the file has been indexed already
+        index = CSVIndex.load(file_path, self.settings.index_dir)
+        row_count = index.row_count if index is not None else None
+        
+        # Only this shard's rows are processed; row numbers (and so output
+        # names) stay those of the whole file so shards never collide
+        shard = file_info.get('shard')
+        if shard:
+            row_count = None
+        self.progress.start_file(i, file_name, row_count)
+        
+        # Rows are read lazily, only as fast as the pool can take them.
+        # Progress is measured in bytes of the file whose rows are finished.
+        rows = iter_column_texts(file_path, column_index)
+        base_name = os.path.splitext(file_name)[0]
+        file_id = self.written_rows.add_file(output_dir, base_name, self.settings.output_format)
+        
+        # Shards may share the output folder, so only unsplit runs may assume
+        # temporary files and stash links there are stale
+        if not shard:
+            self.remove_leftovers(output_dir, base_name)
+        
+        # Fingerprints of the audio the last run left at each row's output,
+        # read from the journal alongside the rows
+        previous = PreviousOutputs(
+            self.journal.previous_outputs(file_path, output_dir, self.settings.output_format)
+            if self.journal is not None else ()
+        )
+        has_previous = previous.row is not None
+        stashed = {}  # fingerprint -> link to the old audio of a changed row
+        
+        state = {
+            'file_path': file_path,
+            'output_dir': output_dir,
+            'voice': voice,
+            'model': model
+        }
+        in_flight = {}  # future -> [(row, text, output file, span, group key)] it renders
+        pending_groups = set()  # keys of rows dispatched or waiting in the pack
+        followers = {}  # group key -> [(row, text, output file, span)] waiting on it
+        pack = []  # short rows waiting to be sent as one request
+        next_row = 0
+        rows_exhausted = False
+        file_error = None
+        
+        def dispatch(batch):
+            future = executor.submit(
+                self.render_rows, client, [(text, output_file) for _, text, output_file, _, _ in batch],
+                voice, model, instructions
+            )
+            in_flight[future] = batch
+        
+        try:
+            while not rows_exhausted or in_flight:
+                # Fill the pool unless aborting or the file already failed
+                while (not rows_exhausted and len(in_flight) < self.concurrency
+                       and file_error is None and not self.is_aborted()):
+                    try:
+                        text, start, end = next(rows)
+                    except StopIteration:
+                        rows_exhausted = True
+                        break
+                    j = next_row
+                    next_row += 1
+                    span = end - start
+                    
+                    if shard and shard_of(text, shard[1]) != shard[0]:
+                        self.progress.advance(span, rows=0)
+                        continue
+                    
+                    # Generate output file name
+                    output_file = self.written_rows.output_path(file_id, j)
+                    group_key = self.group_key(text, voice, model, instructions)
+                    
+                    # Skip rows a previous run of this job already wrote
+                    if self.is_journaled(journaled_rows.get(j), text, output_file):
+                        self.rows_resumed += 1
+                        self.written_rows.add(group_key, file_id, j)
+                        self.finish_row(state, j, text, output_file, span, group_key, journal=False)
+                        continue
+                    
+                    # Leave rows whose audio has not changed untouched
+                    previous_key = previous.get(j)
+                    if previous_key == group_key and self.file_size(output_file) > 0:
+                        self.rows_unchanged += 1
+                        self.written_rows.add(group_key, file_id, j)
+                        self.finish_row(state, j, text, output_file, span, group_key, record=False)
+                        continue
+                    
+                    # Keep the old audio of a changed row for a later row it moved to
+                    # (unless an earlier row already took it)
+                    if (previous_key is not None and previous_key not in stashed
+                            and previous_key not in self.written_rows):
+                        stash = self.stash_output(output_file)
+                        if stash is not None:
+                            stashed[previous_key] = stash
+                    
+                    # Reuse an identical row instead of sending another request
+                    if group_key in self.written_rows:
+                        link_or_copy(self.written_rows.get(group_key), output_file)
+                        self.outputs.add(output_file)
+                        self.requests_saved += 1
+                        self.finish_row(state, j, text, output_file, span, group_key)
+                        continue
+                    
+                    # Reuse the audio a moved row had at its old position
+                    stash = stashed.pop(group_key, None)
+                    moved_from = stash
+                    if moved_from is None and has_previous:
+                        # Rows after this one have not been rewritten yet
+                        moved_row = self.journal.moved_output(
+                            file_path, output_dir, self.settings.output_format, group_key, j
+                        )
+                        if moved_row is not None:
+                            moved_from = self.written_rows.output_path(file_id, moved_row)
+                    moved = moved_from is not None and self.file_size(moved_from) > 0
+                    if moved:
+                        link_or_copy(moved_from, output_file)
+                    if stash is not None and os.path.lexists(stash):
+                        os.remove(stash)
+                    if moved:
+                        self.outputs.add(output_file)
+                        self.rows_moved += 1
+                        self.written_rows.add(group_key, file_id, j)
+                        self.finish_row(state, j, text, output_file, span, group_key)
+                        continue
+                    if group_key in pending_groups:
+                        followers[group_key].append((j, text, output_file, span))
+                        continue
+                    
+                    pending_groups.add(group_key)
+                    followers[group_key] = []
+                    row = (j, text, output_file, span, group_key)
+                    if not self.pack_rows or len(text) > PACK_ROW_CHARACTERS:
+                        dispatch([row])
+                        continue
+                    
+                    # Collect consecutive short rows into one request
+                    pack.append(row)
+                    if (len(pack) >= PACK_MAX_ROWS
+                            or sum(len(packed[1]) for packed in pack) >= PACK_MAX_CHARACTERS):
+                        dispatch(pack)
+                        pack = []
+                
+                # Send a partly filled pack once nothing else would fill it
+                if pack and file_error is None and not self.is_aborted() and (rows_exhausted or not in_flight):
+                    dispatch(pack)
+                    pack = []
+                
+                if not in_flight:
+                    break
+                
+                # Wake up regularly so coalesced progress is published
+                done, _ = wait(in_flight, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                self.progress.flush()
+                self.outputs.poll()
+                self.flush_results()
+                for future in done:
+                    batch = in_flight.pop(future)
+                    try:
+                        written = future.result()
+                    except Exception as e:
+                        # Stop dispatching rows for this file, let in-flight ones finish
+                        if file_error is None:
+                            file_error = e
+                        for j, text, output_file, span, group_key in batch:
+                            pending_groups.discard(group_key)
+                            waiting = followers.pop(group_key)
+                            if self.journal is not None:
+                                for row, row_text, row_output, _ in [(j, text, output_file, span)] + waiting:
+                                    self.journal.mark_row(
+                                        self.job_id, file_path, row, hash_text(row_text), 'failed', row_output
+                                    )
+                        continue
+                    
+                    for (j, text, output_file, span, group_key), row_written in zip(batch, written):
+                        pending_groups.discard(group_key)
+                        waiting = followers.pop(group_key)
+                        if not row_written:
+                            continue
+                        
+                        self.written_rows.add(group_key, file_id, j)
+                        self.finish_row(state, j, text, output_file, span, group_key)
+                        
+                        # Fill in duplicate rows that waited on this request
+                        for follower_row, follower_text, follower_file, follower_span in waiting:
+                            link_or_copy(output_file, follower_file)
+                            self.outputs.add(follower_file)
+                            self.requests_saved += 1
+                            self.finish_row(state, follower_row, follower_text, follower_file, follower_span, group_key)
+            
+            # Delete the outputs of rows removed from the end of the file
+            if has_previous and rows_exhausted and file_error is None and not self.is_aborted():
+                removed = self.journal.remove_outputs(file_path, output_dir, self.settings.output_format, next_row)
+                for row in removed:
+                    removed_file = self.written_rows.output_path(file_id, row)
+                    if os.path.lexists(removed_file):
+                        os.remove(removed_file)
+                        self.outputs_removed += 1
+        finally:
+            rows.close()
+            previous.close()
+            for stash in stashed.values():
+                if os.path.lexists(stash):
+                    os.remove(stash)
+            if self.journal is not None:
+                self.journal.flush()
+        
+        if file_error is not None:
+            raise file_error
+    
+    def finish_row(self, state, j, text, output_file, span, group_key, journal=True, record=True):
+        """Record a written row and update progress.
+        
+        `record` is False for rows whose output fingerprint is already recorded.
+        """
+        result = self.make_result(state['file_path'], output_file, text, state['voice'], state['model'])
+        result['row'] = j + 1
+        self.manifest.write(result)
+        self.result_batch.append(output_file)
+        if len(self.result_batch) >= RESULT_BATCH_ROWS:
+            self.flush_results(force=True)
+        
+        if journal and self.journal is not None:
+            self.journal.mark_row(self.job_id, state['file_path'], j, hash_text(text), 'done', output_file)
+        if record and self.journal is not None:
+            self.journal.record_output(
+                state['file_path'], state['output_dir'], self.settings.output_format, j, group_key
+            )
+        self.progress.advance(span)
+    
+    def flush_results(self, force=False):
+        """Write pending rows to the manifest and report them as one batch"""
+        now = time.monotonic()
+        if not self.result_batch or (not force and now - self.last_result_flush < RESULT_BATCH_SECONDS):
+            return
+        # Rows are on disk before anyone is told about them
+        self.manifest.flush()
+        batch, self.result_batch = self.result_batch, []
+        self.last_result_flush = now
+        self.on_results({'manifest': self.manifest.path, 'outputs': batch})
+    
+    @staticmethod
+    def file_size(file_path):
+        try:
+            return os.path.getsize(file_path)
+        except OSError:
+            return 0
+    
+    def remove_leftovers(self, output_dir, base_name):
+        """Delete temporary files and stash links a crashed run left next to a file's outputs"""
+        leftover = re.compile(
+            rf"{re.escape(base_name)}_\d+\.{re.escape(self.settings.output_format)}"
+            r"((\.\d+)?\.tmp(\.part\d+|\.pack\.pcm)?|\.prev)"
+        )
+        try:
+            entries = list(os.scandir(output_dir))
+        except OSError:
+            return
+        for entry in entries:
+            if leftover.fullmatch(entry.name):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+    
+    @staticmethod
+    def stash_output(output_file):
+        """Hardlink a row's current output aside before it is replaced.
+        
+        Returns the link, or None when there is no output or no link can be made.
+        """
+        stash = f"{output_file}.prev"
+        try:
+            if os.path.lexists(stash):
+                os.remove(stash)
+            os.link(output_file, stash)
+        except OSError:
+            return None
+        return stash
+    
+    def is_journaled(self, journal_entry, text, output_file):
+        """Check that a journaled row matches the current text and its output is intact.
+        
+        The job id covers the files, output folders and format, so a row's
+        output path is the same in every run of the job; only the text and
+        the file need checking.
+        """
+        if journal_entry is None or journal_entry != bytes.fromhex(hash_text(text)):
+            return False
+        try:
+            return os.path.getsize(output_file) > 0
+        except OSError:
+            return False
+    
+    def group_key(self, text, voice, model, instructions):
+        """Identify rows that would produce identical audio (a 16-byte fingerprint)"""
+        return row_digest(text, voice, model, instructions if model == "gpt-4o-mini-tts" else "")
+    
+    def make_result(self, file_path, output_file, text, voice, model):
+        """Build a processed-file record"""
+        return {
+            'input_file': file_path,
+            'output_file': output_file,
+            'text': text,
+            'voice': voice,
+            'model': model
+        }
+    
+    def cache_key(self, text, voice, model, instructions):
+        """Key of a row's audio in the cache, or None when caching is off"""
+        if self.cache is None:
+            return None
+        return make_cache_key(
+            text, voice, model,
+            instructions if model == "gpt-4o-mini-tts" else "",
+            self.settings.output_format
+        )
+    
+    def render_rows(self, client, rows, voice, model, instructions):
+        """Produce the output files for a dispatched batch of (text, output file) rows.
+        
+        Each row is written to a temporary file next to its output and renamed
+        into place once complete, so an output file is never seen half
+        written. Returns whether each row was written.
+        """
+        temp_rows = [(text, temp_path(output_file)) for text, output_file in rows]
+        try:
+            if len(temp_rows) == 1:
+                text, tmp_file = temp_rows[0]
+                written = [self.render_row(client, text, voice, model, instructions, tmp_file)]
+            else:
+                written = self.render_pack(client, temp_rows, voice, model, instructions)
+            for (_, output_file), (_, tmp_file), row_written in zip(rows, temp_rows, written):
+                if row_written:
+                    self.outputs.commit(tmp_file, output_file)
+            return written
+        finally:
+            for _, tmp_file in temp_rows:
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
+    
+    def render_row(self, client, text, voice, model, instructions, output_file):
+        """Produce the output file for a row, from the cache when possible"""
+        # Leftovers of an interrupted write are replaced, never written through
+        if os.path.lexists(output_file):
+            os.remove(output_file)
+        
+        # Long rows are synthesized as separately cached chunks
+        chunks = split_text(text)
+        if len(chunks) > 1:
+            return self.render_chunks(client, chunks, voice, model, instructions, output_file)
+        
+        cache_key = self.cache_key(text, voice, model, instructions)
+        if cache_key is not None and self.cache.get(cache_key, output_file):
+            return True
+        return self.synthesize_and_cache(client, text, voice, model, instructions, output_file, cache_key)
+    
+    def synthesize_and_cache(self, client, text, voice, model, instructions, output_file, cache_key):
+        """Synthesize a row that missed the cache and store the result"""
+        if not self.synthesize(client, text, voice, model, instructions, output_file):
+            return False
+        if cache_key is not None:
+            self.cache.put(cache_key, output_file)
+        return True
+    
+    def render_pack(self, client, rows, voice, model, instructions):
+        """Synthesize short rows as one request and split the audio at the pauses.
+        
+        The packed request returns raw PCM; when the number of pauses found does
+        not match the number of rows, each row is requested on its own instead.
+        """
+        written = [False] * len(rows)
+        missing = []  # (position, text, output file, cache key) of rows not in the cache
+        for k, (text, output_file) in enumerate(rows):
+            if os.path.lexists(output_file):
+                os.remove(output_file)
+            cache_key = self.cache_key(text, voice, model, instructions)
+            if cache_key is not None and self.cache.get(cache_key, output_file):
+                written[k] = True
+            else:
+                missing.append((k, text, output_file, cache_key))
+        
+        if len(missing) > 1:
+            packed_text = PACK_SEPARATOR.join(
+                text if text[-1] in _SENTENCE_ENDINGS else text + "."
+                for _, text, _, _ in missing
+            )
+            pcm_file = f"{missing[0][2]}.pack.pcm"
+            try:
+                if not self.synthesize(client, packed_text, voice, model, instructions, pcm_file,
+                                       response_format='pcm'):
+                    return written
+                with open(pcm_file, 'rb') as f:
+                    segments = split_on_silence(f.read(), len(missing))
+            finally:
+                if os.path.exists(pcm_file):
+                    os.remove(pcm_file)
+            
+            if segments is not None:
+                for (k, text, output_file, cache_key), segment in zip(missing, segments):
+                    write_segment(segment, output_file, self.settings.output_format)
+                    if cache_key is not None:
+                        self.cache.put(cache_key, output_file)
+                    written[k] = True
+                with self.stats_lock:
+                    self.rows_packed += len(missing)
+                return written
+            
+            with self.stats_lock:
+                self.pack_fallbacks += 1
+        
+        # Fall back to one request per row
+        futures = [
+            (k, self.chunk_executor.submit(
+                self.synthesize_and_cache, client, text, voice, model, instructions, output_file, cache_key
+            ))
+            for k, text, output_file, cache_key in missing
+        ]
+        error = None
+        for k, future in futures:
+            try:
+                written[k] = future.result()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return written
+    
+    def render_chunks(self, client, chunks, voice, model, instructions, output_file):
+        """Synthesize the chunks of a long row in parallel and join them in order"""
+        part_files = [f"{output_file}.part{k}" for k in range(len(chunks))]
+        futures = [
+            self.chunk_executor.submit(
+                self.render_row, client, chunk, voice, model, instructions, part_file
+            )
+            for chunk, part_file in zip(chunks, part_files)
+        ]
+        try:
+            # Wait for every chunk (even after a failure) before cleaning up
+            written = True
+            error = None
+            for future in futures:
+                try:
+                    written = future.result() and written
+                except Exception as e:
+                    error = error or e
+            if error is not None:
+                raise error
+            if not written:
+                return False
+            
+            concatenate_audio(part_files, output_file, self.settings.output_format)
+            return True
+        finally:
+            for part_file in part_files:
+                if os.path.exists(part_file):
+                    os.remove(part_file)
+    
+    def synthesize(self, client, text, voice, model, instructions, output_file, response_format=None):
+        """Generate speech for a single row (runs on a pool thread).
+        
+        Returns False if processing was aborted before the request was sent.
+        """
+        openai = load_openai()
+        limiter = self.rate_limiter(model)
+        
+        # Create parameters for the API call
+        params = {
+            "model": model,
+            "voice": voice,
+            "input": text,
+            "response_format": response_format or self.settings.output_format
+        }
+        
+        # Only add instructions parameter for models that support it
+        # and only if instructions are provided
+        if model == "gpt-4o-mini-tts" and instructions:
+            params["instructions"] = instructions
+        
+        # Queue wait covers rate limiting, request slots and earlier attempts
+        dispatched = time.monotonic()
+        attempt = 0
+        while True:
+            # Wait for the shared rate limiter before sending
+            if not limiter.acquire(len(text), self.is_aborted):
+                return False
+            
+            sent = None
+            try:
+                with self.request_slots:
+                    sent = time.monotonic()
+                    with client.audio.speech.with_streaming_response.create(**params) as response:
+                        first_byte = time.monotonic()
+                        limiter.update_from_headers(response.headers)
+                        response.stream_to_file(output_file)
+                        status = response.status_code
+                finished = time.monotonic()
+                limiter.record_success()
+                self.report_rate(model, limiter)
+                self.telemetry.record(
+                    model, len(text), sent - dispatched, first_byte - sent, finished - sent,
+                    os.path.getsize(output_file), attempt, status
+                )
+                return True
+            except TypeError as e:
+                if "unexpected keyword argument 'instructions'" in str(e) and "instructions" in params:
+                    # Fall back to without instructions if not supported
+                    params.pop("instructions")
+                    continue
+                raise
+            except (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError) as e:
+                if attempt >= MAX_RETRIES:
+                    self.record_failure(model, text, dispatched, sent, attempt, e)
+                    raise
+                attempt += 1
+                
+                # Honor Retry-After on 429s, back off exponentially on transient errors
+                response = getattr(e, 'response', None)
+                retry_after = retry_after_from_headers(response.headers if response is not None else None)
+                if isinstance(e, openai.RateLimitError):
+                    limiter.backoff(retry_after)
+                    self.report_rate(model, limiter)
+                else:
+                    self.wait_or_abort(retry_after if retry_after is not None else min(2 ** attempt, 30))
+            except openai.APIStatusError as e:
+                self.record_failure(model, text, dispatched, sent, attempt, e)
+                raise
+    
+    def record_failure(self, model, text, dispatched, sent, attempt, error):
+        """Record a request that failed for good"""
+        queue_wait = (sent if sent is not None else time.monotonic()) - dispatched
+        status = getattr(error, 'status_code', None) or type(error).__name__
+        self.telemetry.record(model, len(text), queue_wait, None, None, 0, attempt, status)
+    
+    def rate_limiter(self, model):
+        """Get the limiter shared by all requests for a model"""
+        with self.rate_limiters_lock:
+            limiter = self.rate_limiters.get(model)
+            if limiter is None:
+                requests_per_minute, characters_per_minute = self.settings.rate_limit(model)
+                limiter = RateLimiter(requests_per_minute, characters_per_minute)
+                self.rate_limiters[model] = limiter
+            return limiter
+    
+    def report_rate(self, model, limiter):
+        """Publish the current request rate, at most once per second"""
+        now = time.monotonic()
+        with self.rate_limiters_lock:
+            if now - self.last_rate_report < 1.0:
+                return
+            self.last_rate_report = now
+        
+        rate = limiter.snapshot()
+        rate['model'] = model
+        self.on_rate(rate)
+    
+    def is_aborted(self):
+        """Check whether processing should be aborted"""
+        return self.abort_event.is_set()
+    
+    def wait_or_abort(self, seconds):
+        """Sleep for up to `seconds`, waking early if processing is stopped"""
+        self.abort_event.wait(seconds)
+    
+    def stop(self):
+        """Stop processing"""
+        self.abort_event.set()
@@ -2,191 +2,112 @@
 import os
 import time
 import tempfile
+import threading
 from pathlib import Path
 
-from PySide6.QtCore import QObject, QThread, Signal, QMutex, QWaitCondition
+from PySide6.QtCore import QObject, QThread, Signal
 
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+from tts_engine import (
+    SynthesisEngine, OPENAI_AVAILABLE, create_http_client, create_client,
+    warm_connections, open_audio_cache, open_journal, open_preview_store, preview_key,
+    open_telemetry
+)
+from exporter import Exporter, ARCHIVE_MODES
+from manifest import read_manifest
+
+# Preview audio is forwarded to the player in chunks of this size
+PREVIEW_CHUNK_BYTES = 4096
 
 class TTSWorker(QThread):
     """Worker thread for TTS processing"""
-    progress_updated = Signal(int, int, str)  # current, total, message
-    processing_complete = Signal(list)  # list of processed files
+    progress_updated = Signal(dict)  # fraction, rows, rows/s, ETA and message
+    processing_complete = Signal(dict)  # rows written, manifest path
+    results_ready = Signal(dict)  # manifest path, batch of output files written
     processing_error = Signal(str, str)  # title, message
+    rate_updated = Signal(dict)  # current request/character rate
+    processing_stats = Signal(dict)  # end-of-run counters
     
-    def __init__(self, settings, files_to_process):
+    def __init__(self, settings, files_to_process, cache=None, journal=None, client=None, telemetry=None):
         super().__init__()
-        self.settings = settings
-        self.files_to_process = files_to_process
-        self.mutex = QMutex()
-        self.condition = QWaitCondition()
-        self.abort = False
+        self.engine = SynthesisEngine(
+            settings, files_to_process, cache, journal, client,
+            on_progress=self.progress_updated.emit,
+            on_error=self.processing_error.emit,
+            on_rate=self.rate_updated.emit,
+            on_stats=self.processing_stats.emit,
+            telemetry=telemetry,
+            on_results=self.results_ready.emit
+        )
     
     def run(self):
         """Process files in a separate thread"""
-        processed_files = []
-        
-        if not OPENAI_AVAILABLE:
-            self.processing_error.emit(
-                "OpenAI API Not Available",
-                "The OpenAI package is not installed. Please install it with 'pip install openai'."
-            )
-            return
-        
+        result = self.engine.run()
+        if result is not None:
+            self.processing_complete.emit(result)
+    
+    def stop(self):
+        """Stop processing"""
+        self.engine.stop()
+
+class ExportWorker(QThread):
+    """Worker thread that exports the outputs listed in a job manifest"""
+    export_progress = Signal(int, int)  # files done, total (0 if unknown)
+    export_complete = Signal(dict)  # counts of exported, missing and failed files
+    export_error = Signal(str, str)  # title, message
+    
+    def __init__(self, manifest_path, destination, mode, total=None):
+        super().__init__()
+        self.manifest_path = manifest_path
+        self.destination = destination  # folder, or archive file for zip and tar
+        self.total = total
+        self.exporter = Exporter(
+            mode,
+            on_progress=lambda done, total: self.export_progress.emit(done, total or 0)
+        )
+    
+    def run(self):
         try:
-            # Initialize OpenAI client
-            client = OpenAI(api_key=self.settings.api_key)
-            
-            total_files = len(self.files_to_process)
-            for i, file_info in enumerate(self.files_to_process):
-                # Check if processing should be aborted
-                self.mutex.lock()
-                if self.abort:
-                    self.mutex.unlock()
-                    break
-                self.mutex.unlock()
-                
-                try:
-                    # Extract file info
-                    file_path = file_info['file_path']
-                    column_index = file_info['column_index']
-                    voice = file_info['voice']
-                    model = file_info['model']
-                    instructions = file_info['instructions']
-                    output_dir = file_info['output_dir']
-                    
-                    # Update progress
-                    file_name = os.path.basename(file_path)
-                    self.progress_updated.emit(
-                        i, total_files,
-                        f"Processing {file_name} ({i+1}/{total_files})"
-                    )
-                    
-                    # Read CSV file
-                    import csv
-                    texts = []
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        reader = csv.reader(f)
-                        headers = next(reader)  # Skip header row
-                        
-                        for row in reader:
-                            if column_index < len(row):
-                                text = row[column_index].strip()
-                                if text:  # Skip empty texts
-                                    texts.append(text)
-                    
-                    # Process each text entry
-                    for j, text in enumerate(texts):
-                        # Check if processing should be aborted
-                        self.mutex.lock()
-                        if self.abort:
-                            self.mutex.unlock()
-                            break
-                        self.mutex.unlock()
-                        
-                        # Update progress
-                        self.progress_updated.emit(
-                            i + (j / len(texts)), total_files,
-                            f"Processing {file_name}: {j+1}/{len(texts)}"
-                        )
-                        
-                        # Generate output file name
-                        base_name = os.path.splitext(file_name)[0]
-                        output_file = os.path.join(
-                            output_dir,
-                            f"{base_name}_{j+1}.{self.settings.output_format}"
-                        )
-                        
-                        # Generate speech
-                        try:
-                            # Create parameters for the API call
-                            params = {
-                                "model": model,
-                                "voice": voice,
-                                "input": text,
-                                "response_format": self.settings.output_format
-                            }
-                            
-                            # Only add instructions parameter for models that support it
-                            # and only if instructions are provided
-                            if model == "gpt-4o-mini-tts" and instructions:
-                                try:
-                                    # Try with instructions parameter
-                                    with client.audio.speech.with_streaming_response.create(
-                                        **params,
-                                        instructions=instructions
-                                    ) as response:
-                                        response.stream_to_file(output_file)
-                                except Exception as e:
-                                    if "unexpected keyword argument 'instructions'" in str(e):
-                                        # Fall back to without instructions if not supported
-                                        response = client.audio.speech.create(**params)
-                                        response.stream_to_file(output_file)
-                                    else:
-                                        raise
-                            else:
-                                # For older models or when no instructions are provided
-                                response = client.audio.speech.create(**params)
-                                response.stream_to_file(output_file)
-                        except Exception as e:
-                            # Handle specific API errors
-                            error_msg = str(e)
-                            if "unexpected keyword argument 'instructions'" in error_msg:
-                                self.processing_error.emit(
-                                    "API Error",
-                                    f"There was an error using instructions with the model '{model}'. This might be due to an API version mismatch or the OpenAI client library not supporting this feature yet."
-                                )
-                            else:
-                                # Re-raise other exceptions
-                                raise
-                        
-                        # Add to processed files
-                        processed_files.append({
-                            'input_file': file_path,
-                            'output_file': output_file,
-                            'text': text,
-                            'voice': voice,
-                            'model': model
-                        })
-                        
-                        # Small delay to prevent API rate limiting
-                        time.sleep(0.5)
-                    
-                except Exception as e:
-                    self.processing_error.emit(
-                        "Processing Error",
-                        f"Error processing {file_path}: {str(e)}"
-                    )
-            
-            # Signal completion
-            self.progress_updated.emit(total_files, total_files, "Processing complete")
-            self.processing_complete.emit(processed_files)
-            
+            _, records = read_manifest(self.manifest_path)
+            output_files = (record['output_file'] for record in records)
+            if self.exporter.mode in ARCHIVE_MODES:
+                result = self.exporter.export_archive(output_files, self.destination, self.manifest_path, self.total)
+            else:
+                result = self.exporter.export(output_files, self.destination, self.total)
+            self.export_complete.emit(result)
         except Exception as e:
-            self.processing_error.emit("Error", f"An error occurred: {str(e)}")
+            self.export_error.emit("Export Error", f"Error exporting files: {str(e)}")
     
     def stop(self):
-        """Stop processing"""
-        self.mutex.lock()
-        self.abort = True
-        self.mutex.unlock()
-        self.condition.wakeAll()
+        self.exporter.cancel()
 
 class TTSProcessor(QObject):
     """Handles TTS processing using OpenAI API"""
-    progress_updated = Signal(int, int, str)  # current, total, message
-    processing_complete = Signal(list)  # list of processed files
+    progress_updated = Signal(dict)  # fraction, rows, rows/s, ETA and message
+    processing_complete = Signal(dict)  # rows written, manifest path
+    results_ready = Signal(dict)  # manifest path, batch of output files written
     processing_error = Signal(str, str)  # title, message
-    preview_ready = Signal(str)  # preview file path
+    preview_started = Signal(str)  # output format of the preview stream
+    preview_chunk = Signal(bytes)  # preview audio as it arrives
+    preview_ready = Signal(str)  # preview file path (download complete)
+    rate_updated = Signal(dict)  # current request/character rate
+    processing_stats = Signal(dict)  # end-of-run counters
     
     def __init__(self, settings):
         super().__init__()
         self.settings = settings
         self.current_worker = None
+        self.audio_cache = None
+        self.journal = None
+        self.preview_store = None
+        
+        # One long-lived client, so requests reuse pooled keep-alive connections
+        self.client = None
+        self.http_client = None
+        self.client_config = None
+        self.client_lock = threading.Lock()
+        # Previews still streaming on each HTTP client; a replaced client is
+        # closed when its last preview finishes
+        self.client_users = {}
     
     def process_files(self, files_to_process):
         """Process files using a worker thread"""
@@ -194,14 +115,123 @@ class TTSProcessor(QObject):
         self.stop_processing()
         
         # Create and start new worker
-        self.current_worker = TTSWorker(self.settings, files_to_process)
+        self.current_worker = TTSWorker(
+            self.settings, files_to_process, self.get_audio_cache(), self.get_journal(),
+            self.get_client(), open_telemetry(self.settings)
+        )
         self.current_worker.progress_updated.connect(self.progress_updated)
         self.current_worker.processing_complete.connect(self.processing_complete)
+        self.current_worker.results_ready.connect(self.results_ready)
         self.current_worker.processing_error.connect(self.processing_error)
+        self.current_worker.rate_updated.connect(self.rate_updated)
+        self.current_worker.processing_stats.connect(self.processing_stats)
         self.current_worker.start()
         
         return self.current_worker
     
+    def get_client(self):
+        """Get the shared OpenAI client, rebuilding it if the API settings changed"""
+        config = (
+            self.settings.api_key, self.settings.endpoint,
+            self.settings.timeout, self.settings.concurrency
+        )
+        with self.client_lock:
+            if self.client is not None and (config == self.client_config or self.is_processing()):
+                return self.client
+            
+            # Only replaced between jobs, never under a running worker
+            if self.http_client is not None and not self.client_users.get(self.http_client):
+                self.http_client.close()
+            self.http_client = create_http_client(self.settings)
+            self.client = create_client(self.settings, self.http_client)
+            self.client_config = config
+            return self.client
+    
+    def acquire_client(self):
+        """Get the shared client for a preview; pair with release_client when it finishes"""
+        while True:
+            client = self.get_client()
+            with self.client_lock:
+                # Retry if another thread replaced the client in between
+                if client is not self.client:
+                    continue
+                http_client = self.http_client
+                self.client_users[http_client] = self.client_users.get(http_client, 0) + 1
+                return client, http_client
+    
+    def release_client(self, http_client):
+        """Finish a preview's use of a client, closing it if it has been replaced"""
+        with self.client_lock:
+            users = self.client_users.pop(http_client, 0) - 1
+            if users > 0:
+                self.client_users[http_client] = users
+            elif http_client is not self.http_client:
+                http_client.close()
+    
+    def warm_up(self):
+        """Create the client and open its connections in the background"""
+        if not OPENAI_AVAILABLE or not self.settings.api_key:
+            return
+        
+        def warm():
+            try:
+                client = self.get_client()
+                warm_connections(self.http_client, client.base_url, self.settings.concurrency)
+            except Exception:
+                # Warming is only an optimization; real errors surface on first use
+                pass
+        
+        threading.Thread(target=warm, daemon=True).start()
+    
+    def get_audio_cache(self):
+        """Get the persistent audio cache, or None if caching is disabled"""
+        if not self.settings.cache_enabled:
+            return None
+        if self.audio_cache is None:
+            self.audio_cache = open_audio_cache(self.settings)
+        else:
+            self.audio_cache.max_bytes = self.settings.cache_size_mb * 1024 * 1024
+        return self.audio_cache
+    
+    def get_preview_store(self):
+        """Get the store of finished previews, applying the current size limit"""
+        if self.preview_store is None:
+            self.preview_store = open_preview_store(self.settings)
+        else:
+            self.preview_store.max_bytes = self.settings.preview_cache_mb * 1024 * 1024
+        return self.preview_store
+    
+    def clean_up_previews(self):
+        """Trim the preview store and remove stray temp files, in the background"""
+        def clean():
+            try:
+                self.get_preview_store().trim()
+                # Unfinished downloads and previews from before the store existed
+                for path in Path(self.settings.temp_dir).glob("preview_*"):
+                    path.unlink(missing_ok=True)
+            except OSError:
+                pass
+        
+        threading.Thread(target=clean, daemon=True).start()
+    
+    def get_journal(self):
+        """Get the job journal used to resume interrupted runs"""
+        if self.journal is None:
+            self.journal = open_journal(self.settings)
+        return self.journal
+    
+    def last_unfinished_job(self):
+        """Get (files_to_process, output_format) of the last interrupted job, or None"""
+        job = self.get_journal().last_unfinished_job()
+        if job is None:
+            return None
+        _, files_to_process, output_format = job
+        return files_to_process, output_format
+    
+    def is_processing(self):
+        """Check whether a batch worker is running"""
+        return self.current_worker is not None and self.current_worker.isRunning()
+    
     def stop_processing(self):
         """Stop current processing"""
         if self.current_worker and self.current_worker.isRunning():
@@ -209,7 +239,7 @@ class TTSProcessor(QObject):
             self.current_worker.wait()
     
     def generate_preview(self, text, voice, model, instructions):
-        """Generate a preview of the TTS"""
+        """Generate a preview of the TTS, streaming the audio as it arrives"""
         if not OPENAI_AVAILABLE:
             self.processing_error.emit(
                 "OpenAI API Not Available",
@@ -219,79 +249,114 @@ class TTSProcessor(QObject):
         
         # Create a worker thread for the preview
         class PreviewWorker(QThread):
+            preview_started = Signal(str)  # output format
+            preview_chunk = Signal(bytes)  # audio bytes as they arrive
             preview_ready = Signal(str)
             preview_error = Signal(str, str)
             
-            def __init__(self, settings, text, voice, model, instructions):
+            def __init__(self, settings, client, store, key, text, voice, model, instructions):
                 super().__init__()
                 self.settings = settings
+                self.client = client
+                self.store = store
+                self.key = key
                 self.text = text
                 self.voice = voice
                 self.model = model
                 self.instructions = instructions
+                self.cancelled = False
+            
+            def stream(self, client, params, preview_file):
+                """Write the response to the preview file while forwarding each chunk"""
+                with client.audio.speech.with_streaming_response.create(**params) as response:
+                    self.preview_started.emit(params["response_format"])
+                    with open(preview_file, 'wb') as f:
+                        for chunk in response.iter_bytes(PREVIEW_CHUNK_BYTES):
+                            if self.cancelled:
+                                return
+                            f.write(chunk)
+                            self.preview_chunk.emit(chunk)
             
             def run(self):
                 try:
-                    # Initialize OpenAI client
-                    client = OpenAI(api_key=self.settings.api_key)
+                    # Use the shared client (with the SDK's own retries for previews)
+                    client = self.client.with_options(max_retries=2)
                     
-                    # Create temp file
-                    preview_file = os.path.join(
+                    # Download to a temp file, then move it into the store
+                    download_file = os.path.join(
                         self.settings.temp_dir,
-                        f"preview_{int(time.time())}.{self.settings.output_format}"
+                        f"preview_{time.time_ns()}.{self.settings.output_format}"
                     )
                     
+                    # Create parameters for the API call
+                    params = {
+                        "model": self.model,
+                        "voice": self.voice,
+                        "input": self.text,
+                        "response_format": self.settings.output_format
+                    }
+                    
+                    # Only add instructions parameter for models that support it
+                    # and only if instructions are provided
+                    if self.model == "gpt-4o-mini-tts" and self.instructions:
+                        params["instructions"] = self.instructions
+                    
                     # Generate speech
                     try:
-                        # Create parameters for the API call
-                        params = {
-                            "model": self.model,
-                            "voice": self.voice,
-                            "input": self.text,
-                            "response_format": self.settings.output_format
-                        }
+                        try:
+                            self.stream(client, params, download_file)
+                        except TypeError as e:
+                            if "unexpected keyword argument 'instructions'" in str(e) and "instructions" in params:
+                                # Fall back to without instructions if not supported
+                                params.pop("instructions")
+                                self.stream(client, params, download_file)
+                            else:
+                                raise
                         
-                        # Only add instructions parameter for models that support it
-                        # and only if instructions are provided
-                        if self.model == "gpt-4o-mini-tts" and self.instructions:
-                            try:
-                                # Try with instructions parameter
-                                with client.audio.speech.with_streaming_response.create(
-                                    **params,
-                                    instructions=self.instructions
-                                ) as response:
-                                    response.stream_to_file(preview_file)
-                            except Exception as e:
-                                if "unexpected keyword argument 'instructions'" in str(e):
-                                    # Fall back to without instructions if not supported
-                                    response = client.audio.speech.create(**params)
-                                    response.stream_to_file(preview_file)
-                                else:
-                                    raise
-                        else:
-                            # For older models or when no instructions are provided
-                            response = client.audio.speech.create(**params)
-                            response.stream_to_file(preview_file)
-                    except Exception as e:
-                        # Handle specific API errors
-                        error_msg = str(e)
-                        if "unexpected keyword argument 'instructions'" in error_msg:
-                            self.preview_error.emit(
-                                "API Error",
-                                f"There was an error using instructions with the model '{self.model}'. This might be due to an API version mismatch or the OpenAI client library not supporting this feature yet."
-                            )
-                        else:
-                            # Re-raise other exceptions
-                            raise
+                        if self.cancelled:
+                            return
+                        self.store.put(self.key, download_file, move=True)
+                    finally:
+                        if os.path.exists(download_file):
+                            os.remove(download_file)
                     
                     # Signal completion
-                    self.preview_ready.emit(preview_file)
+                    preview_file = self.store.lookup(self.key)
+                    if preview_file is None:
+                        raise OSError("the preview could not be saved")
+                    self.preview_ready.emit(str(preview_file))
                     
                 except Exception as e:
                     self.preview_error.emit("Preview Error", f"Error generating preview: {str(e)}")
         
+        # A newer preview replaces one still downloading
+        previous = getattr(self, '_preview_worker', None)
+        if previous is not None and previous.isRunning():
+            previous.cancelled = True
+            previous.preview_started.disconnect()
+            previous.preview_chunk.disconnect()
+            previous.preview_ready.disconnect()
+            # Keep it referenced until its thread exits
+            self._retired_previews = [
+                w for w in getattr(self, '_retired_previews', []) if w.isRunning()
+            ] + [previous]
+        
+        # Identical previews are replayed from the store without an API call
+        store = self.get_preview_store()
+        key = preview_key(text, voice, model, instructions, self.settings.output_format)
+        preview_file = store.lookup(key)
+        if preview_file is not None:
+            self.preview_ready.emit(str(preview_file))
+            return
+        
         # Create and start worker
-        worker = PreviewWorker(self.settings, text, voice, model, instructions)
+        client, http_client = self.acquire_client()
+        worker = PreviewWorker(
+            self.settings, client, store, key, text, voice, model, instructions
+        )
+        worker.finished.connect(lambda: self.release_client(http_client))
+        worker.preview_started.connect(self.preview_started)
+        worker.preview_chunk.connect(self.preview_chunk)
         worker.preview_ready.connect(self.preview_ready)
         worker.preview_error.connect(self.processing_error)
         worker.start()
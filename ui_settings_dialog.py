@@ -15,7 +15,7 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QFont, QFontDatabase, QGradient, QIcon,
     QImage, QKeySequence, QLinearGradient, QPainter,
     QPalette, QPixmap, QRadialGradient, QTransform)
-from PySide6.QtWidgets import (QAbstractButton, QApplication, QComboBox, QDialog,
+from PySide6.QtWidgets import (QAbstractButton, QApplication, QCheckBox, QComboBox, QDialog,
     QDialogButtonBox, QFormLayout, QGroupBox, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QSizePolicy,
     QSpinBox, QTabWidget, QVBoxLayout, QWidget)
@@ -69,6 +69,55 @@ class Ui_SettingsDialog(object):
 
         self.formLayout.setWidget(2, QFormLayout.FieldRole, self.timeoutInput)
 
+        self.label_4 = QLabel(self.apiTab)
+        self.label_4.setObjectName(u"label_4")
+
+        self.formLayout.setWidget(3, QFormLayout.LabelRole, self.label_4)
+
+        self.concurrencyInput = QSpinBox(self.apiTab)
+        self.concurrencyInput.setObjectName(u"concurrencyInput")
+        self.concurrencyInput.setMinimum(1)
+        self.concurrencyInput.setMaximum(32)
+        self.concurrencyInput.setValue(4)
+
+        self.formLayout.setWidget(3, QFormLayout.FieldRole, self.concurrencyInput)
+
+        self.metricsEnabledCheck = QCheckBox(self.apiTab)
+        self.metricsEnabledCheck.setObjectName(u"metricsEnabledCheck")
+
+        self.formLayout.setWidget(4, QFormLayout.SpanningRole, self.metricsEnabledCheck)
+
+        self.label_shard = QLabel(self.apiTab)
+        self.label_shard.setObjectName(u"label_shard")
+
+        self.formLayout.setWidget(5, QFormLayout.LabelRole, self.label_shard)
+
+        self.shardLayout = QHBoxLayout()
+        self.shardLayout.setObjectName(u"shardLayout")
+        self.shardIndexInput = QSpinBox(self.apiTab)
+        self.shardIndexInput.setObjectName(u"shardIndexInput")
+        self.shardIndexInput.setMinimum(1)
+        self.shardIndexInput.setMaximum(1024)
+        self.shardIndexInput.setValue(1)
+
+        self.shardLayout.addWidget(self.shardIndexInput)
+
+        self.label_shard_of = QLabel(self.apiTab)
+        self.label_shard_of.setObjectName(u"label_shard_of")
+
+        self.shardLayout.addWidget(self.label_shard_of)
+
+        self.shardCountInput = QSpinBox(self.apiTab)
+        self.shardCountInput.setObjectName(u"shardCountInput")
+        self.shardCountInput.setMinimum(1)
+        self.shardCountInput.setMaximum(1024)
+        self.shardCountInput.setValue(1)
+
+        self.shardLayout.addWidget(self.shardCountInput)
+
+
+        self.formLayout.setLayout(5, QFormLayout.FieldRole, self.shardLayout)
+
         self.tabWidget.addTab(self.apiTab, "")
         self.ttsTab = QWidget()
         self.ttsTab.setObjectName(u"ttsTab")
@@ -118,6 +167,43 @@ class Ui_SettingsDialog(object):
 
         self.formLayout_2.setWidget(2, QFormLayout.FieldRole, self.formatCombo)
 
+        self.cacheEnabledCheck = QCheckBox(self.ttsTab)
+        self.cacheEnabledCheck.setObjectName(u"cacheEnabledCheck")
+        self.cacheEnabledCheck.setChecked(True)
+
+        self.formLayout_2.setWidget(3, QFormLayout.SpanningRole, self.cacheEnabledCheck)
+
+        self.label_cache_size = QLabel(self.ttsTab)
+        self.label_cache_size.setObjectName(u"label_cache_size")
+
+        self.formLayout_2.setWidget(4, QFormLayout.LabelRole, self.label_cache_size)
+
+        self.cacheSizeInput = QSpinBox(self.ttsTab)
+        self.cacheSizeInput.setObjectName(u"cacheSizeInput")
+        self.cacheSizeInput.setMinimum(16)
+        self.cacheSizeInput.setMaximum(1048576)
+        self.cacheSizeInput.setValue(2048)
+
+        self.formLayout_2.setWidget(4, QFormLayout.FieldRole, self.cacheSizeInput)
+
+        self.label_preview_cache_size = QLabel(self.ttsTab)
+        self.label_preview_cache_size.setObjectName(u"label_preview_cache_size")
+
+        self.formLayout_2.setWidget(5, QFormLayout.LabelRole, self.label_preview_cache_size)
+
+        self.previewCacheSizeInput = QSpinBox(self.ttsTab)
+        self.previewCacheSizeInput.setObjectName(u"previewCacheSizeInput")
+        self.previewCacheSizeInput.setMinimum(1)
+        self.previewCacheSizeInput.setMaximum(65536)
+        self.previewCacheSizeInput.setValue(100)
+
+        self.formLayout_2.setWidget(5, QFormLayout.FieldRole, self.previewCacheSizeInput)
+
+        self.packShortRowsCheck = QCheckBox(self.ttsTab)
+        self.packShortRowsCheck.setObjectName(u"packShortRowsCheck")
+
+        self.formLayout_2.setWidget(6, QFormLayout.SpanningRole, self.packShortRowsCheck)
+
         self.modelInfoGroup = QGroupBox(self.ttsTab)
         self.modelInfoGroup.setObjectName(u"modelInfoGroup")
         self.modelInfoGroup.setFlat(True)
@@ -130,7 +216,7 @@ class Ui_SettingsDialog(object):
         self.verticalLayout_model.addWidget(self.modelDescription)
 
 
-        self.formLayout_2.setWidget(3, QFormLayout.SpanningRole, self.modelInfoGroup)
+        self.formLayout_2.setWidget(7, QFormLayout.SpanningRole, self.modelInfoGroup)
 
         self.tabWidget.addTab(self.ttsTab, "")
 
@@ -153,6 +239,22 @@ class Ui_SettingsDialog(object):
         self.label.setText(QCoreApplication.translate("SettingsDialog", u"API Key:", None))
         self.label_2.setText(QCoreApplication.translate("SettingsDialog", u"Endpoint:", None))
         self.label_3.setText(QCoreApplication.translate("SettingsDialog", u"Timeout (ms):", None))
+        self.label_4.setText(QCoreApplication.translate("SettingsDialog", u"Concurrent Requests:", None))
+#if QT_CONFIG(tooltip)
+        self.concurrencyInput.setToolTip(QCoreApplication.translate("SettingsDialog", u"Number of TTS requests kept in flight at once", None))
+#endif // QT_CONFIG(tooltip)
+#if QT_CONFIG(tooltip)
+        self.metricsEnabledCheck.setToolTip(QCoreApplication.translate("SettingsDialog", u"Append per-request timings to metrics/requests.jsonl and keep a Prometheus textfile (metrics/csvtts.prom) in the app data folder", None))
+#endif // QT_CONFIG(tooltip)
+        self.metricsEnabledCheck.setText(QCoreApplication.translate("SettingsDialog", u"Write request metrics during batch runs", None))
+        self.label_shard.setText(QCoreApplication.translate("SettingsDialog", u"Batch Shard:", None))
+#if QT_CONFIG(tooltip)
+        self.shardIndexInput.setToolTip(QCoreApplication.translate("SettingsDialog", u"Which share of the rows this machine processes when a batch is split across several machines", None))
+#endif // QT_CONFIG(tooltip)
+        self.label_shard_of.setText(QCoreApplication.translate("SettingsDialog", u"of", None))
+#if QT_CONFIG(tooltip)
+        self.shardCountInput.setToolTip(QCoreApplication.translate("SettingsDialog", u"Number of machines sharing each batch (1 processes every row here)", None))
+#endif // QT_CONFIG(tooltip)
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.apiTab), QCoreApplication.translate("SettingsDialog", u"API Settings", None))
         self.label_voice.setText(QCoreApplication.translate("SettingsDialog", u"Default Voice:", None))
         self.label_model.setText(QCoreApplication.translate("SettingsDialog", u"Default Model:", None))
@@ -163,6 +265,16 @@ class Ui_SettingsDialog(object):
         self.refreshModelsButton.setToolTip(QCoreApplication.translate("SettingsDialog", u"Refresh available models", None))
 #endif // QT_CONFIG(tooltip)
         self.label_format.setText(QCoreApplication.translate("SettingsDialog", u"Output Format:", None))
+        self.cacheEnabledCheck.setText(QCoreApplication.translate("SettingsDialog", u"Reuse cached audio for unchanged rows", None))
+        self.label_cache_size.setText(QCoreApplication.translate("SettingsDialog", u"Cache Size (MB):", None))
+        self.label_preview_cache_size.setText(QCoreApplication.translate("SettingsDialog", u"Preview Storage (MB):", None))
+#if QT_CONFIG(tooltip)
+        self.previewCacheSizeInput.setToolTip(QCoreApplication.translate("SettingsDialog", u"Previews are kept and replayed for identical text, voice and model; the oldest are deleted past this size", None))
+#endif // QT_CONFIG(tooltip)
+#if QT_CONFIG(tooltip)
+        self.packShortRowsCheck.setToolTip(QCoreApplication.translate("SettingsDialog", u"Send runs of very short rows as one request and split the audio at the pauses (WAV output, or ffmpeg for other formats)", None))
+#endif // QT_CONFIG(tooltip)
+        self.packShortRowsCheck.setText(QCoreApplication.translate("SettingsDialog", u"Pack short rows into combined requests", None))
         self.modelInfoGroup.setTitle(QCoreApplication.translate("SettingsDialog", u"Model Information", None))
         self.modelDescription.setText(QCoreApplication.translate("SettingsDialog", u"\u2022 tts-1: Fast response, standard quality\n"
 "\u2022 tts-1-hd: Higher quality, moderate latency\n"